@@ -0,0 +1,52 @@
+import contextlib
+import contextvars
+import time
+
+from automakeup import metrics
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    def __init__(self):
+        super().__init__("Deadline exceeded before processing finished")
+
+
+@contextlib.contextmanager
+def until(deadline):
+    """
+    Set deadline for code block run in the current thread
+
+    Examples:
+        with deadlines.until(time.monotonic() + 5):
+            pipeline.run(img)
+
+    Args:
+        deadline: time.monotonic() value after which work should be dropped. if None there is no deadline.
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current():
+    return _deadline.get()
+
+
+def remaining():
+    """Returns seconds left until the deadline, or None if there is no deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired(deadline):
+    return deadline is not None and deadline < time.monotonic()
+
+
+def check():
+    """Raise DeadlineExceededError if the deadline of the current thread has passed"""
+    if expired(_deadline.get()):
+        metrics.event("deadline_exceeded")
+        raise DeadlineExceededError()
@@ -10,30 +10,114 @@ from imagine.helpers import normalization
 
 class EncodedRecommender(ABC):
     @abstractmethod
-    def recommend(self, features):
+    def recommend(self, features, seed=None):
+        """
+        Recommend encoded makeup
+
+        Args:
+            features: numpy array of shape ([N], features) with encoded face features
+            seed: random seed or sequence of N seeds (one for each sample) to get reproducible recommendations
+
+        Returns:
+            numpy array of shape ([N], makeup features) with encoded makeup
+        """
         return NotImplemented
 
 
+def farthest_points(points, k):
+    """
+    Choose k diverse points in each set with farthest point selection
+
+    The first chosen point is the one closest to the mean of the set,
+    each next one is the point farthest from all points chosen so far.
+
+    Args:
+        points: numpy array of shape (N, M, D) with N sets of M points
+        k: number of points to choose from each set, at most M
+
+    Returns:
+        numpy array of shape (N, k) with indices of chosen points in the order of choosing
+    """
+    n = len(points)
+    rows = np.arange(n)
+    distances = np.linalg.norm(points[:, :, None] - points[:, None], axis=-1)
+    chosen = [np.argmin(np.linalg.norm(points - points.mean(axis=1, keepdims=True), axis=-1), axis=1)]
+    min_distances = distances[rows, chosen[0]]
+    for _ in range(1, k):
+        chosen.append(np.argmax(min_distances, axis=1))
+        min_distances = np.minimum(min_distances, distances[rows, chosen[-1]])
+    return np.stack(chosen, axis=1)
+
+
+def lab_units(lab):
+    """Convert Lab colors from OpenCV 8-bit representation to L in [0, 100] and a, b in [-128, 127]"""
+    return (lab - np.array([0, 128, 128])) * np.array([100 / 255, 1, 1])
+
+
 class GanetteRecommender(EncodedRecommender):
-    def __init__(self, model, x_scaler, y_scaler):
+    def __init__(self, model, x_scaler, y_scaler, oversampling=4):
+        """
+        Args:
+            oversampling: how many times more candidates than requested recommendations are sampled
+                          in recommend_many() to choose diverse ones from
+        """
         super().__init__()
         self.model = model
         self.x_scaler = x_scaler
         self.y_scaler = y_scaler
+        self.oversampling = oversampling
         self.preprocess = f.Join([
-            f.Rearrange("(f fs) -> 1 f fs", fs=3),
+            f.Rearrange("n (f fs) -> n f fs", fs=3),
             normalization.ToUInt8(),
             conversion.RgbToLab,
-            f.Rearrange("1 f fs -> 1 (f fs)", fs=3)
+            f.Rearrange("n f fs -> n (f fs)", fs=3)
         ])
         self.postprocess = f.Join([
-            f.Rearrange("1 (f fs) -> 1 f fs", fs=3),
+            f.Rearrange("n (f fs) -> n f fs", fs=3),
             normalization.Round(),
             conversion.LabToRgb,
-            f.Rearrange("1 f fs -> (f fs)", fs=3)
+            f.Rearrange("n f fs -> n (f fs)", fs=3)
         ])
 
-    def recommend(self, features):
-        y = self.y_scaler.transform(self.preprocess(features))
-        x = self.model.sample(y)
-        return self.postprocess(self.x_scaler.inverse_transform(x))
+    def recommend(self, features, seed=None):
+        # whole batch is converted as one image with a row for each sample
+        batch = np.atleast_2d(features)
+        y = self.y_scaler.transform(self.preprocess(batch))
+        x = self.model.sample(y, state=seed)
+        out = self.postprocess(self.x_scaler.inverse_transform(x))
+        return out if np.ndim(features) > 1 else out[0]
+
+    def recommend_many(self, features, k, seed=None):
+        """
+        Recommend k diverse makeups for each face
+
+        Candidates for each face are sampled in one model forward, then k of them which are the most different
+        in Lab space are chosen. The first one is the most typical candidate, the next ones add the most variety.
+
+        Args:
+            features: numpy array of shape ([N], features) with encoded face features
+            k: number of recommendations for each face
+            seed: random seed or sequence of N seeds (one for each face) to get reproducible recommendations
+
+        Returns:
+            numpy array of shape ([N], k, makeup features) with encoded makeup in the order of choosing
+        """
+        batch = np.atleast_2d(features)
+        n, m = len(batch), k * self.oversampling
+        y = np.repeat(self.y_scaler.transform(self.preprocess(batch)), m, axis=0)
+        x = self.x_scaler.inverse_transform(self.model.sample(y, state=self._candidate_states(seed, n, m)))
+        candidates = f.Rearrange("(n m) (f fs) -> n m f fs", m=m, fs=3)(x)
+        chosen = farthest_points(f.Rearrange("n m f fs -> n m (f fs)")(lab_units(candidates)), k)
+        picked = np.take_along_axis(candidates, chosen[:, :, None, None], axis=1)
+        out = f.Rearrange("(n k) d -> n k d", k=k)(self.postprocess(f.Rearrange("n k f fs -> (n k) (f fs)")(picked)))
+        return out if np.ndim(features) > 1 else out[0]
+
+    @staticmethod
+    def _candidate_states(seed, n, m):
+        if seed is None or np.ndim(seed) == 0:
+            return seed
+        # candidates of each face get states derived from its seed, so they don't depend on other faces
+        states = []
+        for s in seed:
+            states.extend([None] * m if s is None else np.random.default_rng(s).integers(0, 2 ** 63 - 1, m).tolist())
+        return states
@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
 
-import dlib
+import cv2
 import numpy as np
 
 from imagine.functional import functional as f
+from imagine.shape import operations
 from imagine.shape.figures import Rect
 
 
@@ -12,10 +13,61 @@ class BoundingBoxFinder(ABC):
     def find(self, img):
         return NotImplemented
 
+    def find_batch(self, imgs):
+        """
+        Find faces in many images
+
+        Args:
+            imgs: sequence of numpy arrays of shape (height, width, 3) in RGB, sizes can differ
+
+        Returns:
+            list with Rect or None for each image
+        """
+        return [self.find(img) for img in imgs]
+
+    def find_all(self, img, min_probability=0.9, min_size=0):
+        """
+        Find all faces in image
+
+        Args:
+            img: numpy array of shape (height, width, 3) in RGB
+            min_probability: faces detected with lower probability are skipped, if the finder provides it
+            min_size: faces with shorter side of bounding box smaller than this size in pixels are skipped
+
+        Returns:
+            list of Rect, the most certain face first
+        """
+        bb = self.find(img)
+        return [bb] if bb is not None and min(bb.width(), bb.height()) >= min_size else []
+
+    def find_around(self, img, bb, margin=0.5):
+        """
+        Find face only in the area around given bounding box
+
+        Args:
+            img: numpy array of shape (height, width, 3) in RGB
+            bb: Rect around which to search
+            margin: how much to extend bb on each side relative to its size
+
+        Returns:
+            Rect in img coordinates or None if there is no face in the area
+        """
+        area = bb.scale(1 + 2 * margin)
+        area = Rect(max(area.top, 0), min(area.bottom, img.shape[0]), max(area.left, 0), min(area.right, img.shape[1]))
+        if area.width() <= 0 or area.height() <= 0:
+            return None
+        found = self._find_in_area(operations.crop(img, area))
+        return found.translate(area.left, area.top) if found is not None else None
+
+    def _find_in_area(self, img):
+        """Find face in the area cropped by find_around(), override if it shouldn't be done with find()"""
+        return self.find(img)
+
 
 class DlibBoundingBoxFinder(BoundingBoxFinder):
     def __init__(self):
         super().__init__()
+        import dlib
         self.detector = dlib.get_frontal_face_detector()
 
     def find(self, img):
@@ -27,14 +79,98 @@ class DlibBoundingBoxFinder(BoundingBoxFinder):
 
 
 class MTCNNBoundingBoxFinder(BoundingBoxFinder):
-    def __init__(self, mtcnn):
+    def __init__(self, mtcnn, batch_size=8, min_face_fraction=None, proxy_face_size=48, refine=False):
+        """
+        MTCNN runs a pyramid of scales down from its minimum face size, so its cost grows with image resolution.
+        Faces much bigger than the minimum face size can be found as well in a downscaled proxy of the image.
+
+        Args:
+            mtcnn: MTCNN object
+            batch_size: maximum number of images passed to MTCNN at once in find_batch()
+            min_face_fraction: if given, faces are searched for in a proxy of the image downscaled so that faces
+                               spanning this fraction of its shorter side are proxy_face_size pixels big.
+                               Smaller faces may be missed. if None faces are searched for in full resolution.
+            proxy_face_size: size in pixels of the smallest expected face in the proxy
+            refine: if True, face found in the proxy is searched for again around its box, which is then
+                    a bigger part of the (again downscaled) area, so the box is more accurate
+        """
         super().__init__()
         self.mtcnn = mtcnn
+        self.batch_size = batch_size
+        self.min_face_fraction = min_face_fraction
+        self.proxy_face_size = proxy_face_size
+        self.refine = refine
 
     def find(self, img):
-        img = f.Rearrange("h w c -> 1 h w c")(img)
-        bbs, _ = self.mtcnn.find(img)
-        if bbs[0] is None or bbs[0].size == 0:
+        bb = self._find_single(img)
+        if bb is not None and self.refine and self.min_face_fraction is not None:
+            bb = self.find_around(img, bb, margin=0.25) or bb
+        return bb
+
+    def find_batch(self, imgs):
+        # MTCNN needs images of the same size in a batch, so images are bucketed by shape
+        buckets = {}
+        for i, img in enumerate(imgs):
+            buckets.setdefault(img.shape, []).append(i)
+        found = [None] * len(imgs)
+        for shape, indices in buckets.items():
+            scale = self._proxy_scale(shape)
+            for start in range(0, len(indices), self.batch_size):
+                chunk = indices[start:start + self.batch_size]
+                bbs, _ = self.mtcnn.find(np.stack([self._proxy(imgs[i], scale) for i in chunk]))
+                for i, img_bbs in zip(chunk, bbs):
+                    found[i] = self._to_original(self._best_face(img_bbs), scale)
+        if self.refine and self.min_face_fraction is not None:
+            found = [self.find_around(img, bb, margin=0.25) or bb if bb is not None else None
+                     for img, bb in zip(imgs, found)]
+        return found
+
+    def find_all(self, img, min_probability=0.9, min_size=0):
+        scale = self._proxy_scale(img.shape)
+        proxy = f.Rearrange("h w c -> 1 h w c")(self._proxy(img, scale))
+        bbs, probs = self.mtcnn.find(proxy)
+        if bbs[0] is None:
+            return []
+        found = [self._to_original(self._to_rect(bb), scale)
+                 for bb, probability in zip(bbs[0], probs[0]) if probability >= min_probability]
+        if self.refine and self.min_face_fraction is not None:
+            found = [self.find_around(img, bb, margin=0.25) or bb for bb in found]
+        return [bb for bb in found if min(bb.width(), bb.height()) >= min_size]
+
+    def _find_single(self, img):
+        scale = self._proxy_scale(img.shape)
+        proxy = f.Rearrange("h w c -> 1 h w c")(self._proxy(img, scale))
+        bbs, _ = self.mtcnn.find(proxy)
+        return self._to_original(self._best_face(bbs[0]), scale)
+
+    def _find_in_area(self, img):
+        # the area is already small around the face, refining it again would recurse
+        return self._find_single(img)
+
+    def _proxy_scale(self, shape):
+        if self.min_face_fraction is None:
+            return 1.0
+        return min(1.0, self.proxy_face_size / (self.min_face_fraction * min(shape[:2])))
+
+    @staticmethod
+    def _proxy(img, scale):
+        if scale == 1.0:
+            return img
+        shape = (max(1, round(img.shape[0] * scale)), max(1, round(img.shape[1] * scale)))
+        return operations.resize(img, shape, interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def _to_original(bb, scale):
+        if bb is None or scale == 1.0:
+            return bb
+        return bb.scale(1 / scale, origin=(0, 0))
+
+    @staticmethod
+    def _best_face(bbs):
+        if bbs is None or bbs.size == 0:
             return None
-        best_face_bb = bbs[0][0]
-        return Rect(best_face_bb[1], best_face_bb[3], best_face_bb[0], best_face_bb[2])
+        return MTCNNBoundingBoxFinder._to_rect(bbs[0])
+
+    @staticmethod
+    def _to_rect(bb):
+        return Rect(bb[1], bb[3], bb[0], bb[2])
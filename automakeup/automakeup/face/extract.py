@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 
 import cv2
-import dlib
+import numpy as np
 
+from imagine.io import decoding
 from imagine.shape import operations
 
 
@@ -15,6 +16,15 @@ class FaceExtractor(ABC):
     def extract(self, img, bb):
         return NotImplemented
 
+    def extract_all(self, img, bbs):
+        """
+        Extract many faces from one image
+
+        Returns:
+            numpy array of shape (len(bbs), output_size, output_size, 3) with faces
+        """
+        return np.stack([self.extract(img, bb) for bb in bbs])
+
 
 class SimpleFaceExtractor(FaceExtractor):
     def __init__(self, output_size, bb_scale=2.0, interpolation=cv2.INTER_LINEAR):
@@ -24,6 +34,21 @@ class SimpleFaceExtractor(FaceExtractor):
 
     def extract(self, img, bb):
         bb = bb.scale(self.bb_scale)
+        # image decoded in reduced resolution is decoded again if the face would have to be upscaled
+        img, bb = decoding.enough_resolution(img, bb, self.output_size)
+        return self._crop(img, bb)
+
+    def extract_all(self, img, bbs):
+        """Image decoded in reduced resolution is decoded again at most once, big enough for the smallest face"""
+        bbs = [bb.scale(self.bb_scale) for bb in bbs]
+        smallest = min(bbs, key=lambda bb: max(bb.width(), bb.height()))
+        resolved, _ = decoding.enough_resolution(img, smallest, self.output_size)
+        if resolved is not img:
+            reduction = resolved.reduction if isinstance(resolved, decoding.ReducedImage) else 1
+            bbs = [bb.scale(img.reduction / reduction, origin=(0, 0)) for bb in bbs]
+        return np.stack([self._crop(resolved, bb) for bb in bbs])
+
+    def _crop(self, img, bb):
         square_bb = operations.squarisize(bb)
         safe = operations.safe_rect(square_bb, img.shape, allow_scaling=True)
         cropped = operations.crop(img, safe)
@@ -38,6 +63,7 @@ class AligningDlibFaceExtractor(FaceExtractor):
     def extract(self, img, bb):
         dlib_bb = bb.to_dlib()
         landmarks = self.predictor(img, dlib_bb)
+        import dlib
         return dlib.get_face_chip(img, landmarks, size=self.output_size)
 
 
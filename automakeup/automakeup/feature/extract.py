@@ -2,12 +2,13 @@ from abc import ABC, abstractmethod
 
 import numpy as np
 
-from automakeup.feature.face import ClusteringIrisShapeExtractor
+from automakeup import metrics
+from automakeup.feature.face import BatchClusteringIrisShapeExtractor
 from automakeup.feature.makeup import LipstickColorExtractor, EyeshadowColorExtractor
-from imagine.color.extract import GeometricMedianColorExtractor
+from imagine.color.extract import ColorExtractor, GeometricMedianColorExtractor
 from imagine.functional.functional import ImageOperation, Batchable
 from imagine.shape import operations
-from imagine.shape.segment import ParsingSegmenter
+from imagine.shape.segment import ParsingSegmenter, SegmentationMap
 
 
 class FeatureExtractor(ABC):
@@ -32,7 +33,7 @@ class ColorsFeatureExtractor(Batchable, ImageOperation, FeatureExtractor):
     def __init__(self,
                  parser,
                  color_extractor=GeometricMedianColorExtractor(),
-                 iris_extractor=ClusteringIrisShapeExtractor()):
+                 iris_extractor=BatchClusteringIrisShapeExtractor()):
         super().__init__()
         self.out_codes = {"skin": 1,
                           "hair": 2,
@@ -48,52 +49,56 @@ class ColorsFeatureExtractor(Batchable, ImageOperation, FeatureExtractor):
         self.iris_extractor = iris_extractor
 
     def perform(self, faces, **kwargs):
-        segmented = self.segmenter(faces)
-
-        return self.stack([self._extract_single(f, s) for f, s in zip(faces, segmented)])
-
-    def _extract_single(self, img, segmented):
+        with metrics.timed("parsing"):
+            segmented = self.segmenter(faces)
+        # images are converted to Lab once for all parts
+        labs = [self.extractor.normalize(f) for f in faces]
+        eyes = [self._crop_to_biggest_eye([f, lab], s.mask(self.out_codes["eyes"]))
+                for f, lab, s in zip(faces, labs, segmented)]
+        # irises of all faces are found together
+        with metrics.timed("iris"):
+            iris_masks = self.iris_extractor.extract_batch([img for (img, _), _ in eyes], [mask for _, mask in eyes])
+
+        return self.stack([self._extract_single(lab, s, eye_lab, iris_mask)
+                           for lab, s, ((_, eye_lab), _), iris_mask in zip(labs, segmented, eyes, iris_masks)])
+
+    def _extract_single(self, lab, segmented, eye_lab, iris_mask):
+        with metrics.timed("parts_colors"):
+            colors = self.extractor.extract_parts_normalized(lab, {part: segmented.mask(self.out_codes[part])
+                                                                   for part in ["skin", "hair", "lips"]})
         return np.concatenate([
-            self._skin(img, segmented),
-            self._hair(img, segmented),
-            self._lips(img, segmented),
-            self._eyes(img, segmented)
+            self._first_color(colors["skin"], "skin"),
+            self._first_color(colors["hair"], "hair"),
+            self._first_color(colors["lips"], "lips"),
+            self._eyes(eye_lab, iris_mask)
         ])
 
-    def _simple_extract(self, img, segmented, part):
-        colors = self.extractor.extract(img, segmented == self.out_codes[part])
-        return colors[0] if len(colors) > 0 else np.full((3,), fill_value=self.missing_value())
-
-    def _skin(self, img, segmented):
-        return self._simple_extract(img, segmented, "skin")
-
-    def _hair(self, img, segmented):
-        return self._simple_extract(img, segmented, "hair")
-
-    def _lips(self, img, segmented):
-        return self._simple_extract(img, segmented, "lips")
+    def _first_color(self, colors, part):
+        if len(colors) > 0:
+            return colors[0]
+        metrics.missing(part)
+        return np.full((3,), fill_value=self.missing_value())
 
-    def _eyes(self, img, segmented):
-        eyes_mask = segmented == self.out_codes["eyes"]
-        img_cropped, eye_mask_cropped = self._crop_to_biggest_eye(img, eyes_mask)
-        iris_mask = self.iris_extractor.extract(img_cropped, eye_mask_cropped)
-        colors = self.extractor.extract(img_cropped, iris_mask)
-        return colors[0] if len(colors) > 0 else np.full((3,), fill_value=self.missing_value())
+    def _eyes(self, eye_lab, iris_mask):
+        with metrics.timed("eyes_color"):
+            colors = self.extractor.extract_normalized(eye_lab, iris_mask)
+        return self._first_color(colors, "eyes")
 
     @staticmethod
-    def _crop_to_biggest_eye(img, eyes_mask):
-        # find biggest contour from mask and crop to it
-        biggest_eye_contour = operations.biggest_contour(eyes_mask)
-        eye_rect = operations.bounding_rect(biggest_eye_contour)
+    def _crop_to_biggest_eye(imgs, eyes_mask):
+        """Crops all imgs, which are views of the same face, and eyes_mask to the biggest eye"""
+        eye_rect = SegmentationMap.of(eyes_mask).bounding_rect(1)
         if eye_rect is None:
-            return img, eyes_mask
-        eye_rect_square = operations.safe_rect(operations.squarisize(eye_rect), img.shape, allow_scaling=True)
+            return imgs, eyes_mask
+        eye_rect_square = operations.safe_rect(operations.squarisize(eye_rect), eyes_mask.shape, allow_scaling=True)
         crop = operations.Crop(eye_rect_square)
-        img_cropped = crop(img)
-        eye_mask_cropped = crop(np.array(eyes_mask, dtype=np.uint8))
+        imgs_cropped = [crop(img) for img in imgs]
+        # only the crop is converted and eroded, not the whole mask
+        eye_mask_cropped = np.array(crop(eyes_mask), dtype=np.uint8)
         # add erosion to get rid of uncertain edge
-        eye_mask_cropped = operations.Erode(max(1, round(0.1 * eye_rect.height())))(eye_mask_cropped)
-        return img_cropped, eye_mask_cropped != 0
+        eye_mask_cropped = operations.erode(eye_mask_cropped, max(1, round(0.1 * eye_rect.height())),
+                                            dst=eye_mask_cropped)
+        return imgs_cropped, eye_mask_cropped != 0
 
 
 class FacenetFeatureExtractor(Batchable, ImageOperation, FeatureExtractor):
@@ -134,15 +139,20 @@ class MakeupExtractor(Batchable, ImageOperation, FeatureExtractor):
         self.eyeshadow_extractor = eyeshadow_extractor
 
     def perform(self, faces, **kwargs):
-        segmented = self.segmenter(faces)
+        with metrics.timed("parsing"):
+            segmented = self.segmenter(faces)
 
         return self.stack([self._extract_single(f, s) for f, s in zip(faces, segmented)])
 
     def _extract_single(self, img, segmented):
-        lipstick = self.lipstick_extractor.extract(img, segmented == self.out_codes["lips"]).flatten()
+        # image is converted to Lab once for lipstick and eyeshadow
+        img = ColorExtractor.normalize(img)
+        with metrics.timed("lipstick"):
+            lipstick = self.lipstick_extractor.extract_normalized(img, segmented.mask(self.out_codes["lips"])).flatten()
         lipstick = np.pad(lipstick, (0, 3 - len(lipstick)), constant_values=self.missing_value())
-        eyeshadow = self.eyeshadow_extractor.extract(img,
-                                                     segmented == self.out_codes["skin"],
-                                                     segmented == self.out_codes["eyes"]).flatten()
+        with metrics.timed("eyeshadow"):
+            eyeshadow = self.eyeshadow_extractor.extract_normalized(img,
+                                                                    segmented.mask(self.out_codes["skin"]),
+                                                                    segmented.mask(self.out_codes["eyes"])).flatten()
         eyeshadow = np.pad(eyeshadow, (0, 9 - len(eyeshadow)), constant_values=self.missing_value())
         return np.concatenate([lipstick, eyeshadow])
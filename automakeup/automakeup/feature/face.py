@@ -2,10 +2,11 @@ from abc import ABC, abstractmethod
 
 import cv2
 import numpy as np
-from sklearn.cluster import KMeans
 
 from automakeup.feature.utils import first_channel_ordering
 from imagine.color import conversion
+from imagine.color.clustering import UniqueColorsClustering, WeightedKMeans
+from imagine.color.utils import unique_colors
 from imagine.shape import operations
 from imagine.shape.segment import ClusteringSegmenter
 
@@ -15,6 +16,19 @@ class IrisShapeExtractor(ABC):
     def extract(self, img, eye_mask):
         return NotImplemented
 
+    def extract_batch(self, imgs, eye_masks):
+        """
+        Extract irises of many eyes, override to process them together
+
+        Args:
+            imgs: sequence of numpy arrays of shape (height, width, 3) in RGB, sizes can differ
+            eye_masks: sequence of numpy arrays of shape (height, width) with True in eye pixels
+
+        Returns:
+            list of numpy arrays of shape (height, width) with True in iris pixels
+        """
+        return [self.extract(img, eye_mask) for img, eye_mask in zip(imgs, eye_masks)]
+
 
 class ThresholdingIrisShapeExtractor(IrisShapeExtractor):
     def __init__(self,
@@ -36,7 +50,7 @@ class ClusteringIrisShapeExtractor(IrisShapeExtractor):
     def __init__(self,
                  lower_cluster_cut=0.1,
                  upper_cluster_cut=0.6,
-                 eye_clustering=KMeans(n_clusters=11),
+                 eye_clustering=UniqueColorsClustering(WeightedKMeans(n_clusters=11)),
                  cluster_ordering=first_channel_ordering):
         super().__init__()
         self.segmenter = ClusteringSegmenter(eye_clustering, ordering=cluster_ordering, bg_code=-1)
@@ -57,6 +71,117 @@ class ClusteringIrisShapeExtractor(IrisShapeExtractor):
         return (clustered >= lower_cluster_threshold) & (clustered <= upper_cluster_threshold) & (clustered != -1)
 
 
+class BatchClusteringIrisShapeExtractor(IrisShapeExtractor):
+    """
+    Iris shape extractor choosing the same range of clusters ordered by lightness as ClusteringIrisShapeExtractor,
+    but clustering unique colors of all eyes in a batch together with vectorized k-means
+
+    Colors of eyes are padded to the same number and k-means runs on all of them at once,
+    each eye stops updating its centers when they converge. Initialization is seeded k-means++ with the same draws
+    for every eye, so iris of an eye doesn't depend on other eyes in the batch.
+    """
+
+    def __init__(self,
+                 lower_cluster_cut=0.1,
+                 upper_cluster_cut=0.6,
+                 n_clusters=11,
+                 max_iter=30,
+                 tol=1e-4,
+                 random_state=0):
+        """
+        Args:
+            n_clusters: number of clusters of each eye
+            max_iter: maximum number of k-means iterations
+            tol: relative tolerance of centers movement to declare convergence
+            random_state: seed of k-means++ initialization
+        """
+        super().__init__()
+        self.lower_cluster_cut = lower_cluster_cut
+        self.upper_cluster_cut = upper_cluster_cut
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+
+    def extract(self, img, eye_mask):
+        return self.extract_batch([img], [eye_mask])[0]
+
+    def extract_batch(self, imgs, eye_masks):
+        iris_masks = [np.zeros(eye_mask.shape[:2], dtype=bool) for eye_mask in eye_masks]
+        # eyes with less pixels than clusters can't be clustered, like in ClusteringSegmenter
+        indices = [i for i, eye_mask in enumerate(eye_masks) if np.count_nonzero(eye_mask) >= self.n_clusters]
+        if not indices:
+            return iris_masks
+        uniques = [unique_colors(conversion.RgbToLab(imgs[i])[eye_masks[i]]) for i in indices]
+        colors, weights = self._pad([c for c, _, _ in uniques], [n for _, n, _ in uniques])
+        labels, iris_clusters = self._iris_clusters(colors, weights)
+        for i, (_, _, inverse), image_labels, image_iris_clusters in zip(indices, uniques, labels, iris_clusters):
+            iris_masks[i][eye_masks[i]] = image_iris_clusters[image_labels[inverse]]
+        return iris_masks
+
+    @staticmethod
+    def _pad(colors, counts):
+        size = max(len(c) for c in colors)
+        padded_colors = np.zeros((len(colors), size, colors[0].shape[1]))
+        weights = np.zeros((len(colors), size))
+        for i, (c, n) in enumerate(zip(colors, counts)):
+            padded_colors[i, :len(c)] = c
+            weights[i, :len(n)] = n
+        return padded_colors, weights
+
+    def _iris_clusters(self, X, weights):
+        centers = self._init_centers(X, weights)
+        means = (weights[..., None] * X).sum(axis=1, keepdims=True) / weights.sum(axis=1)[:, None, None]
+        tol = self.tol * (weights * ((X - means) ** 2).sum(axis=2)).sum(axis=1) / weights.sum(axis=1)
+        active = np.ones(len(X), dtype=bool)
+        for _ in range(self.max_iter):
+            totals, sums = self._cluster_sums(X, weights, self._distances(X, centers).argmin(axis=2))
+            new_centers = np.divide(sums, totals[..., None], out=centers.copy(), where=totals[..., None] > 0)
+            shift = ((new_centers - centers) ** 2).sum(axis=(1, 2))
+            centers[active] = new_centers[active]
+            active &= shift > tol
+            if not active.any():
+                break
+        labels = self._distances(X, centers).argmin(axis=2)
+        totals, sums = self._cluster_sums(X, weights, labels)
+        # clusters ordered by mean lightness like with first_channel_ordering, empty clusters don't count
+        lightness = np.divide(sums[..., 0], totals, out=np.full(totals.shape, np.inf), where=totals > 0)
+        ranks = np.argsort(np.argsort(lightness, axis=1, kind="stable"), axis=1)
+        k = (totals > 0).sum(axis=1, keepdims=True)
+        lower, upper = self.lower_cluster_cut * (k - 1), self.upper_cluster_cut * (k - 1)
+        return labels, (ranks >= lower) & (ranks <= upper) & (totals > 0) & (k > 1)
+
+    def _init_centers(self, X, weights):
+        draws = np.random.default_rng(self.random_state).random(self.n_clusters)
+        batch = np.arange(len(X))
+        centers = np.empty((len(X), self.n_clusters, X.shape[2]))
+        closest = None
+        for i, draw in enumerate(draws):
+            p = weights if closest is None else weights * closest
+            # when all colors are already centers any of them is taken
+            p = np.where(p.sum(axis=1, keepdims=True) > 0, p, weights)
+            cdf = p.cumsum(axis=1)
+            chosen = np.minimum((cdf < draw * cdf[:, -1:]).sum(axis=1), (weights > 0).sum(axis=1) - 1)
+            centers[:, i] = X[batch, chosen]
+            distances = ((X - centers[:, i, None]) ** 2).sum(axis=2)
+            closest = distances if closest is None else np.minimum(closest, distances)
+        return centers
+
+    def _cluster_sums(self, X, weights, labels):
+        # clusters of all eyes are counted together with clusters of each eye numbered after previous ones
+        flat = (labels + self.n_clusters * np.arange(len(X))[:, None]).ravel()
+        size = len(X) * self.n_clusters
+        totals = np.bincount(flat, weights=weights.ravel(), minlength=size)
+        sums = [np.bincount(flat, weights=(weights * channel).ravel(), minlength=size)
+                for channel in X.transpose(2, 0, 1)]
+        return totals.reshape(len(X), -1), np.stack(sums, axis=1).reshape(len(X), self.n_clusters, -1)
+
+    @staticmethod
+    def _distances(X, centers):
+        return ((X ** 2).sum(axis=2)[..., None] - 2 * X @ centers.transpose(0, 2, 1)
+                + (centers ** 2).sum(axis=2)[:, None])
+
+
 class HoughCircleIrisShapeExtractor(IrisShapeExtractor):
     def __init__(self, method=cv2.HOUGH_GRADIENT_ALT, dp=1.25, min_dist=100, param1=1, param2=0.0, pupil_ratio=0.2):
         super().__init__()
@@ -3,12 +3,14 @@ from math import sqrt
 import cv2
 import numpy as np
 from sklearn import clone
-from sklearn.cluster import KMeans, AgglomerativeClustering
+from sklearn.cluster import AgglomerativeClustering
 from sklearn.neighbors import KNeighborsClassifier
 
 from automakeup.feature.utils import first_channel_ordering
 from imagine.color import conversion
-from imagine.color.extract import ClusteringColorExtractor, GeometricMedianColorExtractor
+from imagine.color.clustering import UniqueColorsClustering, WeightedKMeans
+from imagine.color.extract import ClusteringColorExtractor, ColorExtractor, GeometricMedianColorExtractor
+from imagine.color.utils import unique_colors
 from imagine.shape import operations
 from imagine.shape.segment import ClusteringSegmenter
 
@@ -16,45 +18,68 @@ from imagine.shape.segment import ClusteringSegmenter
 class EyeshadowShapeExtractor:
     def __init__(self,
                  skin_color_extractor=GeometricMedianColorExtractor(),
-                 eyeshadow_clustering=AgglomerativeClustering(6, linkage='average'),
+                 eyeshadow_clustering=UniqueColorsClustering(AgglomerativeClustering(6, linkage='average'),
+                                                             max_colors=2000),
                  cluster_classifier=KNeighborsClassifier(n_neighbors=3),
                  outer_eye_factor=2.25,
-                 inner_eye_factor=0.25):
+                 inner_eye_factor=0.25,
+                 classifier_max_colors=2000):
+        """
+        Args:
+            eyeshadow_clustering: clustering of colors around the eye. Wrap it in UniqueColorsClustering with
+                                  max_colors to bound its memory on big faces.
+            classifier_max_colors: maximum number of unique colors with their cluster the cluster classifier is fitted
+                                   to, colors are grouped on coarser grid when there are more. if None it's fitted
+                                   to all pixels.
+        """
         super().__init__()
         self.skin_color_extractor = skin_color_extractor
         self.eyeshadow_segmenter = ClusteringSegmenter(eyeshadow_clustering, bg_code=-1)
         self.cluster_classifier = cluster_classifier
+        self.classifier_max_colors = classifier_max_colors
         self.outer_eye_factor = outer_eye_factor
         self.inner_eye_factor = inner_eye_factor
 
     def extract(self, img, skin_mask, eyes_mask):
+        return self.extract_normalized(ColorExtractor.normalize(img), skin_mask, eyes_mask)
+
+    def extract_normalized(self, img, skin_mask, eyes_mask):
+        """Same as extract(), but works on image already converted with ColorExtractor.normalize()"""
         if skin_mask.max() == 0 or eyes_mask.max() == 0:
             return np.zeros(skin_mask.shape, dtype=np.bool)
         around_eye_mask = self._area_around_eye(eyes_mask, skin_mask)
         skin_color = self._get_skin_color(img, skin_mask)
-        clustered = self.eyeshadow_segmenter(conversion.RgbToLab(img), masks=around_eye_mask)
+        clustered = self.eyeshadow_segmenter(img, masks=around_eye_mask)
         return self._remove_bad_areas(img, clustered, skin_color)
 
     def _area_around_eye(self, eyes_mask, skin_mask):
-        eye_contour, eye_mask = self._get_bigger_eye(eyes_mask)
-        if eye_contour is None or eye_contour.size == 0:
-            return np.zeros(eyes_mask.shape[:2], dtype=np.bool)
-        eye_area = cv2.contourArea(eye_contour)
-        eye = np.array(eye_mask, dtype=np.uint8)
+        eye_area, eye_rect, eye_mask = self._get_bigger_eye(eyes_mask)
+        around_eye = np.zeros(eyes_mask.shape[:2], dtype=np.bool)
+        if eye_rect is None:
+            return around_eye
+        # ring between distances reached by dilations with elliptical kernels of these sizes
         outer_kernel_size = max(int(sqrt(eye_area) * self.outer_eye_factor), 2)
         inner_kernel_size = max(int(sqrt(eye_area) * self.inner_eye_factor), 1)
-        outer_dilated_eye = operations.Dilate((outer_kernel_size, outer_kernel_size))(eye)
-        inner_dilated_eye = operations.Dilate((inner_kernel_size, inner_kernel_size))(eye)
-        return (outer_dilated_eye > 0) & ~(inner_dilated_eye > 0) & skin_mask
+        outer = operations.dilation_radius(outer_kernel_size)
+        inner = operations.dilation_radius(inner_kernel_size)
+        # all work is done only around the eye, not in the whole face
+        area = operations.pad_rect(eye_rect, int(np.ceil(outer)) + 1, eye_mask.shape)
+        operations.crop(around_eye, area)[...] = (operations.ring(operations.crop(eye_mask, area), outer, inner)
+                                                  & operations.crop(skin_mask, area))
+        return around_eye
 
     @staticmethod
     def _get_bigger_eye(eyes_mask):
+        # eye is chosen and measured by area of its outer contour and its holes are filled,
+        # because features of the data the models were trained on were extracted this way
         eye_contour = operations.biggest_contour(eyes_mask)
-        eye_mask = operations.fill_contour(eye_contour, eyes_mask.shape[:2])
-        return eye_contour, eye_mask
+        eye_rect = operations.bounding_rect(eye_contour)
+        if eye_rect is None:
+            return 0, None, None
+        return cv2.contourArea(eye_contour), eye_rect, operations.fill_contour(eye_contour, eyes_mask.shape[:2])
 
     def _get_skin_color(self, img, skin_mask):
-        return self.skin_color_extractor.extract(img, skin_mask)[0]
+        return self.skin_color_extractor.extract_normalized(img, skin_mask)[0]
 
     def _remove_bad_areas(self, img, clustered, skin_color):
         skin_color_lab = conversion.RgbToLab(np.array([[skin_color]])).reshape(1, 3)
@@ -64,26 +89,40 @@ class EyeshadowShapeExtractor:
         if not non_background.any():
             return non_background
 
-        pixels = conversion.RgbToLab(img)[non_background]
-        labels = clustered[non_background]
-
+        pixels, labels = self._classifier_samples(img[non_background], clustered[non_background])
         neigh = clone(self.cluster_classifier).fit(pixels, labels)
         skin_cluster, eyelashes_cluster = neigh.predict(np.concatenate([skin_color_lab, black_color_lab]))
         return (clustered != skin_cluster) & (clustered != eyelashes_cluster) & (clustered != -1)
 
+    def _classifier_samples(self, pixels, labels):
+        if self.classifier_max_colors is None:
+            return pixels, labels
+        colors, _, inverse = unique_colors(pixels, max_colors=self.classifier_max_colors)
+        if len(colors) < getattr(self.cluster_classifier, "n_neighbors", 1):
+            # too few colors to ask for that many neighbours, but pixels repeat them enough
+            return pixels, labels
+        # each color takes the most common cluster of its pixels
+        n_labels = labels.max() + 1
+        votes = np.bincount(inverse * n_labels + labels, minlength=len(colors) * n_labels)
+        return colors, votes.reshape(len(colors), n_labels).argmax(axis=1)
+
 
 class EyeshadowColorExtractor:
     def __init__(self,
                  shape_extractor=EyeshadowShapeExtractor(),
-                 color_extractor=ClusteringColorExtractor(KMeans(3),
+                 color_extractor=ClusteringColorExtractor(UniqueColorsClustering(WeightedKMeans(3)),
                                                           ordering=first_channel_ordering)):
         super().__init__()
         self.shape_extractor = shape_extractor
         self.color_extractor = color_extractor
 
     def extract(self, img, skin_mask, eyes_mask):
-        eyeshadow_area = self.shape_extractor.extract(img, skin_mask, eyes_mask)
-        return self.color_extractor.extract(img, eyeshadow_area)
+        return self.extract_normalized(ColorExtractor.normalize(img), skin_mask, eyes_mask)
+
+    def extract_normalized(self, img, skin_mask, eyes_mask):
+        """Same as extract(), but works on image already converted with ColorExtractor.normalize()"""
+        eyeshadow_area = self.shape_extractor.extract_normalized(img, skin_mask, eyes_mask)
+        return self.color_extractor.extract_normalized(img, eyeshadow_area)
 
 
 class LipstickColorExtractor:
@@ -93,3 +132,7 @@ class LipstickColorExtractor:
 
     def extract(self, img, lips_mask):
         return self.color_extractor.extract(img, lips_mask)
+
+    def extract_normalized(self, img, lips_mask):
+        """Same as extract(), but works on image already converted with ColorExtractor.normalize()"""
+        return self.color_extractor.extract_normalized(img, lips_mask)
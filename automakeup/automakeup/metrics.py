@@ -0,0 +1,157 @@
+import bisect
+import contextlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(ABC):
+    """Base for metrics with optional single label"""
+
+    type = None
+
+    def __init__(self, name, description, label=None):
+        """
+        Args:
+            name: metric name
+            description: help text
+            label: name of the label distinguishing series of this metric. if None metric has single series.
+        """
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.label = label
+        self.series = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _labels(self, label_value, extra=None):
+        labels = []
+        if self.label is not None:
+            labels.append('{}="{}"'.format(self.label, label_value))
+        if extra is not None:
+            labels.append(extra)
+        return "{{{}}}".format(",".join(labels)) if labels else ""
+
+    def expose(self):
+        """Returns list of lines in Prometheus text format"""
+        lines = ["# HELP {} {}".format(self.name, self.description), "# TYPE {} {}".format(self.name, self.type)]
+        with self.lock:
+            for label_value, value in self.series.items():
+                lines.extend(self._expose_series(label_value, value))
+        return lines
+
+    @abstractmethod
+    def _expose_series(self, label_value, value):
+        return NotImplemented
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, label_value=None, amount=1):
+        with self.lock:
+            self.series[label_value] = self.series.get(label_value, 0) + amount
+
+    def _expose_series(self, label_value, value):
+        return ["{}{} {}".format(self.name, self._labels(label_value), value)]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, description, label=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, label)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, label_value=None):
+        with self.lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+
+    def _expose_series(self, label_value, value):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), value["counts"]):
+            cumulative += count
+            le = 'le="{}"'.format("+Inf" if bound == float("inf") else bound)
+            lines.append("{}_bucket{} {}".format(self.name, self._labels(label_value, le), cumulative))
+        lines.append("{}_sum{} {}".format(self.name, self._labels(label_value), value["sum"]))
+        lines.append("{}_count{} {}".format(self.name, self._labels(label_value), cumulative))
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics used by the pipeline
+
+    Registry is disabled by default and then recording costs a single attribute check.
+    Metrics are kept in memory of the current process.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False
+        self.stages = Histogram("makeup_stage_duration_seconds", "Time spent in pipeline stages", label="stage")
+        self.events = Counter("makeup_events_total", "Number of notable events during processing", label="event")
+        self.missing = Counter("makeup_missing_features_total", "Number of features that couldn't be extracted",
+                               label="feature")
+
+    def all(self):
+        return [self.stages, self.events, self.missing]
+
+    def expose(self):
+        """Returns all metrics in Prometheus text format"""
+        return "\n".join(line for metric in self.all() for line in metric.expose()) + "\n"
+
+
+REGISTRY = Registry()
+
+_disabled = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.stages.observe(time.perf_counter() - start, stage)
+
+
+def enable(enabled=True):
+    REGISTRY.enabled = enabled
+
+
+def timed(stage):
+    """
+    Measure time of code block
+
+    Examples:
+        with metrics.timed("detection"):
+            bb = finder.find(img)
+
+    Args:
+        stage: name of the measured stage
+    """
+    return _timer(stage) if REGISTRY.enabled else _disabled
+
+
+def event(name, amount=1):
+    """Count occurrence of an event, e.g. no face found"""
+    if REGISTRY.enabled:
+        REGISTRY.events.inc(name, amount)
+
+
+def missing(feature, amount=1):
+    """Count feature that couldn't be extracted"""
+    if REGISTRY.enabled:
+        REGISTRY.missing.inc(feature, amount)
+
+
+def expose():
+    return REGISTRY.expose()
@@ -1,5 +1,6 @@
 import pickle
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 
@@ -19,21 +20,85 @@ class Pipeline(ABC):
     def run(self, *args):
         return NotImplemented
 
+    def params(self):
+        """Returns dictionary with parameters that affect the results"""
+        return {}
+
+    def warmup(self, imgs):
+        """Run images through all stages, so that the first real runs aren't slowed down by lazy initialization"""
+        pass
+
+
+class WrappingPipeline(Pipeline):
+    """
+    Pipeline that passes all calls to the wrapped pipeline
+
+    Subclasses override only the methods they change.
+    """
+
+    def __init__(self, pipeline):
+        """
+        Args:
+            pipeline: wrapped pipeline
+        """
+        super().__init__()
+        self.pipeline = pipeline
+
+    def params(self):
+        return self.pipeline.params()
+
+    def warmup(self, imgs):
+        self.pipeline.warmup(imgs)
+
+    def run(self, img, seed=None, bb=None):
+        return self.pipeline.run(img, seed, bb)
+
+    def run_batch(self, imgs, seeds=None, bbs=None):
+        return self.pipeline.run_batch(imgs, seeds, bbs)
+
+    def run_features(self, features, seed=None):
+        return self.pipeline.run_features(features, seed)
+
+    def run_many(self, img, k, seed=None, bb=None):
+        return self.pipeline.run_many(img, k, seed, bb)
+
+    def run_all(self, img, seed=None, min_size=0, max_faces=None):
+        return self.pipeline.run_all(img, seed, min_size, max_faces)
+
 
 class GanettePipeline(Pipeline):
     def __init__(self,
                  device=torch.device('cpu'),
                  face_size=512,
-                 bb_scale=1.5):
+                 bb_scale=1.5,
+                 verify_bb=False,
+                 min_face_fraction=None,
+                 refine_bb=False):
+        """
+        Args:
+            verify_bb: if True, given face bounding boxes are refined by searching for the face around them
+            min_face_fraction: if given, faces are searched for in downscaled images, in which faces spanning
+                               less than this fraction of the shorter image side may be missed
+            refine_bb: if True, faces found in downscaled images are searched for again around the found boxes
+        """
         super().__init__()
-        bb_finder = self._get_bb_finder(device)
+        self.face_size = face_size
+        self.bb_scale = bb_scale
+        self.verify_bb = verify_bb
+        self.min_face_fraction = min_face_fraction
+        self.refine_bb = refine_bb
+        # models are independent, so they are loaded concurrently. torch releases the GIL while reading weights
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            bb_finder = executor.submit(self._get_bb_finder, device, min_face_fraction, refine_bb)
+            feature_extractor = executor.submit(self._get_feature_extractor, device)
+            encoded_recommender = executor.submit(self._get_encoded_recommender, device)
         face_extractor = self._get_face_extractor(face_size, bb_scale)
-        feature_extractor = self._get_feature_extractor(device)
-        self.recommender = self._get_recommender(bb_finder, face_extractor, feature_extractor, device)
+        self.recommender = EncodingRecommender(bb_finder.result(), face_extractor, feature_extractor.result(),
+                                               encoded_recommender.result(), verify_bb)
 
     @staticmethod
-    def _get_bb_finder(device):
-        return MTCNNBoundingBoxFinder(MTCNN(device=device))
+    def _get_bb_finder(device, min_face_fraction=None, refine_bb=False):
+        return MTCNNBoundingBoxFinder(MTCNN(device=device), min_face_fraction=min_face_fraction, refine=refine_bb)
 
     @staticmethod
     def _get_face_extractor(face_size, bb_scale=1.5):
@@ -45,7 +110,7 @@ class GanettePipeline(Pipeline):
         return ColorsFeatureExtractor(parser)
 
     @staticmethod
-    def _get_recommender(bb_finder, face_extractor, feature_extractor, device):
+    def _get_encoded_recommender(device):
         with automakeup.ganette_model_path() as p:
             with open(p, "rb") as f:
                 model = Ganette.unpickle(f).to(device)
@@ -55,8 +120,26 @@ class GanettePipeline(Pipeline):
         with automakeup.ganette_y_scaler_path() as p:
             with open(p, "rb") as f:
                 y_scaler = pickle.load(f)
-        encoded_recommender = GanetteRecommender(model, x_scaler, y_scaler)
-        return EncodingRecommender(bb_finder, face_extractor, feature_extractor, encoded_recommender)
+        return GanetteRecommender(model, x_scaler, y_scaler)
+
+    def params(self):
+        return {"face_size": self.face_size, "bb_scale": self.bb_scale, "verify_bb": self.verify_bb,
+                "min_face_fraction": self.min_face_fraction, "refine_bb": self.refine_bb}
+
+    def run(self, img, seed=None, bb=None):
+        return self.recommender.recommend(img, seed, bb)
+
+    def run_batch(self, imgs, seeds=None, bbs=None):
+        return self.recommender.recommend_batch(imgs, seeds, bbs)
+
+    def run_features(self, features, seed=None):
+        return self.recommender.recommend_features(features, seed)
+
+    def run_many(self, img, k, seed=None, bb=None):
+        return self.recommender.recommend_many(img, k, seed, bb)
+
+    def run_all(self, img, seed=None, min_size=0, max_faces=None):
+        return self.recommender.recommend_all(img, seed, min_size, max_faces)
 
-    def run(self, img):
-        return self.recommender.recommend(img)
+    def warmup(self, imgs):
+        self.recommender.warmup(imgs)
@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 
 import numpy as np
 
+from automakeup import deadlines, metrics
+from imagine.shape.figures import Rect
+
 
 class Results:
     def __init__(self, **kwargs):
@@ -9,6 +12,11 @@ class Results:
         self.__dict__.update(kwargs)
 
 
+class FaceNotFoundError(ValueError):
+    def __init__(self):
+        super().__init__("No face found in image")
+
+
 class Recommender(ABC):
     @abstractmethod
     def recommend(self, *args):
@@ -25,6 +33,10 @@ class MakeupRecommender(Recommender, ABC):
                              eyeshadow_middle_color=eyeshadow_middle_color,
                              eyeshadow_inner_color=eyeshadow_inner_color)
 
+        def features(self):
+            """Returns face features the recommendation was made for, which can be passed to recommend_features()"""
+            return np.concatenate([self.skin_color, self.hair_color, self.lips_color, self.eyes_color])
+
 
 class DummyRecommender(MakeupRecommender):
     def recommend(self):
@@ -32,16 +44,210 @@ class DummyRecommender(MakeupRecommender):
 
 
 class EncodingRecommender(MakeupRecommender):
-    def __init__(self, bb_finder, face_extractor, feature_extractor, encoded_recommender):
+    def __init__(self, bb_finder, face_extractor, feature_extractor, encoded_recommender, verify_bb=False):
+        """
+        Args:
+            verify_bb: if True, given face bounding boxes are refined by searching for the face only around them.
+                       If the face is not found there, the whole image is searched.
+        """
         self.bb_finder = bb_finder
         self.face_extractor = face_extractor
         self.feature_extractor = feature_extractor
         self.encoded_recommender = encoded_recommender
+        self.verify_bb = verify_bb
+
+    def recommend(self, image, seed=None, bb=None):
+        """
+        Recommend makeup for face in image
+
+        Args:
+            image: numpy array of shape (height, width, 3) in RGB
+            seed: random seed to get reproducible recommendations
+            bb: Rect with face bounding box, e.g. found earlier by the client. if None face is searched for.
+
+        Returns:
+            MakeupResults
+
+        Raises:
+            DeadlineExceededError: if the deadline set with deadlines.until() passes between stages
+        """
+        deadlines.check()
+        with metrics.timed("detection"):
+            bb = self._find_face(image, bb)
+        deadlines.check()
+        face = self._extract_face(image, bb)
+        with metrics.timed("features"):
+            features = self.feature_extractor(face)
+        deadlines.check()
+        with metrics.timed("sampling"):
+            y = self.encoded_recommender.recommend(features, seed)
+        return self._to_results(features, y)
+
+    def recommend_many(self, image, k, seed=None, bb=None):
+        """
+        Recommend k diverse makeups for face in image
+
+        Args:
+            image: numpy array of shape (height, width, 3) in RGB
+            k: number of recommendations
+            seed: random seed to get reproducible recommendations
+            bb: Rect with face bounding box. if None face is searched for.
+
+        Returns:
+            list of k MakeupResults, the most typical recommendation first
+        """
+        deadlines.check()
+        with metrics.timed("detection"):
+            bb = self._find_face(image, bb)
+        deadlines.check()
+        face = self._extract_face(image, bb)
+        with metrics.timed("features"):
+            features = self.feature_extractor(face)
+        deadlines.check()
+        with metrics.timed("sampling"):
+            ys = self.encoded_recommender.recommend_many(features, k, seed)
+        return [self._to_results(features, y) for y in ys]
+
+    def recommend_batch(self, images, seeds=None, bbs=None):
+        """
+        Recommend makeup for many images at once
+
+        Faces in images of the same size are searched for together,
+        then all found faces go through feature extraction and recommendation as one batch.
+
+        Args:
+            images: sequence of numpy arrays of shape (height, width, 3) in RGB, sizes can differ
+            seeds: sequence with random seed (or None) for each image. Results are the same as from recommend()
+                   with the same seed.
+            bbs: sequence with face bounding box (or None) for each image
+
+        Returns:
+            list with MakeupResults or exception raised while processing for each image
+        """
+        results = [None] * len(images)
+        faces, indices = [], []
+        deadlines.check()
+        with metrics.timed("detection"):
+            bbs = self._find_faces(images, bbs)
+        deadlines.check()
+        for i, (image, bb) in enumerate(zip(images, bbs)):
+            try:
+                faces.append(self._extract_face(image, bb))
+                indices.append(i)
+            except Exception as e:
+                results[i] = e
+        if faces:
+            with metrics.timed("features"):
+                features = self.feature_extractor(np.stack(faces))
+            deadlines.check()
+            batch_seeds = None if seeds is None else [seeds[i] for i in indices]
+            with metrics.timed("sampling"):
+                ys = self.encoded_recommender.recommend(features, batch_seeds)
+            for i, f, y in zip(indices, features, ys):
+                results[i] = self._to_results(f, y)
+        return results
+
+    def recommend_all(self, image, seed=None, min_size=0, max_faces=None):
+        """
+        Recommend makeup for every face in image
+
+        All faces are cropped, go through feature extraction and recommendation as one batch.
+
+        Args:
+            image: numpy array of shape (height, width, 3) in RGB
+            seed: random seed to get reproducible recommendations
+            min_size: faces with shorter side of bounding box smaller than this size in pixels are skipped
+            max_faces: maximum number of faces, the most certain ones are kept. if None all faces are used.
+
+        Returns:
+            list of tuples (Rect, MakeupResults), one for each face, the most certain face first
+        """
+        deadlines.check()
+        with metrics.timed("detection"):
+            bbs = self.bb_finder.find_all(image, min_size=min_size)[:max_faces]
+        deadlines.check()
+        if not bbs:
+            metrics.event("face_not_found")
+            raise FaceNotFoundError()
+        with metrics.timed("cropping"):
+            faces = self.face_extractor.extract_all(image, bbs)
+        with metrics.timed("features"):
+            features = self.feature_extractor(faces)
+        deadlines.check()
+        with metrics.timed("sampling"):
+            ys = self.encoded_recommender.recommend(features, self._face_seeds(seed, len(bbs)))
+        return [(bb, self._to_results(f, y)) for bb, f, y in zip(bbs, features, ys)]
+
+    def recommend_features(self, features, seed=None):
+        """
+        Recommend makeup for face features extracted earlier, e.g. to get another recommendation for the same face
+
+        Args:
+            features: sequence with features, e.g. from MakeupResults.features()
+            seed: random seed to get reproducible recommendations
+
+        Returns:
+            MakeupResults
+        """
+        features = np.asarray(features, dtype=np.float64)
+        expected = len(self.feature_extractor.labels())
+        if features.shape != (expected,):
+            raise ValueError("Expected {} features, got {}".format(expected, features.size))
+        if not np.isfinite(features).all():
+            raise ValueError("Features should be finite numbers")
+        with metrics.timed("sampling"):
+            y = self.encoded_recommender.recommend(features, seed)
+        return self._to_results(features, y)
+
+    def warmup(self, images):
+        """
+        Run all stages on given images, e.g. synthetic ones, whether faces are found in them or not
+
+        Both single image and batch paths are used, so later calls aren't slowed down by lazy initialization.
+
+        Args:
+            images: non-empty sequence of numpy arrays of shape (height, width, 3) in RGB
+        """
+        self.bb_finder.find(images[0])
+        self.bb_finder.find_batch(images)
+        faces = [self.face_extractor.extract(image, self._central_box(image)) for image in images]
+        self.encoded_recommender.recommend(self.feature_extractor(faces[0]))
+        self.encoded_recommender.recommend(self.feature_extractor(np.stack(faces)))
+
+    @staticmethod
+    def _face_seeds(seed, n):
+        if seed is None:
+            return None
+        return np.random.default_rng(seed).integers(0, 2 ** 63 - 1, n).tolist()
+
+    @staticmethod
+    def _central_box(image):
+        height, width = image.shape[:2]
+        return Rect(height // 4, height - height // 4, width // 4, width - width // 4)
+
+    def _find_face(self, image, bb=None):
+        if bb is not None and self.verify_bb:
+            bb = self.bb_finder.find_around(image, bb)
+        return bb if bb is not None else self.bb_finder.find(image)
+
+    def _find_faces(self, images, bbs=None):
+        if bbs is None:
+            bbs = [None] * len(images)
+        if self.verify_bb:
+            bbs = [self.bb_finder.find_around(image, bb) if bb is not None else None for image, bb in zip(images, bbs)]
+        bbs = list(bbs)
+        missing = [i for i, bb in enumerate(bbs) if bb is None]
+        for i, bb in zip(missing, self.bb_finder.find_batch([images[i] for i in missing])):
+            bbs[i] = bb
+        return bbs
+
+    def _extract_face(self, image, bb):
+        if bb is None:
+            metrics.event("face_not_found")
+            raise FaceNotFoundError()
+        with metrics.timed("cropping"):
+            return self.face_extractor.extract(image, bb)
 
-    def recommend(self, image):
-        bb = self.bb_finder.find(image)
-        face = self.face_extractor.extract(image, bb)
-        features = self.feature_extractor(face)
-        y = self.encoded_recommender.recommend(features)
+    def _to_results(self, features, y):
         out = np.append(features, y)
         return self.MakeupResults(*[out[i:i + 3].tolist() for i in range(0, len(out), 3)])
@@ -60,6 +60,59 @@ class MTCNNBoundingBoxFinderTestCase(unittest.TestCase):
         bb = self.finder.find(img)
         self.assertTrue(bb is None)
 
+    def test_mtcnn_finder_finds_faces_in_batch_of_images_with_different_sizes(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        small = cv2.resize(img, (img.shape[1] // 2, img.shape[0] // 2))
+        bbs = self.finder.find_batch([img, small, img])
+        self.assertEqual(len(bbs), 3)
+        self.assertTrue(all(isinstance(bb, Rect) for bb in bbs))
+        self.assertEqual(bbs[0], self.finder.find(img))
+        self.assertEqual(bbs[1], self.finder.find(small))
+
+    def test_mtcnn_finder_finds_face_around_given_bounding_box(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        bb = self.finder.find(img)
+        around = self.finder.find_around(img, bb.scale(0.8))
+        self.assertIsInstance(around, Rect)
+        self.assertTrue(abs(around.left - bb.left) <= 0.1 * bb.width())
+        self.assertTrue(abs(around.top - bb.top) <= 0.1 * bb.height())
+
+    def test_mtcnn_finder_finds_face_close_to_full_resolution_one_in_downscaled_image(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        img = cv2.resize(img, (img.shape[1] * 4, img.shape[0] * 4))
+        bb = self.finder.find(img)
+        proxy_bb = MTCNNBoundingBoxFinder(self.mtcnn, min_face_fraction=0.2, refine=True).find(img)
+        self.assertIsInstance(proxy_bb, Rect)
+        self.assertTrue(abs(proxy_bb.left - bb.left) <= 0.1 * bb.width())
+        self.assertTrue(abs(proxy_bb.top - bb.top) <= 0.1 * bb.height())
+        self.assertTrue(abs(proxy_bb.width() - bb.width()) <= 0.1 * bb.width())
+
+    def test_mtcnn_finder_finds_the_same_face_in_downscaled_image_alone_and_in_batch(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        finder = MTCNNBoundingBoxFinder(self.mtcnn, min_face_fraction=0.2)
+        self.assertEqual(finder.find_batch([img, img]), [finder.find(img)] * 2)
+
+    def test_mtcnn_finder_returns_none_around_bounding_box_without_face(self):
+        img = np.random.randint(0, 256, size=(128, 128, 3), dtype=np.uint8)
+        bb = self.finder.find_around(img, Rect(32, 96, 32, 96))
+        self.assertTrue(bb is None)
+
+    def test_mtcnn_finder_finds_all_faces_with_most_certain_first(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        bbs = self.finder.find_all(img)
+        self.assertTrue(len(bbs) >= 1)
+        self.assertEqual(bbs[0], self.finder.find(img))
+        self.assertEqual(self.finder.find_all(img, min_size=img.shape[0] + 1), [])
+
+    def test_mtcnn_finder_finds_no_faces_in_random_image(self):
+        img = np.random.randint(0, 256, size=(128, 128, 3), dtype=np.uint8)
+        self.assertEqual(self.finder.find_all(img), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -34,6 +34,15 @@ class SimpleFaceExtractorTestCase(unittest.TestCase):
         face = extractor.extract(img, Rect(10, 90, 10, 90))
         self.assertTrue(np.issubdtype(face.dtype, np.uint8))
 
+    def test_simple_face_extractor_extracts_all_faces_like_one_by_one(self):
+        img = np.random.randint(0, 256, size=(100, 100, 3), dtype=np.uint8)
+        extractor = SimpleFaceExtractor(64)
+        bbs = [Rect(10, 50, 10, 50), Rect(40, 90, 30, 80)]
+        faces = extractor.extract_all(img, bbs)
+        self.assertEqual(faces.shape, (2, 64, 64, 3))
+        for face, bb in zip(faces, bbs):
+            self.assertTrue(np.array_equal(face, extractor.extract(img, bb)))
+
 
 class AligningDlibFaceExtractorTestCase(unittest.TestCase):
     with dlib_predictor_path() as p:
@@ -4,8 +4,8 @@ import unittest
 import cv2
 import numpy as np
 
-from automakeup.feature.face import ClusteringIrisShapeExtractor, HoughCircleIrisShapeExtractor, \
-    ThresholdingIrisShapeExtractor
+from automakeup.feature.face import BatchClusteringIrisShapeExtractor, ClusteringIrisShapeExtractor, \
+    HoughCircleIrisShapeExtractor, ThresholdingIrisShapeExtractor
 from faceparsing import FaceParser
 from imagine.color import conversion
 from imagine.shape import operations
@@ -72,6 +72,41 @@ class ClusteringIrisShapeExtractorTestCase(unittest.TestCase):
         self.assertTrue((~iris_mask).all())
 
 
+class BatchClusteringIrisShapeExtractorTestCase(unittest.TestCase):
+    extractor = BatchClusteringIrisShapeExtractor()
+
+    def test_batch_clustering_iris_shape_extractor_returns_correct_shape(self):
+        img, mask = get_eye("face.jpg", parser)
+        iris_mask = self.extractor.extract(img, mask)
+        self.assertEqual(iris_mask.shape[:2], img.shape[:2])
+
+    def test_batch_clustering_iris_shape_extractor_returns_correct_type(self):
+        img, mask = get_eye("face.jpg", parser)
+        iris_mask = self.extractor.extract(img, mask)
+        self.assertTrue(np.issubdtype(iris_mask.dtype, np.bool))
+
+    def test_batch_clustering_iris_shape_extractor_can_find_the_iris(self):
+        img, mask = get_eye("face.jpg", parser)
+        iris_mask = self.extractor.extract(img, mask)
+        self.assertTrue(np.any(iris_mask))
+
+    def test_batch_clustering_iris_shape_extractor_returns_empty_mask_for_no_iris(self):
+        img = np.zeros((100, 100, 3), dtype=np.uint8)
+        mask = np.ones(img.shape[:2], dtype=np.bool)
+        iris_mask = self.extractor.extract(img, mask)
+        self.assertTrue((~iris_mask).all())
+
+    def test_batch_clustering_iris_shape_extractor_returns_the_same_masks_for_batch_and_single_eyes(self):
+        img, mask = get_eye("face.jpg", parser)
+        noisy = np.clip(img + np.random.default_rng(0).integers(0, 20, img.shape), 0, 255).astype(np.uint8)
+        imgs = [img, cv2.resize(noisy, (30, 30)), img[:5, :5]]
+        masks = [mask, cv2.resize(mask.view(np.uint8), (30, 30)) > 0, mask[:5, :5]]
+        iris_masks = self.extractor.extract_batch(imgs, masks)
+        self.assertEqual(len(iris_masks), 3)
+        for img, mask, iris_mask in zip(imgs, masks, iris_masks):
+            self.assertTrue((iris_mask == self.extractor.extract(img, mask)).all())
+
+
 class HoughCircleIrisShapeExtractorTestCase(unittest.TestCase):
     extractor = HoughCircleIrisShapeExtractor()
 
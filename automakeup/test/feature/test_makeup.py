@@ -7,6 +7,7 @@ import numpy as np
 from automakeup.feature.makeup import EyeshadowShapeExtractor, EyeshadowColorExtractor, LipstickColorExtractor
 from faceparsing import FaceParser
 from imagine.color import conversion
+from imagine.color.extract import ColorExtractor
 from imagine.shape.segment import ParsingSegmenter
 
 parser = FaceParser()
@@ -43,6 +44,47 @@ class EyeshadowShapeExtractorTestCase(unittest.TestCase):
         eyeshadow_mask = self.extractor.extract(img, skin_mask, eyes_mask)
         self.assertTrue((~eyeshadow_mask).all())
 
+    def test_eyeshadow_shape_extractor_finds_the_eyeshadow_with_few_colors_for_cluster_classifier(self):
+        with pkg_resources.path("resources", "face.jpg") as p:
+            img = conversion.BgrToRgb(cv2.imread(str(p)))
+        segmented = ParsingSegmenter(parser, parts_map={"skin": 1, "l_eye": 2, "r_eye": 2})(img)
+        extractor = EyeshadowShapeExtractor(classifier_max_colors=50)
+        eyeshadow_mask = extractor.extract(img, segmented == 1, segmented == 2)
+        self.assertEqual(eyeshadow_mask.shape[:2], img.shape[:2])
+        self.assertTrue(np.any(eyeshadow_mask))
+
+    def test_cluster_classifier_is_fitted_with_fewer_colors_than_neighbours(self):
+        img = np.zeros((20, 20, 3), dtype=np.uint8)
+        img[:, 10:] = 255
+        img = ColorExtractor.normalize(img)
+        clustered = np.full(img.shape[:2], -1)
+        clustered[5:15, 5:10] = 0
+        clustered[5:15, 10:15] = 1
+        eyeshadow_mask = self.extractor._remove_bad_areas(img, clustered, np.array([255, 0, 0], dtype=np.uint8))
+        self.assertEqual(eyeshadow_mask.shape, img.shape[:2])
+        self.assertFalse(eyeshadow_mask[clustered == -1].any())
+
+    def test_eyeshadow_area_is_measured_from_eye_contour_with_holes_filled(self):
+        eye = np.zeros((200, 200), dtype=np.uint8)
+        cv2.ellipse(eye, (100, 100), (30, 15), 0, 0, 360, 1, -1)
+        holed = eye.copy()
+        cv2.circle(holed, (100, 100), 8, 0, -1)
+        contour = cv2.findContours(holed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0][0]
+        skin_mask = np.ones(eye.shape, dtype=np.bool)
+        area, _, mask = self.extractor._get_bigger_eye(holed > 0)
+        self.assertEqual(area, cv2.contourArea(contour))
+        self.assertTrue((mask == (eye > 0)).all())
+        self.assertTrue((self.extractor._area_around_eye(holed > 0, skin_mask)
+                         == self.extractor._area_around_eye(eye > 0, skin_mask)).all())
+
+    def test_eyeshadow_area_is_around_bigger_eye(self):
+        eyes = np.zeros((200, 400), dtype=np.uint8)
+        cv2.ellipse(eyes, (100, 100), (20, 10), 0, 0, 360, 1, -1)
+        cv2.ellipse(eyes, (300, 100), (30, 15), 0, 0, 360, 1, -1)
+        around_eye = self.extractor._area_around_eye(eyes > 0, np.ones(eyes.shape, dtype=np.bool))
+        self.assertTrue(around_eye[:, 200:].any())
+        self.assertFalse(around_eye[:, :150].any())
+
 
 class EyeshadowColorExtractorTestCase(unittest.TestCase):
     extractor = EyeshadowColorExtractor()
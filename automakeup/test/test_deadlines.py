@@ -0,0 +1,61 @@
+import contextvars
+import threading
+import time
+import unittest
+
+from automakeup import deadlines
+
+
+class DeadlinesTestCase(unittest.TestCase):
+
+    def test_there_is_no_deadline_by_default(self):
+        self.assertIsNone(deadlines.current())
+        self.assertIsNone(deadlines.remaining())
+        deadlines.check()
+
+    def test_deadline_is_set_only_inside_block(self):
+        deadline = time.monotonic() + 10
+        with deadlines.until(deadline):
+            self.assertEqual(deadlines.current(), deadline)
+            self.assertTrue(0 < deadlines.remaining() <= 10)
+        self.assertIsNone(deadlines.current())
+
+    def test_nested_deadline_is_restored_after_block(self):
+        outer, inner = time.monotonic() + 10, time.monotonic() + 5
+        with deadlines.until(outer):
+            with deadlines.until(inner):
+                self.assertEqual(deadlines.current(), inner)
+            self.assertEqual(deadlines.current(), outer)
+
+    def test_check_passes_before_deadline(self):
+        with deadlines.until(time.monotonic() + 10):
+            deadlines.check()
+
+    def test_check_raises_after_deadline(self):
+        with deadlines.until(time.monotonic() - 1):
+            self.assertRaises(deadlines.DeadlineExceededError, deadlines.check)
+
+    def test_deadline_exceeded_error_is_timeout_error(self):
+        self.assertTrue(issubclass(deadlines.DeadlineExceededError, TimeoutError))
+
+    def test_deadline_is_propagated_to_thread_running_in_copied_context(self):
+        deadline = time.monotonic() + 10
+        seen = {}
+        with deadlines.until(deadline):
+            context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(lambda: seen.update(deadline=deadlines.current()),))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen["deadline"], deadline)
+
+    def test_deadline_is_not_shared_with_other_threads(self):
+        seen = {}
+        with deadlines.until(time.monotonic() + 10):
+            thread = threading.Thread(target=lambda: seen.update(deadline=deadlines.current()))
+            thread.start()
+            thread.join()
+        self.assertIsNone(seen["deadline"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from automakeup.encoded_recommendation import GanetteRecommender, farthest_points
+
+
+class FixedModel:
+    """Model which samples the same candidates for every face"""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def sample(self, y, state=None):
+        return np.tile(self.candidates, (len(y) // len(self.candidates), 1))
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+    def inverse_transform(self, x):
+        return x
+
+
+class FarthestPointsTestCase(unittest.TestCase):
+    points = np.array([[0, 0], [5, 0], [-4, 0], [0, 1], [0, -2]], dtype=np.float64)
+
+    def test_farthest_points_chooses_most_typical_point_first_then_farthest_ones(self):
+        chosen = farthest_points(self.points[None], 4)
+        self.assertEqual(chosen.tolist(), [[0, 1, 2, 4]])
+
+    def test_farthest_points_chooses_points_in_each_set_separately(self):
+        order = np.array([4, 3, 2, 1, 0])
+        chosen = farthest_points(np.stack([self.points, self.points[order]]), 3)
+        self.assertEqual(chosen[0].tolist(), [0, 1, 2])
+        self.assertEqual(order[chosen[1]].tolist(), [0, 1, 2])
+
+
+class GanetteRecommenderTestCase(unittest.TestCase):
+    typical = [150, 128, 128, 100, 128, 128]
+    # candidates in 8-bit Lab: 8 typical ones, then lighter, darker, more red and more blue
+    candidates = np.array([typical] * 8 + [[250, 128, 128, 250, 128, 128],
+                                           [10, 128, 128, 10, 128, 128],
+                                           [150, 220, 128, 100, 220, 128],
+                                           [150, 128, 40, 100, 128, 40]], dtype=np.float64)
+
+    def test_recommend_many_chooses_typical_candidate_first_then_farthest_in_lab(self):
+        recommender = GanetteRecommender(FixedModel(self.candidates), IdentityScaler(), IdentityScaler(),
+                                         oversampling=4)
+        out = recommender.recommend_many(np.full(6, 0.5), 3)
+        self.assertEqual(out.shape, (3, 6))
+        np.testing.assert_array_equal(out, recommender.postprocess(self.candidates[[0, 10, 11]]))
+        self.assertEqual(len(np.unique(out, axis=0)), 3)
+
+    def test_recommend_many_chooses_candidates_for_each_face(self):
+        recommender = GanetteRecommender(FixedModel(self.candidates), IdentityScaler(), IdentityScaler(),
+                                         oversampling=4)
+        out = recommender.recommend_many(np.full((2, 6), 0.5), 3)
+        self.assertEqual(out.shape, (2, 3, 6))
+        np.testing.assert_array_equal(out[0], out[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
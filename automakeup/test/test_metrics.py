@@ -0,0 +1,79 @@
+import unittest
+
+from automakeup import metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY = metrics.Registry()
+
+    def tearDown(self):
+        metrics.REGISTRY = metrics.Registry()
+
+    def test_nothing_is_recorded_when_disabled(self):
+        with metrics.timed("detection"):
+            pass
+        metrics.event("face_not_found")
+        metrics.missing("eyeshadow")
+        self.assertFalse(metrics.REGISTRY.stages.series)
+        self.assertFalse(metrics.REGISTRY.events.series)
+        self.assertFalse(metrics.REGISTRY.missing.series)
+
+    def test_events_and_missing_features_are_counted_by_label(self):
+        metrics.enable()
+        metrics.event("face_not_found")
+        metrics.event("face_not_found")
+        metrics.event("cache_hit", 3)
+        metrics.missing("eyeshadow")
+        self.assertEqual(metrics.REGISTRY.events.series, {"face_not_found": 2, "cache_hit": 3})
+        self.assertEqual(metrics.REGISTRY.missing.series, {"eyeshadow": 1})
+
+    def test_timed_stages_are_recorded_in_histogram(self):
+        metrics.enable()
+        with metrics.timed("detection"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with metrics.timed("detection"):
+                raise RuntimeError()
+        series = metrics.REGISTRY.stages.series["detection"]
+        self.assertEqual(sum(series["counts"]), 2)
+        self.assertTrue(series["sum"] >= 0)
+
+    def test_histogram_counts_values_in_buckets(self):
+        histogram = metrics.Histogram("duration", "Duration", label="stage", buckets=(1, 2))
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value, "a")
+        self.assertEqual(histogram.series["a"], {"counts": [2, 1, 1], "sum": 6.0})
+
+    def test_histogram_is_exposed_with_cumulative_buckets(self):
+        histogram = metrics.Histogram("duration", "Duration", label="stage", buckets=(1, 2))
+        for value in (0.5, 1.5, 3):
+            histogram.observe(value, "a")
+        self.assertEqual(histogram.expose(), [
+            "# HELP duration Duration",
+            "# TYPE duration histogram",
+            'duration_bucket{stage="a",le="1"} 1',
+            'duration_bucket{stage="a",le="2"} 2',
+            'duration_bucket{stage="a",le="+Inf"} 3',
+            'duration_sum{stage="a"} 5.0',
+            'duration_count{stage="a"} 3',
+        ])
+
+    def test_counter_is_exposed_for_each_label(self):
+        counter = metrics.Counter("events", "Events", label="event")
+        counter.inc("a")
+        counter.inc("b", 2)
+        self.assertEqual(counter.expose()[2:], ['events{event="a"} 1', 'events{event="b"} 2'])
+
+    def test_registry_exposes_all_metrics(self):
+        metrics.enable()
+        metrics.event("cache_hit")
+        exposed = metrics.expose()
+        self.assertIn('makeup_events_total{event="cache_hit"} 1', exposed)
+        self.assertIn("# TYPE makeup_stage_duration_seconds histogram", exposed)
+        self.assertIn("# TYPE makeup_missing_features_total counter", exposed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import argparse
+import glob
+import statistics
+import time
+
+import cv2
+
+from automakeup.face.bounding import MTCNNBoundingBoxFinder
+from imagine.color.conversion import BgrToRgb
+from mtcnn import MTCNN
+
+
+def parse_args():
+    argparser = argparse.ArgumentParser(description="speed and accuracy of face detection in downscaled images "
+                                                    "compared to detection in full resolution")
+    argparser.add_argument('images', nargs='+',
+                           help='paths or glob patterns of images with faces')
+    argparser.add_argument('--fractions', type=float, nargs='+', default=[0.05, 0.1, 0.2],
+                           help='minimum face fractions of the shorter image side to compare')
+    argparser.add_argument('--proxy_face_size', type=int, default=48,
+                           help='size in pixels of the smallest expected face in the downscaled image')
+    return argparser.parse_args()
+
+
+def iou(a, b):
+    height = max(0, min(a.bottom, b.bottom) - max(a.top, b.top))
+    width = max(0, min(a.right, b.right) - max(a.left, b.left))
+    intersection = height * width
+    return intersection / (a.area() + b.area() - intersection)
+
+
+def run(finder, imgs):
+    bbs, times = [], []
+    for img in imgs:
+        start = time.perf_counter()
+        bbs.append(finder.find(img))
+        times.append(time.perf_counter() - start)
+    return bbs, times
+
+
+def report(name, times, bbs=None, reference=None):
+    line = "{:<32} {:8.3f}s per image".format(name, statistics.mean(times))
+    if reference is not None:
+        both = [(bb, ref) for bb, ref in zip(bbs, reference) if bb is not None and ref is not None]
+        missed = sum(bb is None and ref is not None for bb, ref in zip(bbs, reference))
+        ious = [iou(bb, ref) for bb, ref in both]
+        line += "   IoU mean {:.3f} min {:.3f}   missed {}".format(
+            statistics.mean(ious) if ious else float("nan"), min(ious) if ious else float("nan"), missed)
+    print(line)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    paths = sorted(p for pattern in args.images for p in glob.glob(pattern, recursive=True))
+    imgs = [BgrToRgb(cv2.imread(p)) for p in paths]
+    mtcnn = MTCNN()
+
+    # first run initializes the model, so it isn't measured
+    MTCNNBoundingBoxFinder(mtcnn).find(imgs[0])
+
+    reference, times = run(MTCNNBoundingBoxFinder(mtcnn), imgs)
+    print("{} images, faces found in full resolution in {}".format(len(imgs), sum(bb is not None for bb in reference)))
+    report("full resolution", times)
+    for fraction in args.fractions:
+        for refine in (False, True):
+            finder = MTCNNBoundingBoxFinder(mtcnn, min_face_fraction=fraction, proxy_face_size=args.proxy_face_size,
+                                            refine=refine)
+            bbs, times = run(finder, imgs)
+            report("fraction {}{}".format(fraction, " refined" if refine else ""), times, bbs, reference)
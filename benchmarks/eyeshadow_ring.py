@@ -0,0 +1,65 @@
+import argparse
+import statistics
+import time
+from math import sqrt
+
+import cv2
+import numpy as np
+
+from imagine.shape import operations
+
+
+def parse_args():
+    argparser = argparse.ArgumentParser(description="speed and accuracy of eyeshadow ring made with distance transform "
+                                                    "compared to difference of two elliptical dilations")
+    argparser.add_argument('--face_size', type=int, default=512,
+                           help='size in pixels of the face image')
+    argparser.add_argument('--eye_widths', type=int, nargs='+', default=[20, 40, 80, 160],
+                           help='widths in pixels of eyes to compare')
+    argparser.add_argument('--outer_eye_factor', type=float, default=2.25,
+                           help='outer kernel size relative to square root of eye area')
+    argparser.add_argument('--inner_eye_factor', type=float, default=0.25,
+                           help='inner kernel size relative to square root of eye area')
+    argparser.add_argument('--repeats', type=int, default=20,
+                           help='number of measured runs')
+    return argparser.parse_args()
+
+
+def eye_mask(face_size, eye_width):
+    mask = np.zeros((face_size, face_size), dtype=np.uint8)
+    center = (face_size // 3, face_size * 2 // 5)
+    cv2.ellipse(mask, center, (eye_width // 2, max(1, eye_width // 6)), 0, 0, 360, 1, -1)
+    return mask
+
+
+def dilations(eye, outer_kernel_size, inner_kernel_size):
+    return (operations.dilate(eye, outer_kernel_size) > 0) & (operations.dilate(eye, inner_kernel_size) == 0)
+
+
+def distance_ring(eye, outer_kernel_size, inner_kernel_size):
+    return operations.ring(eye, operations.dilation_radius(outer_kernel_size),
+                           operations.dilation_radius(inner_kernel_size))
+
+
+def measure(function, repeats, *args):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    print("{:>9} {:>7} {:>14} {:>14} {:>8}".format("eye width", "kernel", "dilations", "distance", "IoU"))
+    for eye_width in args.eye_widths:
+        eye = eye_mask(args.face_size, eye_width)
+        eye_area = eye.sum()
+        outer_kernel_size = max(int(sqrt(eye_area) * args.outer_eye_factor), 2)
+        inner_kernel_size = max(int(sqrt(eye_area) * args.inner_eye_factor), 1)
+        reference, dilations_time = measure(dilations, args.repeats, eye, outer_kernel_size, inner_kernel_size)
+        ring, ring_time = measure(distance_ring, args.repeats, eye, outer_kernel_size, inner_kernel_size)
+        iou = (reference & ring).sum() / (reference | ring).sum()
+        print("{:>9} {:>7} {:>12.2f}ms {:>12.2f}ms {:>8.4f}".format(eye_width, outer_kernel_size,
+                                                                    1000 * dilations_time, 1000 * ring_time, iou))
@@ -0,0 +1,135 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import cv2
+import numpy as np
+
+
+def parse_args():
+    argparser = argparse.ArgumentParser(description="time to first response of climakeup and webmakeup")
+    argparser.add_argument('--climakeup', type=str, required=True,
+                           help='path to the climakeup executable')
+    argparser.add_argument('--webmakeup', type=str, required=True,
+                           help='path to the webmakeup executable')
+    argparser.add_argument('--image', type=str,
+                           help='path to the image sent in requests (when not given, a synthetic image is used)')
+    argparser.add_argument('--repeats', type=int, default=3,
+                           help='number of measurements of each scenario')
+    argparser.add_argument('--port', type=int, default=8089,
+                           help='port at which webmakeup is started')
+    return argparser.parse_args()
+
+
+def synthetic_image_file(directory):
+    path = os.path.join(directory, "synthetic.jpg")
+    cv2.imwrite(path, np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8))
+    return path
+
+
+def wait_for(condition, timeout=600, interval=0.02):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Condition not met in {}s".format(timeout))
+        time.sleep(interval)
+
+
+def multipart(name, path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        content = f.read()
+    body = b"".join([
+        "--{}\r\n".format(boundary).encode(),
+        'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'.format(name, os.path.basename(path)).encode(),
+        b"Content-Type: application/octet-stream\r\n\r\n",
+        content,
+        "\r\n--{}--\r\n".format(boundary).encode(),
+    ])
+    return body, "multipart/form-data; boundary={}".format(boundary)
+
+
+def http_status(url, data=None, content_type=None):
+    """Returns HTTP status of the response, or None if the server doesn't accept connections yet"""
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type} if content_type else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def time_climakeup(climakeup, image):
+    start = time.perf_counter()
+    subprocess.run([climakeup, image], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_climakeup_client(climakeup, image, socket_path):
+    start = time.perf_counter()
+    subprocess.run([climakeup, "--client", "--socket", socket_path, image],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def is_listening(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+def time_webmakeup(webmakeup, image, port):
+    """Returns times until the first response to a recommendation request and until the server is ready"""
+    body, content_type = multipart("img", image)
+    url = "http://localhost:{}".format(port)
+    start = time.perf_counter()
+    process = subprocess.Popen([webmakeup, "--port", str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(lambda: http_status(url + "/", body, content_type) is not None)
+        first_response = time.perf_counter() - start
+        wait_for(lambda: http_status(url + "/ready") == 200)
+        ready = time.perf_counter() - start
+        return first_response, ready
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(name, times):
+    deviation = statistics.stdev(times) if len(times) > 1 else 0.0
+    print("{:<40} {:8.3f}s ± {:.3f}s".format(name, statistics.mean(times), deviation))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        image = args.image if args.image is not None else synthetic_image_file(directory)
+
+        report("climakeup", [time_climakeup(args.climakeup, image) for _ in range(args.repeats)])
+
+        socket_path = os.path.join(directory, "climakeup.sock")
+        daemon = subprocess.Popen([args.climakeup, "--daemon", "--socket", socket_path],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(lambda: is_listening(socket_path))
+            report("climakeup --client (daemon running)",
+                   [time_climakeup_client(args.climakeup, image, socket_path) for _ in range(args.repeats)])
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+        webmakeup_times = [time_webmakeup(args.webmakeup, image, args.port) for _ in range(args.repeats)]
+        report("webmakeup first response", [first for first, _ in webmakeup_times])
+        report("webmakeup ready", [ready for _, ready in webmakeup_times])
@@ -0,0 +1,55 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from climakeup.inputs import read_input
+from climakeup.processing import get_image, run_loaded
+
+
+def load_image(filename, min_size=None):
+    return get_image(read_input(filename), min_size)
+
+
+def chunks(sequence, size):
+    for i in range(0, len(sequence), size):
+        yield sequence[i:i + size]
+
+
+def decoded_batches(filenames, batch_size, executor, min_size=None):
+    """
+    Yields batches of filenames with futures of their decoded images
+
+    Images of the next batch are decoded while the current one is processed,
+    so at most two batches are held in memory.
+    """
+    pending = None
+    for batch in chunks(filenames, batch_size):
+        futures = [executor.submit(load_image, filename, min_size) for filename in batch]
+        if pending is not None:
+            yield pending
+        pending = batch, futures
+    if pending is not None:
+        yield pending
+
+
+def process_batch(pipeline, filenames, futures):
+    """Returns outputs for all files, with errors of the files which couldn't be read, decoded or processed"""
+    return run_loaded(pipeline, filenames, [future.exception() or future.result() for future in futures])
+
+
+def stream(pipeline, filenames, output, batch_size=16, threads=4, min_size=None):
+    """
+    Process files in batches and write one JSON line per file to output, in the order of filenames
+
+    Args:
+        pipeline: pipeline with run_batch() method
+        filenames: paths to the image files
+        output: text file to which lines are written
+        batch_size: number of images processed as one batch
+        threads: number of threads reading and decoding images
+        min_size: JPEG images are decoded in reduced resolution if their shorter side stays at least this big
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for batch, futures in decoded_batches(filenames, batch_size, executor, min_size):
+            for line in process_batch(pipeline, batch, futures):
+                output.write(json.dumps(line) + "\n")
+            output.flush()
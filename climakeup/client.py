@@ -0,0 +1,21 @@
+import socket
+
+from climakeup import protocol
+
+# only standard library is imported here, so the client doesn't pay for loading torch, OpenCV etc.
+
+
+class DaemonNotRunningError(IOError):
+    def __init__(self, socket_path):
+        super().__init__("Can't connect to the daemon at {}. Start it with --daemon".format(socket_path))
+
+
+def request(socket_path, filenames, contents):
+    """Returns output of the daemon for given files, the same as would be printed without the daemon"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise DaemonNotRunningError(socket_path)
+        protocol.send_request(sock, filenames, contents)
+        return protocol.recv_response(sock)
@@ -0,0 +1,72 @@
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+
+from climakeup import processing, protocol
+
+logger = logging.getLogger("daemon")
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            filenames, contents = protocol.recv_request(self.request)
+        except (protocol.ProtocolError, ValueError, KeyError) as e:
+            logger.warning("Invalid request", exc_info=e)
+            return
+        try:
+            output = processing.process(self.server.pipeline, filenames, contents, self.server.min_decode_size)
+        except ValueError as e:
+            output = {"error": str(e)}
+        except Exception as e:
+            logger.warning("Exception occurred during processing", exc_info=e)
+            output = {"error": str(e)}
+        protocol.send_response(self.request, output)
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Server keeping the pipeline loaded and processing requests of clients connecting to a Unix domain socket
+
+    The socket is accessible only by the user who started the daemon.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pipeline, socket_path, min_decode_size=None):
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, RequestHandler)
+        os.chmod(socket_path, 0o600)
+        self.pipeline = pipeline
+        self.min_decode_size = min_decode_size
+        self.socket_path = socket_path
+
+    def run(self):
+        previous_handler = signal.signal(signal.SIGTERM, self._stop)
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self.server_close()
+            os.unlink(self.socket_path)
+
+    def _stop(self, signum, frame):
+        # shutdown() waits for serve_forever() to return, so it can't be called from the thread running it
+        threading.Thread(target=self.shutdown).start()
+
+
+def remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise IOError("Daemon is already running at {}".format(socket_path))
@@ -0,0 +1,55 @@
+import glob
+import os
+import sys
+
+IMAGE_EXTENSIONS = {".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp"}
+
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_glob(path):
+    return any(c in path for c in "*?[")
+
+
+def list_directory(path):
+    """Returns paths of images in directory and its subdirectories in sorted order"""
+    found = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        found.extend(os.path.join(root, f) for f in sorted(files) if is_image(f))
+    return found
+
+
+def expand(paths):
+    """
+    Expand directories and glob patterns to paths of images
+
+    Order of the given paths is kept, paths found in each directory or pattern are sorted.
+    Other paths, including '-' for stdin, are returned as they are.
+    """
+    expanded = []
+    for path in paths:
+        if path != '-' and os.path.isdir(path):
+            expanded.extend(list_directory(path))
+        elif is_glob(path) and not os.path.exists(path):
+            expanded.extend(sorted(p for p in glob.glob(path, recursive=True) if os.path.isfile(p)))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def read_file_list(path):
+    """Returns non-empty lines of the file, or of stdin when path is '-'"""
+    if path == '-':
+        return [line.strip() for line in sys.stdin if line.strip()]
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def read_input(filename: str):
+    if filename == '-':
+        return sys.stdin.buffer.read()
+    with open(filename, 'rb') as f:
+        return f.read()
@@ -1,16 +1,18 @@
 import contextlib
 import importlib.resources as pkg_resources
-import io
 import json
+import logging
+import os
 import sys
+import tempfile
 
 import configargparse
-import cv2
-import numpy as np
-import torch
 
-from automakeup.pipelines import GanettePipeline
-from imagine.color.conversion import BgrToRgb
+from climakeup.inputs import expand, read_file_list, read_input
+
+# heavy modules (torch, OpenCV, the pipeline) are imported only when needed, so the client mode starts fast
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "climakeup-{}.sock".format(os.getuid()))
 
 
 def parse_args():
@@ -18,36 +20,106 @@ def parse_args():
         argparser = configargparse.ArgParser(prog=__package__,
                                              description="{} - automakeup command line interface".format(__package__),
                                              default_config_files=[str(config_path)])
-        argparser.add_argument('file', nargs='?', default='-',
-                               help="path to the image file with a face (when not given, reads content directly from stdin)")
+        argparser.add_argument('files', nargs='*',
+                               help="paths to the image files with a face, directories or glob patterns (when not "
+                                    "given, reads content directly from stdin). when more than one file is given, all "
+                                    "of them are processed as one batch, unless --jsonl is used")
         argparser.add_argument('--config', is_config_file=True,
                                help='config file path')
-    return argparser.parse_args()
+        argparser.add_argument('--file_list', type=str,
+                               help="path to a file with paths to the image files, one per line ('-' reads from stdin)")
+        argparser.add_argument('--jsonl', action='store_true',
+                               help='process files in batches and write one JSON line per file as soon as its batch '
+                                    'is done, in the order of the files')
+        argparser.add_argument('--output', type=str, default='-',
+                               help="path to the output file ('-' writes to stdout)")
+        argparser.add_argument('--batch_size', type=int, default=16,
+                               help='number of images processed as one batch in --jsonl mode')
+        argparser.add_argument('--decode_threads', type=int, default=4,
+                               help='number of threads reading and decoding images in --jsonl mode')
+        mode = argparser.add_mutually_exclusive_group()
+        mode.add_argument('--daemon', action='store_true',
+                          help='keep the pipeline loaded and process files sent by clients through the socket')
+        mode.add_argument('--client', action='store_true',
+                          help='send files to the running daemon instead of loading the pipeline')
+        argparser.add_argument('--socket', type=str, default=DEFAULT_SOCKET,
+                               help='path of the Unix domain socket of the daemon')
+        argparser.add_argument('--min_decode_size', type=int, default=0,
+                               help='decode JPEG images in reduced resolution if their shorter side stays at least '
+                                    'this big, faces too small for it are decoded again (0 decodes in full resolution)')
+    args = argparser.parse_args()
+    if args.jsonl and (args.daemon or args.client):
+        argparser.error("--jsonl can't be used with --daemon or --client")
+    return args
 
 
-def get_device():
-    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+def get_filenames(args):
+    filenames = list(args.files)
+    if args.file_list is not None:
+        filenames.extend(read_file_list(args.file_list))
+    if not filenames:
+        filenames = ['-']
+    return expand(filenames)
 
 
 @contextlib.contextmanager
-def open_input(filename: str):
+def open_output(filename: str):
     if filename == '-':
-        yield io.BytesIO(sys.stdin.buffer.read())
+        yield sys.stdout
     else:
-        with open(filename, 'rb') as f:
+        with open(filename, 'w') as f:
             yield f
 
 
-def get_image(input):
-    array = np.frombuffer(input.read(), dtype=np.uint8)
-    return BgrToRgb(cv2.imdecode(array, cv2.IMREAD_COLOR))
+def run_local(filenames, min_decode_size):
+    from climakeup import processing
+
+    contents = [read_input(filename) for filename in filenames]
+    return processing.process(processing.get_pipeline(), filenames, contents, min_decode_size)
+
+
+def run_jsonl(filenames, output, batch_size, threads, min_decode_size):
+    from climakeup import batch, processing
+
+    batch.stream(processing.get_pipeline(), filenames, output, batch_size, threads, min_decode_size)
+
+
+def run_client(filenames, socket_path):
+    from climakeup import client
+
+    contents = [read_input(filename) for filename in filenames]
+    output = client.request(socket_path, filenames, contents)
+    if isinstance(output, dict) and "error" in output:
+        sys.exit(output["error"])
+    return output
+
+
+def run_daemon(socket_path, min_decode_size):
+    from climakeup import processing
+    from climakeup.daemon import Daemon
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
+    logger = logging.getLogger("main")
+    logger.info("Loading pipeline...")
+    daemon = Daemon(processing.get_pipeline(), socket_path, min_decode_size)
+    logger.info("Listening at {}".format(socket_path))
+    daemon.run()
 
 
 if __name__ == '__main__':
     args = parse_args()
-    device = get_device()
-
-    with open_input(args.file) as i:
-        result = GanettePipeline(device=device).run(get_image(i))
+    min_decode_size = args.min_decode_size or None
 
-    print(json.dumps(result.__dict__, indent=4))
+    if args.daemon:
+        run_daemon(args.socket, min_decode_size)
+    else:
+        filenames = get_filenames(args)
+        with open_output(args.output) as o:
+            if args.jsonl:
+                run_jsonl(filenames, o, args.batch_size, args.decode_threads, min_decode_size)
+            else:
+                if args.client:
+                    output = run_client(filenames, args.socket)
+                else:
+                    output = run_local(filenames, min_decode_size)
+                print(json.dumps(output, indent=4), file=o)
@@ -0,0 +1,61 @@
+import torch
+
+from automakeup.pipelines import GanettePipeline
+from imagine.io import decoding
+
+
+def get_device():
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+def get_pipeline():
+    return GanettePipeline(device=get_device())
+
+
+def get_image(content: bytes, min_size=None):
+    return decoding.decode(content, min_size=min_size)
+
+
+def to_dict(result):
+    return {"error": str(result)} if isinstance(result, Exception) else result.__dict__
+
+
+def run_single(pipeline, content, min_size=None):
+    return to_dict(pipeline.run(get_image(content, min_size)))
+
+
+def run_loaded(pipeline, filenames, loaded):
+    """
+    Returns outputs for all files from their already loaded images
+
+    Args:
+        loaded: for each file its image or exception raised while loading it, which is output as its error
+    """
+    results = list(loaded)
+    indices = [i for i, image in enumerate(results) if not isinstance(image, Exception)]
+    if indices:
+        for i, result in zip(indices, pipeline.run_batch([results[i] for i in indices])):
+            results[i] = result
+    return [dict(file=filename, **to_dict(result)) for filename, result in zip(filenames, results)]
+
+
+def run_batch(pipeline, filenames, contents, min_size=None):
+    """Returns outputs for all files, with errors of the files which couldn't be decoded or processed"""
+    loaded = []
+    for content in contents:
+        try:
+            loaded.append(get_image(content, min_size))
+        except Exception as e:
+            loaded.append(e)
+    return run_loaded(pipeline, filenames, loaded)
+
+
+def process(pipeline, filenames, contents, min_size=None):
+    """
+    Returns output for one file or list of outputs for many files processed as one batch
+
+    JPEG images are decoded in reduced resolution if their shorter side stays at least min_size
+    """
+    if len(filenames) == 1:
+        return run_single(pipeline, contents[0], min_size)
+    return run_batch(pipeline, filenames, contents, min_size)
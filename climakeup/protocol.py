@@ -0,0 +1,51 @@
+import json
+import struct
+
+# only standard library is imported here, so the client starts fast
+
+HEADER = struct.Struct("!I")
+
+
+class ProtocolError(IOError):
+    pass
+
+
+def send_message(sock, payload: bytes):
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 2 ** 20))
+        if not chunk:
+            raise ProtocolError("Connection closed unexpectedly")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    size, = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    return recv_exactly(sock, size)
+
+
+def send_request(sock, filenames, contents):
+    """Send names of the files followed by their contents, each as a separate message"""
+    send_message(sock, json.dumps({"files": filenames}).encode())
+    for content in contents:
+        send_message(sock, content)
+
+
+def recv_request(sock):
+    """Returns names of the files and their contents"""
+    filenames = json.loads(recv_message(sock).decode())["files"]
+    return filenames, [recv_message(sock) for _ in filenames]
+
+
+def send_response(sock, output):
+    send_message(sock, json.dumps(output).encode())
+
+
+def recv_response(sock):
+    return json.loads(recv_message(sock).decode())
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from climakeup.inputs import expand, read_file_list
+
+
+class InputsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = self.dir.name
+        for path in ["b.jpg", "a.PNG", "notes.txt", "sub/c.jpeg", "sub/deeper/d.jpg", "other/e.jpg"]:
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb"):
+                pass
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_directory_is_expanded_to_sorted_images_in_subdirectories(self):
+        self.assertEqual(expand([self.path("sub")]), [self.path("sub", "c.jpeg"), self.path("sub", "deeper", "d.jpg")])
+        self.assertEqual(expand([self.root]), [self.path("a.PNG"), self.path("b.jpg"), self.path("other", "e.jpg"),
+                                               self.path("sub", "c.jpeg"), self.path("sub", "deeper", "d.jpg")])
+
+    def test_glob_is_expanded_to_sorted_matching_files(self):
+        self.assertEqual(expand([self.path("*.jpg")]), [self.path("b.jpg")])
+        self.assertEqual(expand([self.path("**", "*.jpg")]), [self.path("b.jpg"), self.path("other", "e.jpg"),
+                                                              self.path("sub", "deeper", "d.jpg")])
+
+    def test_order_of_given_paths_is_kept(self):
+        self.assertEqual(expand([self.path("sub"), self.path("b.jpg"), "-"]),
+                         [self.path("sub", "c.jpeg"), self.path("sub", "deeper", "d.jpg"), self.path("b.jpg"), "-"])
+
+    def test_other_paths_are_returned_as_they_are(self):
+        missing = self.path("missing.jpg")
+        self.assertEqual(expand([missing, self.path("notes.txt")]), [missing, self.path("notes.txt")])
+
+    def test_file_list_skips_empty_lines(self):
+        list_path = self.path("list.txt")
+        with open(list_path, "w") as f:
+            f.write("first.jpg\n\n  second.jpg  \n")
+        self.assertEqual(read_file_list(list_path), ["first.jpg", "second.jpg"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import socket
+import unittest
+
+from climakeup import protocol
+
+
+class ProtocolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def test_message_is_received_as_sent(self):
+        protocol.send_message(self.sender, b"abc")
+        protocol.send_message(self.sender, b"")
+        self.assertEqual(protocol.recv_message(self.receiver), b"abc")
+        self.assertEqual(protocol.recv_message(self.receiver), b"")
+
+    def test_request_round_trip(self):
+        protocol.send_request(self.sender, ["a.jpg", "b.jpg"], [b"\xff\xd8a", b"b" * 1000])
+        self.assertEqual(protocol.recv_request(self.receiver), (["a.jpg", "b.jpg"], [b"\xff\xd8a", b"b" * 1000]))
+
+    def test_response_round_trip(self):
+        protocol.send_response(self.sender, [{"file": "a.jpg", "error": "Face not found"}])
+        self.assertEqual(protocol.recv_response(self.receiver), [{"file": "a.jpg", "error": "Face not found"}])
+
+    def test_truncated_payload_raises_protocol_error(self):
+        self.sender.sendall(protocol.HEADER.pack(10) + b"abc")
+        self.sender.close()
+        self.assertRaises(protocol.ProtocolError, protocol.recv_message, self.receiver)
+
+    def test_truncated_header_raises_protocol_error(self):
+        self.sender.sendall(protocol.HEADER.pack(10)[:2])
+        self.sender.close()
+        self.assertRaises(protocol.ProtocolError, protocol.recv_message, self.receiver)
+
+
+if __name__ == '__main__':
+    unittest.main()
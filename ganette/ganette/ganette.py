@@ -3,9 +3,7 @@ import itertools
 import os
 
 import numpy as np
-import pykeops
 import torch
-from geomloss import SamplesLoss
 from sklearn.base import BaseEstimator
 from sklearn.utils.validation import check_is_fitted, check_array, check_consistent_length
 from torch import nn, optim
@@ -177,21 +175,32 @@ class Ganette(ConditionalGenerativeModel, BaseEstimator, Picklable):
         check_is_fitted(self)
         y = self._validate_y(y)
         y = torch.as_tensor(y, device=self.device, dtype=torch.float)
-        n_samples = len(y)
-        rng = torch.Generator(device=self.device)
-        if state is not None:
-            rng.manual_seed(state)
-        else:
-            rng.seed()
-        g_in = torch.cat([
-            torch.randn(n_samples, self.latent_size, device=self.device, dtype=y.dtype, generator=rng),
-            y], dim=1)
+        g_in = torch.cat([self._latent(len(y), y.dtype, state), y], dim=1)
         return to_dtype(self.g_(g_in).detach().cpu().numpy(), self.x_dtype_)
 
+    def _latent(self, n_samples, dtype, state):
+        def randn(n, seed=None):
+            rng = torch.Generator(device=self.device)
+            if seed is not None:
+                rng.manual_seed(seed)
+            else:
+                rng.seed()
+            return torch.randn(n, self.latent_size, device=self.device, dtype=dtype, generator=rng)
+
+        if state is None or np.ndim(state) == 0:
+            return randn(n_samples, None if state is None else int(state))
+        # separate state for each sample gives the same latent vectors as sampling each of them alone
+        if len(state) != n_samples:
+            raise ValueError(f"Got {len(state)} states for {n_samples} samples")
+        return torch.cat([randn(1, None if s is None else int(s)) for s in state], dim=0)
+
     def score(self, x, y):
         check_is_fitted(self)
         x, y = self._validate_x(x), self._validate_y(y)
         check_consistent_length(x, y)
+        # scoring dependencies are heavy to import and aren't needed for sampling
+        import pykeops
+        from geomloss import SamplesLoss
         pykeops.config.gpu_available = False
         Loss = SamplesLoss("sinkhorn", p=1, blur=.005, scaling=.9, backend="online")
 
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import unittest
 
 import numpy as np
@@ -11,6 +14,12 @@ class GanetteTestCase(unittest.TestCase):
     def test_ganette_can_be_created_with_default_parameters(self):
         Ganette()
 
+    def test_ganette_import_does_not_import_scoring_dependencies(self):
+        code = "import sys, ganette; print(sorted({'geomloss', 'pykeops'} & set(sys.modules)))"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.run([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, check=True).stdout
+        self.assertEqual(out.decode().strip(), "[]")
+
     def test_ganette_is_fitted_correctly(self):
         n, xf, yf = 10, 12, 12
         x, y = np.random.rand(n, xf), np.random.rand(n, yf)
@@ -79,6 +88,19 @@ class GanetteTestCase(unittest.TestCase):
         g = Ganette().fit(x, y)
         self.assertTrue((g.sample(sy, state=42) == g.sample(sy, state=42)).all())
 
+    def test_ganette_sample_with_state_for_each_sample_equals_sampling_each_alone(self):
+        n, sn, xf, yf = 10, 5, 12, 12
+        x, y, sy = np.random.rand(n, xf), np.random.rand(n, yf), np.random.rand(sn, yf)
+        g = Ganette().fit(x, y)
+        states = list(range(sn))
+        alone = np.vstack([g.sample(sy[i:i + 1], state=s) for i, s in enumerate(states)])
+        self.assertTrue(np.allclose(g.sample(sy, state=states), alone))
+
+    def test_ganette_sample_fails_when_number_of_states_is_different_than_number_of_samples(self):
+        n, sn, xf, yf = 10, 5, 12, 12
+        x, y, sy = np.random.rand(n, xf), np.random.rand(n, yf), np.random.rand(sn, yf)
+        self.assertRaises(ValueError, Ganette().fit(x, y).sample, sy, list(range(sn + 1)))
+
     def test_ganette_sample_fails_when_model_is_not_fitted(self):
         self.assertRaises(NotFittedError, Ganette().sample, np.random.rand(1, 10))
 
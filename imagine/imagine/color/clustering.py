@@ -0,0 +1,155 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClusterMixin, clone
+from sklearn.utils.validation import has_fit_parameter
+
+from imagine.color.utils import unique_colors
+
+
+class WeightedKMeans(ClusterMixin, BaseEstimator):
+    """
+    Compact k-means with weighted samples, seeded k-means++ initialization and bounded number of iterations
+
+    Follows sklearn clustering interface, so it can be used wherever sklearn.cluster.KMeans is.
+    """
+
+    def __init__(self, n_clusters=8, n_init=1, max_iter=50, tol=1e-4, random_state=0):
+        """
+        Args:
+            n_clusters: number of clusters
+            n_init: number of initializations, result with the lowest inertia is kept
+            max_iter: maximum number of iterations of each run
+            tol: relative tolerance of centers movement to declare convergence
+            random_state: seed of the initialization
+        """
+        super().__init__()
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+
+    def fit(self, X, y=None, sample_weight=None):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) < self.n_clusters:
+            raise ValueError("n_samples={} should be >= n_clusters={}".format(len(X), self.n_clusters))
+        weights = np.ones(len(X)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state)
+        variance = weights @ ((X - weights @ X / weights.sum()) ** 2).sum(axis=1) / weights.sum()
+        best = None
+        for _ in range(self.n_init):
+            run = self._run(X, weights, self._init_centers(X, weights, rng), self.tol * variance)
+            if best is None or run[2] < best[2]:
+                best = run
+        self.cluster_centers_, self.labels_, self.inertia_, self.n_iter_ = best
+        return self
+
+    def fit_predict(self, X, y=None, sample_weight=None):
+        return self.fit(X, sample_weight=sample_weight).labels_
+
+    def predict(self, X):
+        return self._distances(np.asarray(X, dtype=np.float64), self.cluster_centers_).argmin(axis=1)
+
+    def _init_centers(self, X, weights, rng):
+        # greedy k-means++, the best of several sampled candidates is taken as each next center
+        n_trials = 2 + int(np.log(self.n_clusters))
+        centers = [X[rng.choice(len(X), p=weights / weights.sum())]]
+        closest = ((X - centers[0]) ** 2).sum(axis=1)
+        for _ in range(1, self.n_clusters):
+            p = weights * closest
+            p = p / p.sum() if p.sum() > 0 else weights / weights.sum()
+            candidates = X[rng.choice(len(X), size=n_trials, p=p)]
+            candidates_closest = np.minimum(closest, self._distances(X, candidates).T)
+            best = (candidates_closest @ weights).argmin()
+            centers.append(candidates[best])
+            closest = candidates_closest[best]
+        return np.array(centers)
+
+    def _run(self, X, weights, centers, tol):
+        for i in range(1, self.max_iter + 1):
+            distances = self._distances(X, centers)
+            labels = distances.argmin(axis=1)
+            labels = self._fill_empty(labels, distances)
+            sums = np.stack([np.bincount(labels, weights=weights * x, minlength=self.n_clusters) for x in X.T], axis=1)
+            totals = np.bincount(labels, weights=weights, minlength=self.n_clusters)[:, None]
+            # center of cluster left empty stays in place
+            new_centers = np.divide(sums, totals, out=centers.copy(), where=totals > 0)
+            shift = ((new_centers - centers) ** 2).sum()
+            centers = new_centers
+            if shift <= tol:
+                break
+        distances = self._distances(X, centers)
+        labels = self._fill_empty(distances.argmin(axis=1), distances)
+        inertia = weights @ distances[np.arange(len(X)), labels]
+        return centers, labels, inertia, i
+
+    def _fill_empty(self, labels, distances):
+        # empty cluster takes the sample farthest from its center, equal samples are never split like in sklearn
+        counts = np.bincount(labels, minlength=self.n_clusters)
+        for cluster in np.flatnonzero(counts == 0):
+            own = distances[np.arange(len(labels)), labels]
+            own[np.bincount(labels, minlength=self.n_clusters)[labels] == 1] = -1
+            if own.max() <= 0:
+                break
+            labels[own.argmax()] = cluster
+        return labels
+
+    @staticmethod
+    def _distances(X, centers):
+        distances = (X ** 2).sum(axis=1)[:, None] - 2 * X @ centers.T + (centers ** 2).sum(axis=1)
+        return np.maximum(distances, 0)
+
+
+class UniqueColorsClustering(ClusterMixin, BaseEstimator):
+    """
+    Clustering of colors which fits the wrapped clustering only to unique colors weighted by their counts
+
+    Pixels of an image area mostly repeat a small number of colors, so fitting is much cheaper.
+    Labels are mapped back to all pixels.
+
+    With max_colors, colors are grouped on coarser and coarser grid until there are at most that many of them,
+    which bounds memory of clusterings quadratic in number of samples, like AgglomerativeClustering.
+    """
+
+    def __init__(self, clustering, step=None, max_colors=None):
+        """
+        Args:
+            clustering: sklearn clustering model which sets labels_ attribute, e.g. WeightedKMeans,
+                        sklearn.cluster.KMeans or sklearn.cluster.AgglomerativeClustering.
+                        Counts of colors are passed as sample_weight only if its fit() accepts it.
+            step: if given, colors are quantized to cells of this size before clustering
+            max_colors: if given, maximum number of colors the wrapped clustering is fitted to
+        """
+        super().__init__()
+        self.clustering = clustering
+        self.step = step
+        self.max_colors = max_colors
+
+    def fit(self, X, y=None):
+        X = np.asarray(X)
+        colors, counts, inverse = unique_colors(X, self.step, self.max_colors)
+        n_clusters = getattr(self.clustering, "n_clusters", 0)
+        if len(colors) < n_clusters <= len(X):
+            # too few unique colors to cluster them, but clustering all pixels is still possible
+            colors, counts, inverse = self._pixels(X)
+        self.clustering_ = clone(self.clustering)
+        if counts is not None and has_fit_parameter(self.clustering_, "sample_weight"):
+            self.clustering_.fit(colors, sample_weight=counts)
+        else:
+            self.clustering_.fit(colors)
+        self.labels_ = self.clustering_.labels_[inverse]
+        return self
+
+    def fit_predict(self, X, y=None):
+        return self.fit(X).labels_
+
+    def _pixels(self, X):
+        if self.max_colors is None or len(X) <= self.max_colors:
+            return X, None, np.arange(len(X))
+        # evenly spaced pixels including each unique color, every pixel takes label of a sampled one of its color
+        color_inverse = unique_colors(X)[2]
+        first = np.unique(color_inverse, return_index=True)[1]
+        spaced = np.linspace(0, len(X) - 1, max(self.max_colors - len(first), 0)).astype(np.int64)
+        sample = np.union1d(first, spaced)
+        representative = np.empty(len(first), dtype=np.int64)
+        representative[color_inverse[sample]] = np.arange(len(sample))
+        return X[sample], None, representative[color_inverse]
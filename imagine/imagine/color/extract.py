@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
 
-import hdmedians as hd
 import numpy as np
 from sklearn.base import clone
 
 from imagine.color import conversion
+from imagine.color.utils import unique_colors
 from imagine.functional import functional as f
 from imagine.helpers import normalization as norm
+from imagine.helpers.statistics import weighted_geometric_median
 
 
 class ColorExtractor(ABC):
@@ -22,12 +23,56 @@ class ColorExtractor(ABC):
         Returns:
             numpy array of shape (N, 3) with N extracted colors in RGB in [0-255] or empty array if mask is empty
         """
-        img = norm.ToUInt8()(img)
-        img = conversion.RgbToLab(img)
-        return self.extract_normalized(img, mask)
+        return self.extract_normalized(self.normalize(img), mask)
+
+    def extract_parts(self, img, masks):
+        """
+        Extract colors of many parts of the same image, which is converted to Lab only once
+
+        Args:
+            img - numpy array of shape (height, width, 3) in RGB with values either in [0-255] or [0.0-1.0]
+            masks - dictionary with part names and numpy arrays of shape (height, width) with their masks
+
+        Returns:
+            dictionary with part names and their colors, as returned by extract()
+        """
+        return self.extract_parts_normalized(self.normalize(img), masks)
+
+    def extract_labels(self, img, labels, codes):
+        """
+        Extract colors of many parts of the same image given as label map, see extract_parts()
+
+        Args:
+            img - numpy array of shape (height, width, 3) in RGB with values either in [0-255] or [0.0-1.0]
+            labels - numpy array of shape (height, width) with label of each pixel
+            codes - dictionary with part names and their labels
+
+        Returns:
+            dictionary with part names and their colors, as returned by extract()
+        """
+        return self.extract_parts(img, {part: labels == code for part, code in codes.items()})
+
+    @staticmethod
+    def normalize(img):
+        """Convert image from RGB to uint8 Lab in which extract_normalized() works"""
+        return conversion.RgbToLab(norm.ToUInt8()(img))
+
+    def extract_parts_normalized(self, img, masks):
+        """Same as extract_parts(), but works on image returned by normalize(), e.g. to reuse it for other crops"""
+        return {part: self.extract_normalized(img, mask) for part, mask in masks.items()}
 
     @abstractmethod
     def extract_normalized(self, img, mask):
+        """
+        Extract colors from pixels of image returned by normalize(), e.g. to reuse it for many masks
+
+        Args:
+            img - numpy array of shape (height, width, 3) in Lab in uint8
+            mask - numpy array of shape (height, width) with ones or Trues in pixels to process
+
+        Returns:
+            numpy array of shape (N, 3) with N extracted colors in RGB in [0-255] or empty array if mask is empty
+        """
         return NotImplemented
 
 
@@ -72,10 +117,27 @@ class MedianColorExtractor(PositionAgnosticExtractor):
 
 
 class GeometricMedianColorExtractor(PositionAgnosticExtractor):
-    """Color extractor based on medoid pixel color"""
+    """
+    Color extractor based on geometric median of pixel colors
+
+    Median is found among unique colors weighted by their counts, since many pixels share the same color.
+    """
+
+    def __init__(self, step=None, tol=1e-2, max_iter=100):
+        """
+        Args:
+            step: if given, colors are quantized to cells of this size before finding the median
+            tol: median is found when it moves less than this distance in an iteration
+            max_iter: maximum number of iterations
+        """
+        super().__init__()
+        self.step = step
+        self.tol = tol
+        self.max_iter = max_iter
 
     def extract_from_pixels(self, pixels):
-        return np.atleast_2d(hd.geomedian(pixels.astype(np.float64), axis=0))
+        colors, counts, _ = unique_colors(pixels, self.step)
+        return np.atleast_2d(weighted_geometric_median(colors, counts, self.tol, self.max_iter))
 
 
 class ClusteringColorExtractor(PositionAgnosticExtractor):
@@ -84,7 +146,8 @@ class ClusteringColorExtractor(PositionAgnosticExtractor):
     def __init__(self, clustering, ordering=lambda labels, pixels: list(range(max(labels) + 1))):
         """
         Args:
-            clustering: sklearn clustering model with fit() method and labels_ attribute
+            clustering: sklearn clustering model with fit() method and labels_ attribute.
+                        UniqueColorsClustering fits it much faster on repeated pixel colors.
         """
         super().__init__()
         self.clustering = clustering
@@ -17,6 +17,45 @@ def generate_distinct_colors(k):
     return np.atleast_2d(cv2.cvtColor(colors, cv2.COLOR_HSV2RGB).squeeze())
 
 
+def unique_colors(pixels, step=None, max_colors=None):
+    """
+    Group repeated colors
+
+    Args:
+        pixels: non-empty numpy array of shape (P, C) with colors
+        step: if given, colors are first quantized to cells of this size in each channel
+              and represented by mean color of their cell, otherwise only equal colors are grouped
+        max_colors: if given, step is doubled until there are at most that many colors
+
+    Returns:
+        tuple with numpy arrays of shapes (U, C) with unique colors, (U,) with their counts
+        and (P,) with index of unique color of each pixel
+    """
+    pixels = np.asarray(pixels)
+    colors, counts, inverse = _unique_colors(pixels, step)
+    while max_colors is not None and len(colors) > max_colors:
+        step = 2 if step is None else 2 * step
+        colors, counts, inverse = _unique_colors(pixels, step)
+    return colors, counts, inverse
+
+
+def _unique_colors(pixels, step):
+    cells = pixels if step is None else np.floor(pixels / step).astype(np.int64)
+    if np.issubdtype(cells.dtype, np.integer):
+        # grouping by single integer key is much faster than unique rows
+        offsets = cells.astype(np.int64) - cells.min(axis=0)
+        keys = np.ravel_multi_index(tuple(offsets.T), tuple(offsets.max(axis=0) + 1))
+        _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    else:
+        _, first, inverse, counts = np.unique(cells, axis=0, return_index=True, return_inverse=True,
+                                              return_counts=True)
+    inverse = inverse.reshape(-1)
+    colors = pixels[first]
+    if step is not None:
+        colors = np.stack([np.bincount(inverse, weights=channel) for channel in pixels.T], axis=1) / counts[:, None]
+    return colors, counts, inverse
+
+
 def recolor(img, mask, color, alpha):
     """
     Apply color on image
@@ -1,9 +1,83 @@
+import os
+import threading
 from abc import ABC, abstractmethod
 from collections import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import einops as ein
 import numpy as np
 
+_workers = 0
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+_pool_users = {}
+_in_pool = threading.local()
+
+
+def use_threads(workers):
+    """
+    Make operations which process samples of a batch one by one map them over shared thread pool
+
+    Helps with operations releasing GIL, like most OpenCV calls. Operations can override it with threaded attribute.
+
+    Args:
+        workers: number of threads in the pool, 0 turns threads off (the default), None uses number of CPUs.
+                 changing it replaces the pool, while batches already mapped over the old one finish there
+                 and it's shut down after the last of them.
+    """
+    global _workers
+    with _pool_lock:
+        _workers = (os.cpu_count() or 1) if workers is None else workers
+
+
+def threads():
+    """Returns number of threads set with use_threads()"""
+    return _workers
+
+
+@contextmanager
+def _borrowed_pool():
+    """Context manager giving the current pool, which isn't shut down until it's given back"""
+    pool = _acquire_pool()
+    try:
+        yield pool
+    finally:
+        _release_pool(pool)
+
+
+def _acquire_pool():
+    global _pool, _pool_size
+    size = _workers or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None or _pool_size != size:
+            if _pool is not None and _pool not in _pool_users:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="imagine")
+            _pool_size = size
+        _pool_users[_pool] = _pool_users.get(_pool, 0) + 1
+        return _pool
+
+
+def _release_pool(pool):
+    with _pool_lock:
+        _pool_users[pool] -= 1
+        if _pool_users[pool] == 0:
+            del _pool_users[pool]
+            # replaced pool is shut down only once batches mapped over it by other threads finish
+            if pool is not _pool:
+                pool.shutdown(wait=False)
+
+
+def _run_in_pool(f, *args, **kwargs):
+    # operations called from pool threads run their batches sequentially, so they never wait for the busy pool
+    _in_pool.active = True
+    try:
+        return f(*args, **kwargs)
+    finally:
+        _in_pool.active = False
+
 
 class BatchClassifier(ABC):
     @staticmethod
@@ -97,7 +171,15 @@ class SinglePositionalArgCallable(Callable, ABC):
 
 
 class BatchOperation(SinglePositionalArgCallable, ABC):
-    """Callable that detects if input is batch and adjust it for action needs"""
+    """
+    Callable that detects if input is batch and adjust it for action needs
+
+    Samples of batches given to actions which aren't batchable are mapped over shared thread pool
+    if it's turned on with use_threads() or threaded attribute.
+    """
+
+    threaded = None
+    """None follows use_threads(), True maps samples over thread pool even if it's off, False never does"""
 
     def __init__(self, batch_classifier=SimpleBatchClassifier()):
         """
@@ -110,7 +192,11 @@ class BatchOperation(SinglePositionalArgCallable, ABC):
     def __call__(self, x, **kwargs):
         if self.batch_classifier.is_batch(x) and not self.is_batchable():
             args = [dict([(k, v[i]) for k, v in kwargs.items()]) for i, _ in enumerate(x)]
-            results = [self.perform(i, **a) for i, a in zip(x, args)]
+            if self._use_threads(len(args)):
+                with _borrowed_pool() as pool:
+                    results = list(pool.map(lambda i, a: _run_in_pool(self.perform, i, **a), x, args))
+            else:
+                results = [self.perform(i, **a) for i, a in zip(x, args)]
             return self.stack(results)
         if not self.batch_classifier.is_batch(x) and self.is_batchable():
             x_expanded = self.expand(x)
@@ -118,6 +204,11 @@ class BatchOperation(SinglePositionalArgCallable, ABC):
             return self.squeeze(self.perform(x_expanded, **args_expended))
         return self.perform(x, **kwargs)
 
+    def _use_threads(self, n):
+        if n < 2 or getattr(_in_pool, "active", False):
+            return False
+        return self.threaded if self.threaded is not None else _workers > 0
+
     @staticmethod
     def is_batchable():
         """Override to mark your action as batchable"""
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def weighted_geometric_median(points, weights=None, tol=1e-2, max_iter=100, eps=1e-9):
+    """
+    Find point minimizing weighted sum of Euclidean distances to given points with Weiszfeld algorithm
+
+    Points equal to the current estimate are handled as in Vardi and Zhang modification,
+    so the estimate doesn't get stuck in them.
+
+    Args:
+        points: numpy array of shape (N, D)
+        weights: numpy array of shape (N,) with non-negative weights, e.g. counts of repeated points.
+                 if None all points have the same weight.
+        tol: iterations stop when estimate moves less than this distance
+        max_iter: maximum number of iterations
+        eps: distances smaller than this are considered zero
+
+    Returns:
+        numpy array of shape (D,) with the geometric median
+    """
+    points = np.asarray(points, dtype=np.float64)
+    weights = np.ones(len(points)) if weights is None else np.asarray(weights, dtype=np.float64)
+    median = weights @ points / weights.sum()
+    for _ in range(max_iter):
+        distances = np.linalg.norm(points - median, axis=1)
+        far = distances > eps
+        if not far.any():
+            break
+        inverse = weights[far] / distances[far]
+        estimate = inverse @ points[far] / inverse.sum()
+        coinciding = weights.sum() - weights[far].sum()
+        if coinciding > 0:
+            pull = np.linalg.norm(inverse @ (points[far] - median))
+            ratio = coinciding / pull if pull > 0 else 1.0
+            estimate = max(0.0, 1 - ratio) * estimate + min(1.0, ratio) * median
+        moved = np.linalg.norm(estimate - median)
+        median = estimate
+        if moved < tol:
+            break
+    return median
@@ -0,0 +1,155 @@
+import struct
+
+import cv2
+import numpy as np
+
+REDUCED_MODES = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# start of frame markers which hold image size, others with codes from 0xC0 to 0xCF are tables
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# markers without length field
+_JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xDA)) | {0x01}
+
+
+class ReducedImage(np.ndarray):
+    """
+    Image decoded in reduced resolution, which can be decoded again in higher resolution
+
+    Only the array created by decode() holds the encoded data, arrays derived from it (e.g. crops) don't.
+
+    Attributes:
+        encoded - numpy array of uint8 with the encoded image
+        reduction - factor by which the image was reduced
+        rgb - True if the image was decoded in RGB, False if in BGR
+    """
+
+    def __new__(cls, img, encoded, reduction, rgb):
+        obj = img.view(cls)
+        obj.encoded = encoded
+        obj.reduction = reduction
+        obj.rgb = rgb
+        return obj
+
+    def __array_finalize__(self, obj):
+        self.encoded = None
+        self.reduction = 1
+        self.rgb = True
+
+    def decode(self, reduction=1):
+        """Decode the image again with given reduction factor"""
+        return decode(self.encoded, reduction=reduction, rgb=self.rgb)
+
+
+def jpeg_size(data):
+    """
+    Read size of JPEG image from its header without decoding
+
+    Args:
+        data: bytes or numpy array of uint8 with encoded image
+
+    Returns:
+        tuple (width, height) or None if data isn't JPEG or its header can't be read
+    """
+    data = memoryview(data).cast("B")
+    if data[:2].tobytes() != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # fill byte
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9].tobytes())
+            return width, height
+        length, = struct.unpack(">H", data[i + 2:i + 4].tobytes())
+        i += 2 + length
+    return None
+
+
+def reduction_factor(size, min_size):
+    """
+    Returns the biggest supported reduction factor after which the shorter side is still at least min_size
+
+    Args:
+        size: tuple (width, height) of the image
+        min_size: minimum size in pixels of the shorter side after reduction
+    """
+    factor = 1
+    for candidate in sorted(REDUCED_MODES):
+        if min(size) // candidate >= min_size:
+            factor = candidate
+    return factor
+
+
+def decode(data, min_size=None, reduction=None, rgb=True):
+    """
+    Decode image, in reduced resolution if it is much bigger than needed
+
+    JPEG images are decoded directly in reduced resolution, which is faster and takes less memory than decoding
+    in full resolution and resizing. Other formats are always decoded in full resolution.
+    Conversion to RGB is done in place.
+
+    Args:
+        data: bytes or numpy array of uint8 with encoded image
+        min_size: minimum size in pixels of the shorter side of decoded image. if None image isn't reduced.
+        reduction: reduction factor (1, 2, 4 or 8) to use instead of choosing it with min_size
+        rgb: if True image is returned in RGB, otherwise in BGR like from OpenCV
+
+    Returns:
+        numpy array of shape (height, width, 3) with image data, ReducedImage if it was reduced
+
+    Raises:
+        ValueError: if data can't be decoded
+    """
+    encoded = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if reduction is None:
+        size = jpeg_size(encoded) if min_size is not None else None
+        reduction = reduction_factor(size, min_size) if size is not None else 1
+    img = cv2.imdecode(encoded, REDUCED_MODES[reduction])
+    if img is None:
+        raise ValueError("Can't decode image")
+    if rgb:
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    return ReducedImage(img, encoded, reduction, rgb) if reduction > 1 else img
+
+
+def read(path, min_size=None, rgb=True):
+    """Read and decode image file, see decode()"""
+    with open(path, "rb") as f:
+        return decode(f.read(), min_size=min_size, rgb=rgb)
+
+
+def enough_resolution(img, rect, min_size):
+    """
+    Make sure that area of the image has at least given size, decoding the image again in higher resolution if needed
+
+    Args:
+        img: numpy array of shape (height, width, channels), possibly ReducedImage
+        rect: Rect with the area in img coordinates
+        min_size: minimum size in pixels of the longer side of the area
+
+    Returns:
+        tuple with the image and Rect with the area in its coordinates.
+        They are the given ones if the area is big enough or img isn't ReducedImage.
+    """
+    if not isinstance(img, ReducedImage) or img.encoded is None or max(rect.width(), rect.height()) >= min_size:
+        return img, rect
+    reduction = img.reduction
+    while reduction > 1 and max(rect.width(), rect.height()) * img.reduction / reduction < min_size:
+        reduction //= 2
+    scale = img.reduction / reduction
+    return img.decode(reduction), rect.scale(scale, origin=(0, 0))
@@ -1,4 +1,3 @@
-import dlib
 import numpy as np
 
 
@@ -43,6 +42,7 @@ class Rect:
 
     def to_dlib(self):
         """Convert Rect to dlib.rectangle"""
+        import dlib
         return dlib.rectangle(self.left, self.top, self.right - 1, self.bottom - 1)
 
     def to_cv(self):
@@ -74,6 +74,19 @@ class Rect:
                       int(new_bounds[3] + origin[0]))
         return Rect(t, b, l, r)
 
+    def translate(self, x, y):
+        """
+        Move Rect
+
+        Args:
+            x: horizontal offset
+            y: vertical offset
+
+        Returns:
+            Moved Rect
+        """
+        return Rect(self.top + y, self.bottom + y, self.left + x, self.right + x)
+
     def __eq__(self, o):
         if isinstance(o, Rect):
             return self.top == o.top and self.bottom == o.bottom and self.left == o.left and self.right == o.right
@@ -26,20 +26,30 @@ def biggest_contour(binary_mask):
     return np.atleast_2d(max(contours, key=cv2.contourArea).squeeze())
 
 
-def fill_contour(contour, shape):
+def fill_contour(contour, shape, dst=None):
     """
     Creates mask of given shape with Trues inside contour
 
+    Only the bounding rect of the contour is filled, so cost depends on the contour size, not on the image size.
+
     Args:
         contour: numpy array of shape (N, 2) with points representing the contour
         shape: (height, width)
+        dst: numpy array of shape (height, width) of bool type in which contour area is set to True.
+             Other pixels are left unchanged. if None new mask is created.
 
     Returns:
         numpy array of shape (height, width) with True in contour area
     """
-    mask = np.zeros(shape[:2], np.uint8)
-    filled = cv2.fillPoly(mask, [contour], 1) if contour is not None and contour.size > 0 else mask
-    return filled > 0
+    mask = np.zeros(shape[:2], dtype=bool) if dst is None else dst
+    rect = bounding_rect(contour)
+    if rect is None:
+        return mask
+    rect = pad_rect(rect, 0, shape)
+    filled = np.zeros((rect.height(), rect.width()), np.uint8)
+    cv2.fillPoly(filled, [contour], 1, offset=(-rect.left, -rect.top))
+    crop(mask, rect)[filled > 0] = True
+    return mask
 
 
 def mass_center(contour):
@@ -84,7 +94,7 @@ def crop(img, rect):
     return img[rect.top:rect.bottom, rect.left:rect.right]
 
 
-def erode(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
+def erode(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0, roi=None, dst=None):
     """
     Perform erosion - "shrinking" of object area in an image
 
@@ -95,20 +105,17 @@ def erode(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
         kernel: erosion kernel (width, height) or single value
         shape: opencv morph mode
         bg: value beside the edges of image
+        roi: Rect outside of which all pixels have bg value. if given, only roi padded by kernel size is processed.
+        dst: numpy array of the same shape and type as img to write the result to. With roi only the padded roi
+             is written, so other pixels should already have bg value.
 
     Returns:
         numpy array of the same shape as img with eroded image
     """
-    org_shape = img.shape
-    if img.ndim == 2:
-        img = f.Rearrange("h w -> h w 1")(img)
-    if not isinstance(kernel, tuple):
-        kernel = (kernel, kernel)
-    element = cv2.getStructuringElement(shape, kernel)
-    return cv2.erode(img, element, borderValue=bg).reshape(org_shape)
+    return _morphology(cv2.erode, img, kernel, shape, bg, roi, dst)
 
 
-def dilate(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
+def dilate(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0, roi=None, dst=None):
     """
     Perform dilation - "growing" of object area in an image
 
@@ -119,17 +126,110 @@ def dilate(img, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
         kernel: dilation kernel (width, height) or single value
         shape: opencv morph mode
         bg: value beside the edges of image
+        roi: Rect outside of which all pixels have bg value. if given, only roi padded by kernel size is processed,
+             so cost depends on the object size, not on the image size.
+        dst: numpy array of the same shape and type as img to write the result to. With roi only the padded roi
+             is written, so other pixels should already have bg value.
 
     Returns:
         numpy array of the same shape as img with dilated image
     """
-    org_shape = img.shape
-    if img.ndim == 2:
-        img = f.Rearrange("h w -> h w 1")(img)
+    return _morphology(cv2.dilate, img, kernel, shape, bg, roi, dst)
+
+
+def _morphology(operation, img, kernel, shape, bg, roi, dst):
     if not isinstance(kernel, tuple):
         kernel = (kernel, kernel)
     element = cv2.getStructuringElement(shape, kernel)
-    return cv2.dilate(img, element, borderValue=bg).reshape(org_shape)
+    if roi is None:
+        org_shape = img.shape
+        if img.ndim == 2:
+            img = f.Rearrange("h w -> h w 1")(img)
+        return operation(img, element, dst=dst, borderValue=bg).reshape(org_shape)
+    if dst is None:
+        dst = np.full_like(img, bg)
+    area = pad_rect(roi, (kernel[0] // 2, kernel[1] // 2), img.shape)
+    if area.width() <= 0 or area.height() <= 0:
+        return dst
+    src, out = crop(img, area), crop(dst, area)
+    if src.ndim == 3 and src.shape[2] == 1:
+        src, out = src[..., 0], out[..., 0]
+    # opencv writes directly into the view of dst
+    operation(src, element, dst=out, borderValue=bg)
+    return dst
+
+
+def distance_transform(mask, roi=None, max_distance=None):
+    """
+    Calculate Euclidean distance of each pixel to the nearest object pixel
+
+    Cost doesn't depend on the distances, unlike dilation with big kernels.
+
+    Args:
+        mask: numpy array of shape (height, width) with values greater than zero as object pixels
+        roi: Rect outside of which there are no object pixels. if given with max_distance, distances are calculated
+             only in roi padded by max_distance.
+        max_distance: maximum distance needed by the caller
+
+    Returns:
+        numpy array of shape (height, width) of float32 type with distances, inf in pixels which weren't processed
+    """
+    if roi is None or max_distance is None:
+        area = Rect(0, mask.shape[0], 0, mask.shape[1])
+    else:
+        area = pad_rect(roi, int(np.ceil(max_distance)) + 1, mask.shape)
+    distances = np.full(mask.shape[:2], np.inf, dtype=np.float32)
+    if area.width() <= 0 or area.height() <= 0:
+        return distances
+    background = (crop(mask, area) == 0).view(np.uint8)
+    if background.all():
+        return distances
+    cv2.distanceTransform(background, cv2.DIST_L2, cv2.DIST_MASK_PRECISE, dst=crop(distances, area))
+    return distances
+
+
+def ring(mask, outer, inner=None, roi=None):
+    """
+    Make mask of pixels at most outer and more than inner distance away from object
+
+    Args:
+        mask: numpy array of shape (height, width) with values greater than zero as object pixels
+        outer: maximum distance from the object
+        inner: distance from the object up to which pixels are excluded. if None the object itself is excluded,
+               use negative value to include it.
+        roi: Rect outside of which there are no object pixels. if given, only its surroundings are processed.
+
+    Returns:
+        numpy array of shape (height, width) with True in ring area
+    """
+    distances = distance_transform(mask, roi, outer)
+    inner = 0 if inner is None else inner
+    return (distances <= outer) & (distances > inner)
+
+
+def dilation_radius(kernel):
+    """
+    Returns distance at which pixels are reached by dilation with elliptical kernel of given size
+
+    Args:
+        kernel: kernel size in pixels, as passed to dilate()
+    """
+    return kernel / 2 if kernel % 2 == 0 else (kernel - 1) / 2 + 0.1
+
+
+def pad_rect(rect, padding, img_dim):
+    """
+    Extend Rect on each side and clip it to image bounds
+
+    Args:
+        rect: Rect to extend
+        padding: tuple (x, y) with padding in pixels or single value
+        img_dim: tuple with image shape (height, width, ...)
+    """
+    if not isinstance(padding, tuple):
+        padding = (padding, padding)
+    return Rect(max(rect.top - padding[1], 0), min(rect.bottom + padding[1], img_dim[0]),
+                max(rect.left - padding[0], 0), min(rect.right + padding[0], img_dim[1]))
 
 
 def squarisize(rect):
@@ -229,7 +329,7 @@ class Crop(ImageOperation):
 
 
 class Erode(ImageOperation):
-    """Perform erosion - "shrinking" of object area in an image"""
+    """Perform erosion - "shrinking" of object area in an image. Pass roi at call time to process only its area."""
 
     def __init__(self, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
         """
@@ -244,12 +344,12 @@ class Erode(ImageOperation):
         self.shape = shape
         self.bg = bg
 
-    def perform(self, img, **kwargs):
-        return erode(img, self.kernel, self.shape, self.bg)
+    def perform(self, img, roi=None, **kwargs):
+        return erode(img, self.kernel, self.shape, self.bg, roi=roi)
 
 
 class Dilate(ImageOperation):
-    """Perform dilation - "growing" of object area in an image"""
+    """Perform dilation - "growing" of object area in an image. Pass roi at call time to process only its area."""
 
     def __init__(self, kernel, shape=cv2.MORPH_ELLIPSE, bg=0):
         """
@@ -264,8 +364,29 @@ class Dilate(ImageOperation):
         self.shape = shape
         self.bg = bg
 
-    def perform(self, img, **kwargs):
-        return dilate(img, self.kernel, self.shape, self.bg)
+    def perform(self, img, roi=None, **kwargs):
+        return dilate(img, self.kernel, self.shape, self.bg, roi=roi)
+
+
+class Ring(ImageOperation):
+    """
+    Make mask of pixels within distance range from object, e.g. to replace difference of two dilations.
+    Pass roi at call time to process only its surroundings.
+    """
+
+    def __init__(self, outer, inner=None):
+        """
+        Args:
+            outer: maximum distance from the object
+            inner: distance from the object up to which pixels are excluded. if None the object itself is excluded.
+        """
+
+        super().__init__()
+        self.outer = outer
+        self.inner = inner
+
+    def perform(self, img, roi=None, **kwargs):
+        return ring(img, self.outer, self.inner, roi=roi)
 
 
 class Resize(ImageOperation):
@@ -1,9 +1,108 @@
 from abc import ABC
 
+import cv2
 import numpy as np
 from sklearn.base import clone
 
 from imagine.functional.functional import ImageOperation, Batchable
+from imagine.shape import operations
+from imagine.shape.figures import Rect
+
+
+class SegmentationMap(np.ndarray):
+    """
+    Segmented image with codes of parts in pixels, which caches masks and statistics of parts
+
+    It is a numpy array, so it can be used as one, e.g. compared with codes.
+    Masks, pixel counts and connected components of parts are computed once and shared by all users of the map,
+    so the map must not be modified. Methods work on single images, maps of batches can be iterated over.
+    Results of computations on the map are plain numpy arrays.
+    """
+
+    def __new__(cls, labels):
+        return np.asarray(labels).view(cls)
+
+    def __array_finalize__(self, obj):
+        self._cache = {}
+
+    def __array_wrap__(self, obj, context=None, return_scalar=False):
+        # only views of the map are maps, their cache isn't valid for computed arrays
+        obj = obj.view(np.ndarray)
+        return obj[()] if obj.ndim == 0 else obj
+
+    @staticmethod
+    def of(labels):
+        """Returns labels if they are already SegmentationMap, otherwise wraps them"""
+        return labels if isinstance(labels, SegmentationMap) else SegmentationMap(labels)
+
+    def mask(self, code):
+        """
+        Returns SegmentationMap of shape (height, width) with True in pixels of part with given code
+
+        Masks are maps too, so statistics of a mask computed by one user are cached for all of them.
+        Its part has code 1.
+        """
+        return self._cached(("mask", code), lambda: SegmentationMap(np.equal(self.view(np.ndarray), code)))
+
+    def count(self, code):
+        """Returns number of pixels of part with given code"""
+        if self.dtype == np.bool_ or self.dtype == np.uint8:
+            counts = self._cached("counts", lambda: np.bincount(self.view(np.uint8).ravel(), minlength=256))
+            return int(counts[code]) if 0 <= code < len(counts) else 0
+        return int(self._cached(("count", code), lambda: np.count_nonzero(self.mask(code))))
+
+    def components(self, code):
+        """
+        Find 8-connected components of part with given code
+
+        Returns:
+            tuple with numpy arrays of shape (height, width) with index of component in pixels (0 outside of the part)
+            and of shape (components + 1, 5) with left, top, width, height and area of each component,
+            at index 0 for the rest of image
+        """
+        def compute():
+            mask = self.mask(code).view(np.ndarray).view(np.uint8)
+            _, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            return labels, stats
+        return self._cached(("components", code), compute)
+
+    def biggest_component(self, code):
+        """Returns index of the biggest component of part with given code or None if the part is empty"""
+        _, stats = self.components(code)
+        if len(stats) <= 1:
+            return None
+        return 1 + int(stats[1:, cv2.CC_STAT_AREA].argmax())
+
+    def component_area(self, code, component=None):
+        """Returns number of pixels of component (the biggest one if None) of part with given code"""
+        component = self.biggest_component(code) if component is None else component
+        return 0 if component is None else int(self.components(code)[1][component, cv2.CC_STAT_AREA])
+
+    def component_mask(self, code, component=None):
+        """Returns mask of component (the biggest one if None) of part with given code"""
+        component = self.biggest_component(code) if component is None else component
+        if component is None:
+            return np.zeros(self.shape[:2], dtype=bool)
+
+        def compute():
+            # only bounding rect of the component is compared
+            rect = self.bounding_rect(code, component)
+            mask = np.zeros(self.shape[:2], dtype=bool)
+            operations.crop(mask, rect)[...] = operations.crop(self.components(code)[0], rect) == component
+            return mask
+        return self._cached(("component_mask", code, component), compute)
+
+    def bounding_rect(self, code, component=None):
+        """Returns Rect bounding component (the biggest one if None) of part with given code or None if it's empty"""
+        component = self.biggest_component(code) if component is None else component
+        if component is None:
+            return None
+        return Rect.from_cv(self.components(code)[1][component, :4])
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
 
 
 class Segmenter(ImageOperation, ABC):
@@ -30,18 +129,27 @@ class Segmenter(ImageOperation, ABC):
             imgs: numpy array of shape ([N], height, width, 3) with values adjusted for segmenting action
 
         Returns:
-            numpy array of shape ([N], height, width, 1)
+            SegmentationMap of shape ([N], height, width)
         """
         parsed = super().__call__(imgs, **kwargs)
         if self.parts_map:
-            return self._remap(parsed, self.parts_map, self.bg_code)
-        return parsed
+            parsed = self._remap(parsed, self.parts_map, self.bg_code)
+        return SegmentationMap(parsed)
 
     def _remap(self, parsed, new_parts_map, bg_code):
-        remapped = np.full(parsed.shape, bg_code)
+        codes = list(new_parts_map.values()) + [bg_code]
+        dtype = np.uint8 if 0 <= min(codes) and max(codes) <= 255 else np.int64
+        org_codes = [self.org_parts_map[p] for p in new_parts_map]
+        if parsed.size == 0 or parsed.min() < 0 or min(org_codes) < 0:
+            remapped = np.full(parsed.shape, bg_code, dtype=dtype)
+            for p in new_parts_map:
+                remapped[parsed == self.org_parts_map[p]] = new_parts_map[p]
+            return remapped
+        # one lookup in table of new codes instead of comparison with each part
+        table = np.full(max(parsed.max(), max(org_codes)) + 1, bg_code, dtype=dtype)
         for p in new_parts_map:
-            remapped[parsed == self.org_parts_map[p]] = new_parts_map[p]
-        return remapped
+            table[self.org_parts_map[p]] = new_parts_map[p]
+        return table[parsed]
 
 
 class ParsingSegmenter(Batchable, Segmenter):
@@ -69,7 +177,8 @@ class ClusteringSegmenter(Segmenter):
                  bg_code=0):
         """
         Args:
-            clustering: sklearn clustering algorithm with fit_predict() method
+            clustering: sklearn clustering algorithm with fit_predict() method.
+                        imagine.color.clustering.UniqueColorsClustering fits it much faster on repeated colors.
             ordering: Function of number of clusters, labels given to pixels and pixel values that should return iterable
                       with labels order. Defaults to numerical ordering.
         """
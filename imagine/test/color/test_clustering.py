@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+from sklearn.cluster import AgglomerativeClustering, KMeans
+
+from imagine.color import clustering
+
+
+class WeightedKMeansTestCase(unittest.TestCase):
+
+    def test_fit_finds_separated_clusters(self):
+        rng = np.random.default_rng(0)
+        centers = np.array([[0, 0, 0], [100, 100, 100], [200, 0, 100]])
+        points = np.concatenate([c + rng.normal(size=(50, 3)) for c in centers])
+        labels = clustering.WeightedKMeans(3).fit_predict(points)
+        for i in range(3):
+            self.assertEqual(len(set(labels[50 * i:50 * (i + 1)])), 1)
+        self.assertEqual(len(set(labels)), 3)
+
+    def test_fit_with_weights_equals_fit_on_repeated_points(self):
+        points = np.array([[0, 0], [1, 0], [10, 10], [11, 10], [30, 0]], dtype=np.float64)
+        weights = np.array([5, 1, 1, 3, 2])
+        weighted = clustering.WeightedKMeans(2).fit(points, sample_weight=weights)
+        repeated = clustering.WeightedKMeans(2).fit(np.repeat(points, weights, axis=0))
+        self.assertTrue(np.allclose(np.sort(weighted.cluster_centers_, axis=0),
+                                    np.sort(repeated.cluster_centers_, axis=0)))
+        self.assertAlmostEqual(weighted.inertia_, repeated.inertia_)
+
+    def test_fit_is_reproducible(self):
+        points = np.random.rand(200, 3)
+        first = clustering.WeightedKMeans(5).fit_predict(points)
+        second = clustering.WeightedKMeans(5).fit_predict(points)
+        self.assertTrue((first == second).all())
+
+    def test_fit_leaves_no_cluster_empty(self):
+        points = np.array([[0, 0], [0, 0], [0, 1], [1, 1]], dtype=np.float64)
+        labels = clustering.WeightedKMeans(3).fit_predict(points)
+        self.assertEqual(set(labels), {0, 1, 2})
+
+    def test_fit_doesnt_split_equal_samples(self):
+        points = np.array([[0, 0], [0, 0], [0, 0], [1, 1]], dtype=np.float64)
+        labels = clustering.WeightedKMeans(3).fit_predict(points)
+        self.assertEqual(list(labels), [0, 0, 0, 1])
+
+    def test_fit_raises_value_error_when_there_are_less_samples_than_clusters(self):
+        with self.assertRaises(ValueError):
+            clustering.WeightedKMeans(3).fit(np.zeros((2, 3)))
+
+
+class UniqueColorsClusteringTestCase(unittest.TestCase):
+
+    def test_labels_are_mapped_back_to_all_pixels(self):
+        pixels = np.array([[0, 0, 0], [200, 200, 200], [0, 0, 0], [200, 200, 200], [0, 0, 1]], dtype=np.uint8)
+        labels = clustering.UniqueColorsClustering(clustering.WeightedKMeans(2)).fit_predict(pixels)
+        self.assertEqual(labels.shape, (5,))
+        self.assertEqual(labels[0], labels[2])
+        self.assertEqual(labels[0], labels[4])
+        self.assertEqual(labels[1], labels[3])
+        self.assertNotEqual(labels[0], labels[1])
+
+    def test_works_with_sklearn_kmeans(self):
+        pixels = np.random.randint(0, 4, (100, 3)).astype(np.uint8)
+        labels = clustering.UniqueColorsClustering(KMeans(3, n_init=1)).fit_predict(pixels)
+        self.assertEqual(labels.shape, (100,))
+        self.assertEqual(len(set(labels)), 3)
+
+    def test_clusters_all_pixels_when_there_are_less_unique_colors_than_clusters(self):
+        pixels = np.array([[5, 5, 5]] * 10 + [[9, 9, 9]], dtype=np.uint8)
+        labels = clustering.UniqueColorsClustering(clustering.WeightedKMeans(3)).fit_predict(pixels)
+        self.assertEqual(labels.shape, (11,))
+
+    def test_works_with_clustering_without_sample_weight(self):
+        pixels = np.array([[0, 0, 0]] * 5 + [[200, 200, 200]] * 3 + [[0, 0, 1]], dtype=np.uint8)
+        labels = clustering.UniqueColorsClustering(AgglomerativeClustering(2)).fit_predict(pixels)
+        self.assertEqual(len(set(labels[:5]) | set(labels[8:])), 1)
+        self.assertNotEqual(labels[0], labels[5])
+
+    def test_max_colors_bounds_number_of_samples_of_wrapped_clustering(self):
+        pixels = np.random.default_rng(0).integers(0, 256, (5000, 3)).astype(np.uint8)
+        fitted = clustering.UniqueColorsClustering(AgglomerativeClustering(6, linkage='average'),
+                                                   max_colors=300).fit(pixels)
+        self.assertLessEqual(len(fitted.clustering_.labels_), 300)
+        self.assertEqual(fitted.labels_.shape, (5000,))
+
+    def test_max_colors_bounds_number_of_samples_when_there_are_less_unique_colors_than_clusters(self):
+        pixels = np.array([[5, 5, 5]] * 1000 + [[9, 9, 9]] * 10, dtype=np.uint8)
+        fitted = clustering.UniqueColorsClustering(clustering.WeightedKMeans(3), max_colors=50).fit(pixels)
+        self.assertLessEqual(len(fitted.clustering_.labels_), 50)
+        self.assertEqual(len(set(fitted.labels_[:1000])), 1)
+        self.assertNotEqual(fitted.labels_[0], fitted.labels_[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
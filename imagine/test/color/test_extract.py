@@ -73,6 +73,34 @@ class MedianColorExtractorTestCase(unittest.TestCase):
         self.assertEqual(self.extractor.extract(img, mask).shape, (0, 3))
 
 
+class ColorExtractorPartsTestCase(unittest.TestCase):
+    extractor = extract.MedianColorExtractor()
+    img = np.array([[[255, 0, 0], [250, 0, 0], [0, 0, 255]],
+                    [[0, 255, 0], [0, 250, 0], [0, 0, 250]]], dtype=np.uint8)
+    labels = np.array([[1, 1, 3],
+                       [2, 2, 3]])
+
+    def test_extract_parts_returns_same_colors_as_extract(self):
+        masks = {"red": self.labels == 1, "green": self.labels == 2, "none": self.labels == 4}
+        colors = self.extractor.extract_parts(self.img, masks)
+        self.assertEqual(set(colors), set(masks))
+        for part, mask in masks.items():
+            self.assertTrue((colors[part] == self.extractor.extract(self.img, mask)).all())
+
+    def test_extract_labels_returns_same_colors_as_extract_parts(self):
+        codes = {"red": 1, "green": 2, "blue": 3}
+        colors = self.extractor.extract_labels(self.img, self.labels, codes)
+        expected = self.extractor.extract_parts(self.img, {part: self.labels == code for part, code in codes.items()})
+        for part in codes:
+            self.assertTrue((colors[part] == expected[part]).all())
+
+    def test_extract_parts_normalized_works_on_crops_of_normalized_image(self):
+        lab = self.extractor.normalize(self.img)
+        mask = self.labels[:, 1:] == 3
+        colors = self.extractor.extract_parts_normalized(lab[:, 1:], {"blue": mask})
+        self.assertTrue((colors["blue"] == self.extractor.extract(self.img[:, 1:], mask)).all())
+
+
 class GeometricMedianColorExtractorTestCase(unittest.TestCase):
     extractor = extract.GeometricMedianColorExtractor()
 
@@ -44,6 +44,47 @@ class RecolorTestCase(unittest.TestCase):
         self.assertEqual(recolored.shape, img.shape)
 
 
+class UniqueColorsTestCase(unittest.TestCase):
+
+    def test_unique_colors_groups_equal_colors(self):
+        pixels = np.array([[1, 2, 3], [4, 5, 6], [1, 2, 3]], dtype=np.uint8)
+        colors, counts, inverse = utils.unique_colors(pixels)
+        self.assertEqual(len(colors), 2)
+        self.assertEqual(sorted(counts.tolist()), [1, 2])
+        self.assertTrue((colors[inverse] == pixels).all())
+
+    def test_unique_colors_works_with_full_uint8_range(self):
+        pixels = np.array([[0, 0, 0], [255, 255, 255], [0, 0, 0]], dtype=np.uint8)
+        colors, counts, _ = utils.unique_colors(pixels)
+        self.assertEqual(counts.sum(), 3)
+        self.assertEqual(len(colors), 2)
+
+    def test_unique_colors_works_with_float_colors(self):
+        pixels = np.array([[0.5, 0.1, 0.2], [0.5, 0.1, 0.2], [0.3, 0.1, 0.2]])
+        colors, counts, inverse = utils.unique_colors(pixels)
+        self.assertTrue((colors[inverse] == pixels).all())
+        self.assertEqual(sorted(counts.tolist()), [1, 2])
+
+    def test_unique_colors_with_step_returns_mean_color_of_cells(self):
+        pixels = np.array([[10, 10, 10], [11, 11, 11], [20, 20, 20]], dtype=np.uint8)
+        colors, counts, inverse = utils.unique_colors(pixels, step=4)
+        self.assertEqual(len(colors), 2)
+        self.assertTrue(np.allclose(colors[inverse[0]], [10.5, 10.5, 10.5]))
+        self.assertEqual(counts[inverse[2]], 1)
+
+    def test_unique_colors_with_max_colors_groups_colors_on_coarser_grid(self):
+        pixels = np.random.default_rng(0).integers(0, 256, (5000, 3)).astype(np.uint8)
+        colors, counts, inverse = utils.unique_colors(pixels, max_colors=100)
+        self.assertLessEqual(len(colors), 100)
+        self.assertEqual(counts.sum(), len(pixels))
+        self.assertEqual(inverse.shape, (len(pixels),))
+
+    def test_unique_colors_with_max_colors_keeps_colors_when_there_are_few_of_them(self):
+        pixels = np.array([[0, 0, 0], [1, 1, 1], [0, 0, 0]], dtype=np.uint8)
+        colors, _, _ = utils.unique_colors(pixels, max_colors=2)
+        self.assertTrue((colors == pixels[:2]).all())
+
+
 class GenerationTestCase(unittest.TestCase):
 
     def test_generate_distinct_colors_returns_given_number_of_colors(self):
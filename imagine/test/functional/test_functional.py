@@ -1,3 +1,4 @@
+import threading
 import unittest
 
 import numpy as np
@@ -51,6 +52,76 @@ class ImageOperationTestCase(unittest.TestCase):
         self.assertTrue(constant in result)
 
 
+class ThreadsTestCase(unittest.TestCase):
+
+    class Thread(f.ImageOperation):
+        def perform(self, img, val=None, **kwargs):
+            return threading.current_thread().name, val
+
+    class Value(f.ImageOperation):
+        def perform(self, img, val=None, **kwargs):
+            return img.sum() + val
+
+    class Nested(f.ImageOperation):
+        def perform(self, img, **kwargs):
+            return ThreadsTestCase.Thread()(np.stack([img, img]))
+
+    def tearDown(self):
+        f.use_threads(0)
+
+    def test_operation_runs_in_caller_thread_by_default(self):
+        imgs = np.zeros((4, 3, 3, 3))
+        names = [name for name, _ in self.Thread()(imgs)]
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+    def test_operation_runs_in_pool_with_threads_turned_on(self):
+        f.use_threads(2)
+        self.assertEqual(f.threads(), 2)
+        imgs = np.zeros((4, 3, 3, 3))
+        names = [name for name, _ in self.Thread()(imgs)]
+        self.assertTrue(all(name.startswith("imagine") for name in names))
+
+    def test_operation_keeps_order_and_args_in_pool(self):
+        f.use_threads(3)
+        imgs = np.stack([np.full((3, 3, 3), i) for i in range(20)])
+        results = self.Value()(imgs, val=list(range(20)))
+        self.assertEqual(list(results), [28 * i for i in range(20)])
+
+    def test_threaded_attribute_overrides_use_threads(self):
+        imgs = np.zeros((4, 3, 3, 3))
+        op = self.Thread()
+        op.threaded = True
+        self.assertTrue(all(name.startswith("imagine") for name, _ in op(imgs)))
+        f.use_threads(2)
+        op.threaded = False
+        self.assertEqual({name for name, _ in op(imgs)}, {threading.current_thread().name})
+
+    def test_pool_replaced_by_resizing_is_shut_down_after_its_last_user(self):
+        f.use_threads(2)
+        with f._borrowed_pool() as old:
+            f.use_threads(3)
+            with f._borrowed_pool() as new:
+                self.assertIsNot(new, old)
+            self.assertEqual(old.submit(lambda: 1).result(), 1)
+        self.assertRaises(RuntimeError, old.submit, lambda: 1)
+        self.assertEqual(new.submit(lambda: 1).result(), 1)
+
+    def test_idle_pool_is_shut_down_when_replaced(self):
+        f.use_threads(2)
+        with f._borrowed_pool() as old:
+            pass
+        f.use_threads(3)
+        with f._borrowed_pool():
+            pass
+        self.assertRaises(RuntimeError, old.submit, lambda: 1)
+
+    def test_operation_called_in_pool_runs_sequentially(self):
+        f.use_threads(1)
+        results = self.Nested()(np.zeros((2, 3, 3, 3)))
+        for nested in results:
+            self.assertEqual(len({name for name, _ in nested}), 1)
+
+
 class IdentityTestCase(unittest.TestCase):
 
     identity = f.Identity()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from imagine.helpers import statistics
+
+
+class WeightedGeometricMedianTestCase(unittest.TestCase):
+
+    def test_weighted_geometric_median_returns_correct_shape(self):
+        points = np.random.rand(10, 3)
+        self.assertEqual(statistics.weighted_geometric_median(points).shape, (3,))
+
+    def test_weighted_geometric_median_returns_single_point(self):
+        points = np.array([[1.0, 2.0, 3.0]])
+        self.assertTrue(np.allclose(statistics.weighted_geometric_median(points), points[0]))
+
+    def test_weighted_geometric_median_returns_majority_point(self):
+        points = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+        median = statistics.weighted_geometric_median(points, weights=np.array([3, 1, 1]))
+        self.assertTrue(np.allclose(median, [0.0, 0.0], atol=1e-2))
+
+    def test_weighted_geometric_median_with_weights_equals_median_of_repeated_points(self):
+        rng = np.random.default_rng(0)
+        points = rng.integers(0, 256, (20, 3))
+        weights = rng.integers(1, 10, 20)
+        weighted = statistics.weighted_geometric_median(points, weights, tol=1e-6)
+        repeated = statistics.weighted_geometric_median(np.repeat(points, weights, axis=0), tol=1e-6)
+        self.assertTrue(np.allclose(weighted, repeated, atol=1e-3))
+
+    def test_weighted_geometric_median_minimizes_sum_of_distances(self):
+        rng = np.random.default_rng(1)
+        points = rng.normal(size=(100, 3))
+        median = statistics.weighted_geometric_median(points, tol=1e-6)
+        cost = np.linalg.norm(points - median, axis=1).sum()
+        for shift in 1e-2 * np.eye(3):
+            self.assertLessEqual(cost, np.linalg.norm(points - median - shift, axis=1).sum())
+            self.assertLessEqual(cost, np.linalg.norm(points - median + shift, axis=1).sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
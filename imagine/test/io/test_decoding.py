@@ -0,0 +1,70 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from imagine.io import decoding
+from imagine.shape.figures import Rect
+
+
+def encode(img, ext=".jpg"):
+    return cv2.imencode(ext, img)[1].tobytes()
+
+
+class DecodingTestCase(unittest.TestCase):
+    img = cv2.GaussianBlur(np.random.randint(0, 256, size=(600, 800, 3), dtype=np.uint8), (9, 9), 0)
+
+    def test_jpeg_size_is_read_from_header(self):
+        self.assertEqual(decoding.jpeg_size(encode(self.img)), (800, 600))
+
+    def test_jpeg_size_is_none_for_other_formats(self):
+        self.assertIsNone(decoding.jpeg_size(encode(self.img, ".png")))
+
+    def test_reduction_factor_keeps_shorter_side_at_least_min_size(self):
+        self.assertEqual(decoding.reduction_factor((800, 600), 100), 4)
+        self.assertEqual(decoding.reduction_factor((800, 600), 600), 1)
+        self.assertEqual(decoding.reduction_factor((8000, 6000), 10), 8)
+
+    def test_decode_returns_rgb_image_in_full_resolution(self):
+        data = encode(self.img, ".png")
+        decoded = decoding.decode(data)
+        self.assertTrue((decoded == cv2.cvtColor(self.img, cv2.COLOR_BGR2RGB)).all())
+
+    def test_decode_returns_bgr_image_when_rgb_is_not_requested(self):
+        data = encode(self.img, ".png")
+        self.assertTrue((decoding.decode(data, rgb=False) == self.img).all())
+
+    def test_decode_reduces_big_jpeg_image(self):
+        decoded = decoding.decode(encode(self.img), min_size=100)
+        self.assertIsInstance(decoded, decoding.ReducedImage)
+        self.assertEqual(decoded.shape, (150, 200, 3))
+        self.assertEqual(decoded.reduction, 4)
+
+    def test_decode_does_not_reduce_other_formats(self):
+        decoded = decoding.decode(encode(self.img, ".png"), min_size=100)
+        self.assertEqual(decoded.shape, self.img.shape)
+        self.assertNotIsInstance(decoded, decoding.ReducedImage)
+
+    def test_decode_fails_for_invalid_data(self):
+        self.assertRaises(ValueError, decoding.decode, b"not an image")
+
+    def test_arrays_derived_from_reduced_image_cannot_be_decoded_again(self):
+        decoded = decoding.decode(encode(self.img), min_size=100)
+        self.assertIsNone(decoded[10:20, 10:20].encoded)
+
+    def test_enough_resolution_decodes_again_when_area_is_too_small(self):
+        decoded = decoding.decode(encode(self.img), min_size=100)
+        img, rect = decoding.enough_resolution(decoded, Rect(10, 70, 20, 80), 100)
+        self.assertEqual(img.shape, (300, 400, 3))
+        self.assertEqual(rect, Rect(20, 140, 40, 160))
+
+    def test_enough_resolution_keeps_image_when_area_is_big_enough(self):
+        decoded = decoding.decode(encode(self.img), min_size=100)
+        rect = Rect(10, 110, 20, 120)
+        img, same_rect = decoding.enough_resolution(decoded, rect, 100)
+        self.assertIs(img, decoded)
+        self.assertIs(same_rect, rect)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -96,6 +96,21 @@ class FillContourTestCase(unittest.TestCase):
         mask = operations.fill_contour(contour, shape)
         self.assertEqual(mask.shape, shape[:2])
 
+    def test_fill_contour_fills_contour_area(self):
+        contour = np.array([[1, 2], [1, 5], [6, 5], [6, 2]])
+        expected = np.zeros((10, 10), dtype=np.uint8)
+        cv2.fillPoly(expected, [contour], 1)
+        self.assertTrue((operations.fill_contour(contour, (10, 10)) == (expected > 0)).all())
+
+    def test_fill_contour_writes_to_dst(self):
+        contour = np.array([[1, 1], [1, 3], [3, 3], [3, 1]])
+        dst = np.zeros((10, 10), dtype=bool)
+        dst[9, 9] = True
+        mask = operations.fill_contour(contour, (10, 10), dst=dst)
+        self.assertIs(mask, dst)
+        self.assertTrue(dst[2, 2] and dst[9, 9])
+        self.assertEqual(dst.sum(), 10)
+
 
 class MassCenterTestCase(unittest.TestCase):
 
@@ -201,6 +216,12 @@ class ErodeTestCase(unittest.TestCase):
         eroded = operations.erode(img, 1)
         self.assertEqual(eroded.shape, img.shape)
 
+    def test_erode_with_roi_equals_erode_of_whole_image(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        roi = Rect(10, 20, 15, 30)
+        self.assertTrue((operations.erode(img, 5, roi=roi) == operations.erode(img, 5)).all())
+
 
 class DilateTestCase(unittest.TestCase):
 
@@ -229,6 +250,93 @@ class DilateTestCase(unittest.TestCase):
         dilated = operations.dilate(img, 1)
         self.assertEqual(dilated.shape, img.shape)
 
+    def test_dilate_with_roi_equals_dilate_of_whole_image(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        img[12, 10:35] = 1
+        roi = Rect(10, 20, 10, 35)
+        for kernel in [1, 4, 7, (9, 5), 41]:
+            self.assertTrue((operations.dilate(img, kernel, roi=roi) == operations.dilate(img, kernel)).all())
+
+    def test_dilate_with_roi_works_with_channel(self):
+        img = np.zeros((40, 50, 1), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        roi = Rect(10, 20, 15, 30)
+        self.assertTrue((operations.dilate(img, 7, roi=roi) == operations.dilate(img, 7)).all())
+
+    def test_dilate_with_roi_writes_only_padded_roi_of_dst(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        dst = np.full(img.shape, 7, dtype=np.uint8)
+        dilated = operations.dilate(img, 5, roi=Rect(10, 20, 15, 30), dst=dst)
+        self.assertIs(dilated, dst)
+        self.assertEqual(dst[0, 0], 7)
+        self.assertTrue((dst[8:22, 13:32] == operations.dilate(img, 5)[8:22, 13:32]).all())
+
+    def test_dilate_operation_accepts_roi_at_call_time(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        dilated = operations.Dilate(5)(img, roi=Rect(10, 20, 15, 30))
+        self.assertTrue((dilated == operations.dilate(img, 5)).all())
+
+
+class RingTestCase(unittest.TestCase):
+
+    def test_distance_transform_is_zero_on_object(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        distances = operations.distance_transform(img)
+        self.assertEqual(distances.dtype, np.float32)
+        self.assertTrue((distances[img > 0] == 0).all())
+        self.assertAlmostEqual(distances[5, 20], 5, places=3)
+
+    def test_distance_transform_of_empty_mask_is_inf(self):
+        self.assertTrue(np.isinf(operations.distance_transform(np.zeros((10, 10), dtype=np.uint8))).all())
+
+    def test_distance_transform_with_roi_equals_whole_image_up_to_max_distance(self):
+        img = np.zeros((60, 70), dtype=np.uint8)
+        img[20:30, 25:40] = 1
+        distances = operations.distance_transform(img, roi=Rect(20, 30, 25, 40), max_distance=8)
+        whole = operations.distance_transform(img)
+        near = whole <= 8
+        self.assertTrue(np.allclose(distances[near], whole[near]))
+        self.assertTrue(np.isinf(distances[0, 0]))
+
+    def test_ring_excludes_object_and_far_pixels(self):
+        img = np.zeros((40, 50), dtype=np.uint8)
+        img[10:20, 15:30] = 1
+        ring = operations.ring(img, 3)
+        self.assertFalse(ring[img > 0].any())
+        self.assertTrue(ring[8, 20])
+        self.assertFalse(ring[5, 20])
+
+    def test_ring_approximates_difference_of_dilations(self):
+        img = np.zeros((100, 120), dtype=np.uint8)
+        cv2.ellipse(img, (60, 50), (20, 8), 0, 0, 360, 1, -1)
+        for outer, inner in [(31, 5), (40, 6), (17, 4)]:
+            dilations = (operations.dilate(img, outer) > 0) & (operations.dilate(img, inner) == 0)
+            ring = operations.ring(img, operations.dilation_radius(outer), operations.dilation_radius(inner))
+            self.assertGreater((ring & dilations).sum() / (ring | dilations).sum(), 0.9)
+
+    def test_ring_with_roi_equals_ring_of_whole_image(self):
+        img = np.zeros((60, 70), dtype=np.uint8)
+        img[20:30, 25:40] = 1
+        ring = operations.Ring(9, 2)(img, roi=Rect(20, 30, 25, 40))
+        self.assertTrue((ring == operations.ring(img, 9, 2)).all())
+
+    def test_dilation_radius(self):
+        self.assertEqual(operations.dilation_radius(4), 2)
+        self.assertAlmostEqual(operations.dilation_radius(5), 2.1)
+
+
+class PadRectTestCase(unittest.TestCase):
+
+    def test_pad_rect_extends_rect(self):
+        self.assertEqual(operations.pad_rect(Rect(10, 20, 10, 30), (2, 3), (100, 100)), Rect(7, 23, 8, 32))
+
+    def test_pad_rect_clips_rect_to_image(self):
+        self.assertEqual(operations.pad_rect(Rect(1, 20, 10, 30), 5, (22, 32)), Rect(0, 22, 5, 32))
+
 
 class SquarisizeTestCase(unittest.TestCase):
 
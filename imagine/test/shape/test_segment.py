@@ -6,7 +6,8 @@ import numpy as np
 from sklearn.cluster import KMeans
 
 from faceparsing.parser import FaceParser
-from imagine.shape.segment import ParsingSegmenter, ClusteringSegmenter
+from imagine.shape.figures import Rect
+from imagine.shape.segment import ParsingSegmenter, ClusteringSegmenter, SegmentationMap
 
 
 class ParsingSegmenterTestCase(unittest.TestCase):
@@ -121,5 +122,56 @@ class ClusteringSegmenterTestCase(unittest.TestCase):
         self.assertTrue((np.unique(segmented) == np.array([-1])).all())
 
 
+class SegmentationMapTestCase(unittest.TestCase):
+    labels = np.array([[0, 1, 1, 0, 0, 0],
+                       [0, 1, 1, 0, 2, 0],
+                       [0, 0, 0, 0, 0, 0],
+                       [1, 0, 0, 2, 2, 2]], dtype=np.uint8)
+
+    def test_segmentation_map_can_be_used_as_array(self):
+        segmented = SegmentationMap(self.labels)
+        self.assertTrue(((segmented == 1) == (self.labels == 1)).all())
+        self.assertEqual(segmented.max(), 2)
+
+    def test_mask_returns_pixels_of_part(self):
+        segmented = SegmentationMap(self.labels)
+        self.assertTrue((segmented.mask(2) == (self.labels == 2)).all())
+        self.assertIs(segmented.mask(2), segmented.mask(2))
+
+    def test_count_returns_number_of_pixels_of_part(self):
+        segmented = SegmentationMap(self.labels)
+        self.assertEqual(segmented.count(1), 5)
+        self.assertEqual(segmented.count(2), 4)
+        self.assertEqual(segmented.count(7), 0)
+
+    def test_bounding_rect_bounds_biggest_component(self):
+        segmented = SegmentationMap(self.labels)
+        self.assertEqual(segmented.bounding_rect(1), Rect(0, 2, 1, 3))
+        self.assertEqual(segmented.component_area(1), 4)
+        self.assertEqual(segmented.bounding_rect(7), None)
+
+    def test_component_mask_returns_mask_of_biggest_component(self):
+        segmented = SegmentationMap(self.labels)
+        expected = np.zeros(self.labels.shape, dtype=bool)
+        expected[0:2, 1:3] = True
+        self.assertTrue((segmented.component_mask(1) == expected).all())
+
+    def test_masks_are_segmentation_maps_with_part_code_one(self):
+        mask = SegmentationMap(self.labels).mask(2)
+        self.assertEqual(mask.component_area(1), 3)
+        self.assertIs(SegmentationMap.of(mask), mask)
+
+    def test_iterating_over_batch_returns_maps_of_single_images(self):
+        segmented = SegmentationMap(np.stack([self.labels, self.labels == 2]))
+        self.assertEqual([s.count(1) for s in segmented], [5, 4])
+
+    def test_segmenter_remaps_parts_to_uint8_map(self):
+        img = np.random.rand(1, 30, 30, 3)
+        segmented = ClusteringSegmenter(KMeans(n_clusters=3), parts_map={1: 7, 2: 7})(img)
+        self.assertIsInstance(segmented, SegmentationMap)
+        self.assertEqual(segmented.dtype, np.uint8)
+        self.assertTrue(set(np.unique(segmented)) <= {0, 7})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -11,6 +11,7 @@ from automakeup.face.bounding import MTCNNBoundingBoxFinder
 from automakeup.feature import extract as feature_extraction
 from facenet import Facenet
 from faceparsing import FaceParser
+from imagine.functional import functional
 from mtcnn import MTCNN
 from preprocessing.data import IndexedImageDictDataLoader, MakeupDataset, DataFrameCsvSaver
 from preprocessing.pipeline import PreprocessingPipeline
@@ -36,6 +37,12 @@ def parse_args():
                                help="after how many images should the output be written to disk")
         argparser.add_argument("--method", choices=["colors", "facenet"], default="colors",
                                help="method of feature encoding")
+        argparser.add_argument("--min_decode_size", type=int, default=0,
+                               help="decode JPEG images in reduced resolution if their shorter side stays at least "
+                                    "this big, only with colors method (0 decodes in full resolution)")
+        argparser.add_argument("--threads", type=int, default=0,
+                               help="number of threads image operations process samples of batches with "
+                                    "(0 processes them one by one)")
         args = argparser.parse_args()
     return args
 
@@ -48,22 +55,24 @@ def config_logging():
     logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
 
 
-def get_method_config(device, directory, batchsize, face_extractor, face_feature_extractor, makeup_feature_extractor):
+def get_method_config(device, directory, batchsize, face_extractor, face_feature_extractor, makeup_feature_extractor,
+                      min_decode_size=None):
     bb_finder = MTCNNBoundingBoxFinder(MTCNN(device=device))
-    data_loader = IndexedImageDictDataLoader(MakeupDataset(directory),
+    data_loader = IndexedImageDictDataLoader(MakeupDataset(directory, min_decode_size=min_decode_size),
                                              batch_size=batchsize,
                                              align=face_extraction.ExtractFace(bb_finder, face_extractor))
     preprocessor = MakeupDataPreprocessor(face_feature_extractor, makeup_feature_extractor)
     return data_loader, preprocessor
 
 
-def get_colors_config(device, facesize, directory, batchsize):
+def get_colors_config(device, facesize, directory, batchsize, min_decode_size=None):
     face_extractor = face_extraction.SimpleFaceExtractor(output_size=facesize, bb_scale=1.5)
     parser = FaceParser(device=device)
     face_feature_extractor = feature_extraction.ColorsFeatureExtractor(parser)
     makeup_feature_extractor = feature_extraction.MakeupExtractor(parser)
+    # SimpleFaceExtractor decodes images again in higher resolution when faces in them are too small
     return get_method_config(device, directory, batchsize, face_extractor, face_feature_extractor,
-                             makeup_feature_extractor)
+                             makeup_feature_extractor, min_decode_size)
 
 
 def get_facenet_config(device, facesize, directory, batchsize):
@@ -81,13 +90,17 @@ if __name__ == '__main__':
     args = parse_args()
     device = get_device()
     config_logging()
+    functional.use_threads(args.threads)
 
     logger = logging.getLogger("main")
     logger.info("Using device = {}".format(str(device)))
     logger.info("Loading")
 
-    config_function = get_colors_config if args.method == "colors" else get_facenet_config
-    data_loader, preprocessor = config_function(device, args.facesize, args.directory, args.batchsize)
+    if args.method == "colors":
+        data_loader, preprocessor = get_colors_config(device, args.facesize, args.directory, args.batchsize,
+                                                      args.min_decode_size or None)
+    else:
+        data_loader, preprocessor = get_facenet_config(device, args.facesize, args.directory, args.batchsize)
 
     with open(args.output_file, "w") as out:
         with DataFrameCsvSaver(out, limit=args.limit) as data_saver:
@@ -3,13 +3,12 @@ import os
 import pathlib
 from abc import ABC, abstractmethod
 
-import cv2
 import numpy as np
 import pandas as pd
 from torch.utils.data import Dataset, DataLoader
 
-from imagine.color import conversion
 from imagine.functional import functional as f
+from imagine.io import decoding
 
 logger = logging.getLogger(__name__)
 
@@ -52,13 +51,18 @@ class LabelDictIndexedTreeDataset(IndexedTreeDataset, ItemGetter, ABC):
 
 
 class ImageGetter(ItemGetter):
+    # minimum size of the shorter side of images decoded in reduced resolution, None decodes in full resolution
+    min_decode_size = None
+
     def get_single(self, path):
-        return conversion.BgrToRgb(cv2.imread(path))
+        return decoding.read(path, min_size=self.min_decode_size)
 
 
 class MakeupDataset(LabelDictIndexedTreeDataset, ImageGetter):
-    def __init__(self, root_directory, before_label="before", after_label="after", format="jpg"):
+    def __init__(self, root_directory, before_label="before", after_label="after", format="jpg",
+                 min_decode_size=None):
         super().__init__(root_directory, [before_label, after_label], format)
+        self.min_decode_size = min_decode_size
 
 
 # Data loaders
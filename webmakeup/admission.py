@@ -0,0 +1,112 @@
+import contextlib
+import threading
+import time
+
+from werkzeug.exceptions import ServiceUnavailable
+
+from automakeup import deadlines, metrics
+from automakeup.pipelines import WrappingPipeline
+
+
+class OverloadedError(ServiceUnavailable):
+    description = "Server is overloaded. Try again later"
+
+
+class Admission:
+    """
+    Admission control for incoming requests
+
+    At most max_requests requests are handled at once, the rest are rejected right away with 503 and Retry-After,
+    before their uploads are parsed, so bursts don't pile up in memory.
+    Each admitted request gets a deadline after which its remaining work is dropped.
+    Limits apply to each process separately.
+    """
+
+    def __init__(self, max_requests=32, timeout=30, retry_after=1):
+        """
+        Args:
+            max_requests: maximum number of requests being handled, including those waiting for the pipeline
+            timeout: time in seconds after admission when the request expires. if None requests never expire.
+            retry_after: time in seconds sent to rejected clients in Retry-After header
+        """
+        super().__init__()
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.admitted = 0
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def admit(self):
+        with self.lock:
+            if self.admitted >= self.max_requests:
+                metrics.event("rejected")
+                raise OverloadedError(retry_after=self.retry_after)
+            self.admitted += 1
+        try:
+            with deadlines.until(time.monotonic() + self.timeout if self.timeout is not None else None):
+                yield
+        finally:
+            with self.lock:
+                self.admitted -= 1
+
+    def wrap(self, handler):
+        """Returns handler which is called only for admitted requests and adds Retry-After to all 503 responses"""
+
+        def admitted(*args, **kwargs):
+            with self.admit():
+                try:
+                    return handler(*args, **kwargs)
+                except ServiceUnavailable as e:
+                    if e.retry_after is None:
+                        raise OverloadedError(e.description, retry_after=self.retry_after)
+                    raise
+
+        return admitted
+
+
+class LimitingPipeline(WrappingPipeline):
+    """
+    Pipeline that allows at most max_in_flight concurrent executions of the wrapped pipeline
+
+    Callers wait for a free slot until their deadline, then DeadlineExceededError is raised.
+    Sampling from features alone is cheap, so it doesn't wait for a slot.
+    """
+
+    def __init__(self, pipeline, max_in_flight=8):
+        """
+        Args:
+            pipeline: pipeline with run() and run_batch() methods
+            max_in_flight: maximum number of concurrent executions
+        """
+        super().__init__(pipeline)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+    def run(self, img, seed=None, bb=None):
+        with self._slot():
+            return self.pipeline.run(img, seed, bb)
+
+    def run_batch(self, imgs, seeds=None, bbs=None):
+        with self._slot():
+            return self.pipeline.run_batch(imgs, seeds, bbs)
+
+    def run_many(self, img, k, seed=None, bb=None):
+        with self._slot():
+            return self.pipeline.run_many(img, k, seed, bb)
+
+    def run_all(self, img, seed=None, min_size=0, max_faces=None):
+        with self._slot():
+            return self.pipeline.run_all(img, seed, min_size, max_faces)
+
+    @contextlib.contextmanager
+    def _slot(self):
+        remaining = deadlines.remaining()
+        with metrics.timed("queueing"):
+            acquired = self.slots.acquire(timeout=None if remaining is None else max(0.0, remaining))
+        if not acquired:
+            metrics.event("deadline_exceeded")
+            raise deadlines.DeadlineExceededError()
+        try:
+            yield
+        finally:
+            self.slots.release()
@@ -0,0 +1,112 @@
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from automakeup import deadlines, metrics
+from automakeup.pipelines import WrappingPipeline
+
+logger = logging.getLogger("batching")
+
+
+class BatchingPipeline(WrappingPipeline):
+    """
+    Pipeline that gathers concurrent run() calls and passes them to the wrapped pipeline as one batch
+
+    The first request waits at most max_wait seconds for others to join its batch,
+    so latency grows by a bounded amount, while throughput benefits from batched model forwards.
+    Batches are processed on a background thread started lazily in each process, so it survives forking.
+    Deadlines of callers are carried along: expired requests are dropped before processing
+    and the batch is processed until the latest deadline among the rest.
+    Callers wait for their results only until their own deadline.
+    Other calls are passed through: they are already batches or too cheap to wait for one.
+    """
+
+    def __init__(self, pipeline, max_batch_size=8, max_wait=0.005):
+        """
+        Args:
+            pipeline: pipeline with run_batch() method
+            max_batch_size: maximum number of images in one batch
+            max_wait: maximum time in seconds to wait for a batch to fill
+        """
+        super().__init__(pipeline)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+
+    def run(self, img, seed=None, bb=None):
+        self._ensure_started()
+        future = Future()
+        self.queue.put((img, seed, bb, deadlines.current(), future))
+        remaining = deadlines.remaining()
+        try:
+            return future.result(timeout=None if remaining is None else max(0.0, remaining))
+        except deadlines.DeadlineExceededError:
+            raise
+        except concurrent.futures.TimeoutError:
+            # the batch may still be processed, but nobody waits for it anymore
+            metrics.event("deadline_exceeded")
+            raise deadlines.DeadlineExceededError()
+
+    def _ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+                threading.Thread(target=self._loop, name="batching", daemon=True).start()
+                self.pid = os.getpid()
+
+    def _loop(self):
+        while True:
+            self._process(self._gather())
+
+    def _gather(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch):
+        batch = self._drop_expired(batch)
+        if not batch:
+            return
+        imgs, seeds, bbs, batch_deadlines, futures = zip(*batch)
+        if all(seed is None for seed in seeds):
+            seeds = None
+        deadline = None if None in batch_deadlines else max(batch_deadlines)
+        try:
+            with deadlines.until(deadline):
+                results = self.pipeline.run_batch(imgs, seeds, bbs)
+        except deadlines.DeadlineExceededError as e:
+            results = [e] * len(batch)
+        except Exception as e:
+            logger.warning("Exception occurred during batch processing", exc_info=e)
+            results = [e] * len(batch)
+        for future, result in zip(futures, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _drop_expired(batch):
+        alive = []
+        for item in batch:
+            if deadlines.expired(item[3]):
+                item[4].set_exception(deadlines.DeadlineExceededError())
+            else:
+                alive.append(item)
+        return alive
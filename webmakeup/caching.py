@@ -0,0 +1,192 @@
+import concurrent.futures
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from automakeup import deadlines, metrics
+from automakeup.pipelines import WrappingPipeline
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache with entries expiring after given time
+
+    Memory is bounded by the total size of pickled values.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20, ttl=None):
+        """
+        Args:
+            max_bytes: maximum total size in bytes of cached values
+            ttl: time in seconds after which entries expire. if None entries never expire.
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def size_of(value):
+        return len(pickle.dumps(value))
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            value, size, expires = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self.size_of(value)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, size, expires)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.size -= size
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CachingPipeline(WrappingPipeline):
+    """
+    Pipeline that caches results of the wrapped pipeline by hash of image data and pipeline parameters
+
+    Concurrent runs on the same image share one computation. Waiters give up at their own deadline
+    and if the computation runs out of time of its owner, a waiter with time left computes it again.
+    When seed is not given, it is derived from the hash, so cached results are the same as a fresh run would return.
+    Sampling from features alone is cheaper than hashing, so it isn't cached.
+    Cache is kept separately in each process.
+    """
+
+    def __init__(self, pipeline, cache):
+        """
+        Args:
+            pipeline: pipeline with run(img, seed, bb) method
+            cache: cache with get() and put() methods
+        """
+        super().__init__(pipeline)
+        self.cache = cache
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def run(self, img, seed=None, bb=None):
+        key = self._key(img, seed, bb)
+        seed = key[1]
+
+        result = self.cache.get(key)
+        if result is not None:
+            metrics.event("cache_hit")
+            return result
+        metrics.event("cache_miss")
+
+        while True:
+            with self.lock:
+                future = self.in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = self.in_flight[key] = Future()
+            if owner:
+                break
+            remaining = deadlines.remaining()
+            try:
+                return future.result(timeout=None if remaining is None else max(0.0, remaining))
+            except deadlines.DeadlineExceededError:
+                # the owner ran out of its own time, so compute it again if we have time left
+                deadlines.check()
+            except concurrent.futures.TimeoutError:
+                metrics.event("deadline_exceeded")
+                raise deadlines.DeadlineExceededError()
+
+        try:
+            result = self.pipeline.run(img, seed, bb)
+            self.cache.put(key, result)
+        except BaseException as e:
+            # entry is removed before waiters wake up, so they don't retry on the failed future
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def run_batch(self, imgs, seeds=None, bbs=None):
+        """Cached results are reused, but concurrent computations are not shared with batches"""
+        seeds = seeds if seeds is not None else [None] * len(imgs)
+        bbs = bbs if bbs is not None else [None] * len(imgs)
+        keys = [self._key(img, seed, bb) for img, seed, bb in zip(imgs, seeds, bbs)]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        metrics.event("cache_hit", len(keys) - len(missing))
+        metrics.event("cache_miss", len(missing))
+        if missing:
+            computed = self.pipeline.run_batch([imgs[i] for i in missing],
+                                               [keys[i][1] for i in missing],
+                                               [bbs[i] for i in missing])
+            for i, result in zip(missing, computed):
+                if not isinstance(result, Exception):
+                    self.cache.put(keys[i], result)
+                results[i] = result
+        return results
+
+    def run_many(self, img, k, seed=None, bb=None):
+        key = self._key(img, seed, bb) + ("many", k)
+        results = self.cache.get(key)
+        if results is not None:
+            metrics.event("cache_hit")
+            return results
+        metrics.event("cache_miss")
+        results = self.pipeline.run_many(img, k, key[1], bb)
+        self.cache.put(key, results)
+        return results
+
+    def run_all(self, img, seed=None, min_size=0, max_faces=None):
+        key = self._key(img, seed, None) + ("all", min_size, max_faces)
+        results = self.cache.get(key)
+        if results is not None:
+            metrics.event("cache_hit")
+            return results
+        metrics.event("cache_miss")
+        results = self.pipeline.run_all(img, key[1], min_size, max_faces)
+        self.cache.put(key, results)
+        return results
+
+    def _finish(self, key):
+        with self.lock:
+            del self.in_flight[key]
+
+    def _key(self, img, seed, bb):
+        digest = self._digest(img)
+        if seed is None:
+            seed = self._seed(digest)
+        return digest, seed, None if bb is None else bb.to_cv()
+
+    def _digest(self, img):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((img.shape, img.dtype.str, sorted(self.params().items()))).encode())
+        h.update(img.data if img.flags.c_contiguous else img.tobytes())
+        return h.digest()
+
+    @staticmethod
+    def _seed(digest):
+        # torch generators accept seeds up to 2^63 - 1
+        return int.from_bytes(digest[:8], "little") >> 1
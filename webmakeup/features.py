@@ -0,0 +1,39 @@
+import base64
+import binascii
+
+import numpy as np
+
+HANDLE_PREFIX = "f1."
+
+
+def to_handle(features):
+    """
+    Encode face features as an opaque string which clients send back to get another recommendation
+
+    The handle holds the features themselves, so it works in every server process and after restarts.
+    """
+    data = np.asarray(features, dtype="<f8").tobytes()
+    return HANDLE_PREFIX + base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def from_handle(handle):
+    """Decode features from string created by to_handle()"""
+    if not handle.startswith(HANDLE_PREFIX):
+        raise ValueError("Invalid features handle")
+    try:
+        data = base64.b64decode(handle[len(HANDLE_PREFIX):].encode("ascii"), altchars=b"-_", validate=True)
+    except (binascii.Error, UnicodeEncodeError):
+        raise ValueError("Invalid features handle")
+    if not data or len(data) % 8 != 0:
+        raise ValueError("Invalid features handle")
+    return np.frombuffer(data, dtype="<f8")
+
+
+def parse(features):
+    """Parse features given as handle or as comma separated values"""
+    if features.startswith(HANDLE_PREFIX):
+        return from_handle(features)
+    try:
+        return np.array([float(v) for v in features.split(",")])
+    except ValueError:
+        raise ValueError("Features should be given as handle or comma separated values")
@@ -1,6 +1,6 @@
 import inspect
 from abc import ABC, abstractmethod
-from typing import BinaryIO, TextIO
+from typing import BinaryIO, TextIO, List
 
 from flask import request, abort, jsonify
 
@@ -17,10 +17,15 @@ def get_function_params(f):
     return {p.name: normalize_annotation(p.annotation) for p in inspect.signature(f).parameters.values()}
 
 
+def get_optional_params(f):
+    return {p.name for p in inspect.signature(f).parameters.values() if p.default is not inspect.Parameter.empty}
+
+
 class EndpointHandler:
     def __init__(self, function):
         self.function = function
         self.required_params = get_function_params(self.function)
+        self.optional_params = get_optional_params(self.function)
 
     @staticmethod
     def _add_present(handler, dict, p_name):
@@ -44,7 +49,7 @@ class EndpointHandler:
             if handler.is_present(request, p_name):
                 if not missing_once:
                     self._add_present(handler, converted_params, p_name)
-            else:
+            elif p_name not in self.optional_params:
                 self._add_missing(handler, missing_params, p_name)
                 missing_once = True
         return converted_params, missing_params
@@ -67,6 +72,8 @@ class EndpointHandler:
             abort(400, self._get_missing_str(missing_params))
         try:
             return jsonify(call_with_dict_args(self.function, converted_params))
+        except TimeoutError as e:
+            abort(503, str(e))
         except Exception as e:
             abort(400, str(e))
 
@@ -120,10 +127,20 @@ class FilesParameterHandler(ParameterHandler):
         return "files"
 
 
+class ListFilesParameterHandler(FilesParameterHandler):
+    def get_type_str(self):
+        return "list of files"
+
+    def get_converted_value(self, req, p_name):
+        return self.get_param_dict(req).getlist(p_name)
+
+
 class ParameterHandlerFactory:
     HANDLERS_ASSOCIATION = {
         BinaryIO: FilesParameterHandler,
         TextIO: FilesParameterHandler,
+        List[BinaryIO]: ListFilesParameterHandler,
+        List[TextIO]: ListFilesParameterHandler,
         int: NumericParameterHandler,
         float: NumericParameterHandler,
     }
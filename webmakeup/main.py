@@ -1,11 +1,19 @@
+import functools
 import importlib.resources as pkg_resources
 import logging
+import os
 
 import configargparse
+import cv2
 import torch
 
+from automakeup import metrics
 from automakeup.pipelines import GanettePipeline
-from webmakeup.server import Server, DEFAULT_HOST, DEFAULT_PORT
+from webmakeup.admission import Admission, LimitingPipeline
+from webmakeup.batching import BatchingPipeline
+from webmakeup.caching import CachingPipeline, LRUCache
+from webmakeup.server import Server, PreforkServer, DEFAULT_HOST, DEFAULT_PORT
+from webmakeup.warmup import Warmup, parse_sizes
 from workers import MakeupWorker
 
 
@@ -18,6 +26,48 @@ def parse_args():
                                help='config file path')
         argparser.add_argument('--host', type=str, default=DEFAULT_HOST, help='host at which to run the server')
         argparser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port at which to run the server')
+        argparser.add_argument('--mode', choices=["development", "production"], default="development",
+                               help='development runs a single flask process, '
+                                    'production forks worker processes sharing the loaded models')
+        argparser.add_argument('--processes', type=int, default=0,
+                               help='number of worker processes in production mode (0 means one per core)')
+        argparser.add_argument('--threads', type=int, default=0,
+                               help='number of torch and OpenCV threads in each process (0 means library defaults)')
+        argparser.add_argument('--max_batch_size', type=int, default=1,
+                               help='maximum number of concurrent requests processed as one batch (1 disables batching)')
+        argparser.add_argument('--batch_wait', type=float, default=5,
+                               help='maximum time in milliseconds to wait for concurrent requests to fill a batch')
+        argparser.add_argument('--max_in_flight', type=int, default=0,
+                               help='maximum number of concurrent pipeline executions in each process '
+                                    '(0 disables admission control)')
+        argparser.add_argument('--max_queued', type=int, default=32,
+                               help='maximum number of requests waiting for the pipeline in each process, '
+                                    'more are rejected with 503')
+        argparser.add_argument('--request_timeout', type=float, default=0,
+                               help='time in seconds after which unfinished requests are dropped (0 means never)')
+        argparser.add_argument('--retry_after', type=int, default=1,
+                               help='time in seconds after which rejected clients should retry')
+        argparser.add_argument('--verify_bb', action='store_true',
+                               help='search for the face around bounding boxes sent by clients instead of trusting them')
+        argparser.add_argument('--warmup_sizes', type=parse_sizes, default=[],
+                               help='sizes of synthetic images run through the pipeline before the server is ready, '
+                                    'given as WIDTHxHEIGHT,WIDTHxHEIGHT,... (empty disables warmup)')
+        argparser.add_argument('--warmup_rounds', type=int, default=1,
+                               help='number of times synthetic images of all sizes are run during warmup')
+        argparser.add_argument('--min_decode_size', type=int, default=0,
+                               help='decode JPEG images in reduced resolution if their shorter side stays at least '
+                                    'this big, faces too small for it are decoded again (0 decodes in full resolution)')
+        argparser.add_argument('--min_face_fraction', type=float, default=0,
+                               help='search for faces in images downscaled so that faces spanning at least this '
+                                    'fraction of the shorter image side are still found (0 searches in full resolution)')
+        argparser.add_argument('--refine_detection', action='store_true',
+                               help='search again around faces found in downscaled images for more accurate boxes')
+        argparser.add_argument('--metrics', action='store_true',
+                               help='record timings of pipeline stages and serve them at /metrics')
+        argparser.add_argument('--cache_memory', type=float, default=0,
+                               help='maximum memory in megabytes for cached results in each process (0 disables caching)')
+        argparser.add_argument('--cache_ttl', type=float, default=0,
+                               help='time in seconds after which cached results expire (0 means never)')
     return argparser.parse_args()
 
 
@@ -25,6 +75,58 @@ def get_device():
     return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
 
+def get_pipeline(args, device):
+    pipeline = GanettePipeline(device=device, verify_bb=args.verify_bb,
+                               min_face_fraction=args.min_face_fraction or None, refine_bb=args.refine_detection)
+    if args.max_batch_size > 1:
+        pipeline = BatchingPipeline(pipeline, max_batch_size=args.max_batch_size, max_wait=args.batch_wait / 1000)
+    if args.max_in_flight > 0:
+        pipeline = LimitingPipeline(pipeline, max_in_flight=args.max_in_flight)
+    if args.cache_memory > 0:
+        cache = LRUCache(max_bytes=int(args.cache_memory * 2 ** 20), ttl=args.cache_ttl or None)
+        pipeline = CachingPipeline(pipeline, cache)
+    return pipeline
+
+
+def get_admission(args):
+    if args.max_in_flight <= 0:
+        return None
+    return Admission(max_requests=args.max_in_flight + args.max_queued, timeout=args.request_timeout or None,
+                     retry_after=args.retry_after)
+
+
+def get_warmup(args, pipeline):
+    if not args.warmup_sizes or args.warmup_rounds <= 0:
+        return None
+    return Warmup(pipeline, args.warmup_sizes, batch_size=max(1, args.max_batch_size), rounds=args.warmup_rounds)
+
+
+def limit_threads(threads):
+    if threads > 0:
+        torch.set_num_threads(threads)
+        cv2.setNumThreads(threads)
+
+
+def get_processes(processes, threads):
+    if processes > 0:
+        return processes
+    return max(1, os.cpu_count() // max(1, threads))
+
+
+def get_server(args, device, worker):
+    kwargs = {"expose_metrics": args.metrics, "admission": get_admission(args),
+              "warmup": get_warmup(args, worker.pipeline)}
+    if args.mode == "development":
+        return Server(worker, args.host, args.port, **kwargs)
+    if device.type == 'cuda':
+        logger.warning("Can't fork processes after CUDA initialization. Using development server")
+        return Server(worker, args.host, args.port, **kwargs)
+    processes = get_processes(args.processes, args.threads)
+    logger.info("Using {} worker processes with {} threads each".format(processes, args.threads or "default"))
+    return PreforkServer(worker, args.host, args.port, processes=processes,
+                         initializer=functools.partial(limit_threads, args.threads), **kwargs)
+
+
 def config_logging():
     logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
 
@@ -38,12 +140,15 @@ if __name__ == '__main__':
     logger = logging.getLogger("main")
     logger.info("Using device = {}".format(str(device)))
 
+    limit_threads(args.threads)
+    metrics.enable(args.metrics)
+
     try:
         logger.info("Loading pipeline...")
-        pipeline = GanettePipeline(device=device)
+        pipeline = get_pipeline(args, device)
         logger.info("Pipeline loaded")
-        worker = MakeupWorker(pipeline)
-        server = Server(worker, args.host, args.port)
+        worker = MakeupWorker(pipeline, min_decode_size=args.min_decode_size or None)
+        server = get_server(args, device, worker)
     except IOError as e:
         logger.error("Can't load server", exc_info=e)
         exit(1)
@@ -1,34 +1,211 @@
-from flask import Flask
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
 
+from flask import Flask, Response, jsonify
+from werkzeug.serving import make_server
 
+from automakeup import metrics
 from webmakeup.handlers import EndpointHandler
 
 
 FLASK_PRETTYPRINT_OPTION_NAME = 'JSONIFY_PRETTYPRINT_REGULAR'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
 DEFAULT_HOST = 'localhost'
 DEFAULT_PORT = 8080
+DEFAULT_BACKLOG = 128
+# worker processes crashing right after start are restarted with exponentially growing delay,
+# which goes back to the minimum once a process stays up long enough
+MIN_RESTART_DELAY = 0.1
+MAX_RESTART_DELAY = 30
+STABLE_UPTIME = 60
+
+logger = logging.getLogger("server")
 
 
 class Server:
-    def __init__(self, worker, host=DEFAULT_HOST, port=DEFAULT_PORT, pretty_print=True):
+    def __init__(self, worker, host=DEFAULT_HOST, port=DEFAULT_PORT, pretty_print=True, expose_metrics=False,
+                 admission=None, warmup=None):
+        """
+        The server is live (/live responds with 200) as soon as it runs, since the worker is already loaded,
+        and ready (/ready responds with 200) once warmup finishes.
+
+        Args:
+            expose_metrics: if True, metrics recorded in this process are served at /metrics in Prometheus text format
+            admission: Admission which limits requests to the worker endpoints. if None all requests are accepted.
+            warmup: function without arguments run before the server is ready. if None the server is ready at once.
+        """
         self.worker = worker
         self.host = host
         self.port = port
+        self.admission = admission
+        self.warmup = warmup
+        self.ready = threading.Event()
         self.app = self._get_flask_app(__package__, pretty_print)
+        self.app.add_url_rule("/live", "live", self._live, methods=['GET'])
+        self.app.add_url_rule("/ready", "ready", self._ready, methods=['GET'])
+        if expose_metrics:
+            self.app.add_url_rule("/metrics", "metrics", self._metrics, methods=['GET'])
+
+    @staticmethod
+    def _metrics():
+        return Response(metrics.expose(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    @staticmethod
+    def _live():
+        return jsonify({"status": "live"})
+
+    def _ready(self):
+        if self.ready.is_set():
+            return jsonify({"status": "ready"})
+        return jsonify({"status": "warming up"}), 503
+
+    def _warm_up(self):
+        try:
+            if self.warmup is not None:
+                logger.info("Warming up...")
+                self.warmup()
+        except Exception as e:
+            logger.error("Warmup failed", exc_info=e)
+        self.ready.set()
 
     def _get_flask_app(self, name, pretty_print):
         def add_endpoint(app, route, f, methods=None):
             if methods is None:
                 methods = ['GET', 'POST']
-            app.add_url_rule(route, f.__name__, EndpointHandler(f), methods=methods)
+            handler = EndpointHandler(f)
+            if self.admission is not None:
+                handler = self.admission.wrap(handler)
+            app.add_url_rule(route, f.__name__, handler, methods=methods)
 
         app = Flask(name)
         app.config[FLASK_PRETTYPRINT_OPTION_NAME] = pretty_print
-        add_endpoint(app, "/", self.worker.work)
+        for route, f in self.worker.endpoints().items():
+            add_endpoint(app, route, f)
         return app
 
     def run(self):
+        # serve liveness checks while warming up in the background
+        threading.Thread(target=self._warm_up, name="warmup", daemon=True).start()
         self.app.run(host=self.host, port=self.port)
 
     def cleanup(self):
         self.worker.cleanup()
+
+
+class PreforkServer(Server):
+    """
+    Server that binds the socket once and forks worker processes which accept connections from it
+
+    Everything loaded before run() is called (e.g. the models held by the worker) is shared between processes
+    copy-on-write, so memory usage doesn't grow with the number of processes.
+    Forking is not safe after CUDA initialization, so use it only with models on CPU.
+    Metrics are recorded separately in each process, so /metrics shows the process that handled the scrape.
+    Admission limits also apply to each process separately.
+    Each process warms up before accepting connections, because OpenMP thread pools don't survive forking,
+    so warmup in the parent process wouldn't help and could make the children hang.
+    This way connections are never handled by a cold process, also after it's restarted.
+    Processes which keep crashing (e.g. on initialization) are restarted with growing delay, not in a tight loop.
+    """
+
+    def __init__(self, worker, host=DEFAULT_HOST, port=DEFAULT_PORT, pretty_print=True, expose_metrics=False,
+                 admission=None, warmup=None, processes=1, initializer=None, backlog=DEFAULT_BACKLOG):
+        """
+        Args:
+            processes: number of worker processes to fork
+            initializer: function without arguments called in each worker process right after forking
+            backlog: maximum number of pending connections on the shared socket
+        """
+        super().__init__(worker, host, port, pretty_print, expose_metrics, admission, warmup)
+        self.processes = processes
+        self.initializer = initializer
+        self.backlog = backlog
+        self.children = {}
+        self.stopping = False
+        self.stopped = threading.Event()
+        self.restart_delay = MIN_RESTART_DELAY
+
+    def run(self):
+        sock = socket.create_server((self.host, self.port), backlog=self.backlog)
+        # move everything allocated so far out of gc tracking, so collections in children don't touch shared pages
+        gc.freeze()
+        previous_handler = signal.signal(signal.SIGTERM, self._stop)
+        try:
+            for _ in range(self.processes):
+                self._spawn(sock)
+            self._monitor(sock)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self._terminate_children()
+            sock.close()
+
+    def _spawn(self, sock):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve(sock)
+            except KeyboardInterrupt:
+                pass
+            except Exception as e:
+                logger.error("Worker process {} crashed".format(os.getpid()), exc_info=e)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker process {}".format(pid))
+
+    def _serve(self, sock):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if self.initializer is not None:
+            self.initializer()
+        self._warm_up()
+        server = make_server(self.host, self.port, self.app, threaded=True, fd=sock.fileno())
+        server.serve_forever()
+
+    def _monitor(self, sock):
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            uptime = time.monotonic() - started
+            if uptime >= STABLE_UPTIME:
+                self.restart_delay = MIN_RESTART_DELAY
+            logger.warning("Worker process {} exited with status {} after {:.1f} s. Restarting in {:.1f} s..."
+                           .format(pid, status, uptime, self.restart_delay))
+            # woken up early when the server is stopped
+            self.stopped.wait(self.restart_delay)
+            self.restart_delay = min(2 * self.restart_delay, MAX_RESTART_DELAY)
+            if not self.stopping:
+                self._spawn(sock)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        self.stopped.set()
+        self._terminate_children()
+
+    def _terminate_children(self):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self.children.pop(pid, None)
@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+
+from werkzeug.exceptions import ServiceUnavailable
+
+from automakeup import deadlines
+from automakeup.pipelines import Pipeline
+from webmakeup.admission import Admission, LimitingPipeline, OverloadedError
+
+
+class FailingPipeline(Pipeline):
+    def run(self, img, seed=None, bb=None):
+        raise RuntimeError("Failed")
+
+
+class EchoPipeline(Pipeline):
+    def run(self, img, seed=None, bb=None):
+        return img
+
+
+class AdmissionTestCase(unittest.TestCase):
+
+    def test_admission_rejects_requests_over_limit_with_retry_after(self):
+        admission = Admission(max_requests=1, retry_after=7)
+        with admission.admit():
+            with self.assertRaises(OverloadedError) as cm:
+                with admission.admit():
+                    pass
+        self.assertEqual(cm.exception.code, 503)
+        self.assertEqual(cm.exception.get_response().headers["Retry-After"], "7")
+
+    def test_admission_admits_requests_again_after_previous_ones_finish(self):
+        admission = Admission(max_requests=1)
+        with self.assertRaises(RuntimeError):
+            with admission.admit():
+                raise RuntimeError()
+        with admission.admit():
+            pass
+        self.assertEqual(admission.admitted, 0)
+
+    def test_admitted_request_has_deadline(self):
+        admission = Admission(timeout=10)
+        before = time.monotonic()
+        with admission.admit():
+            self.assertTrue(before + 10 <= deadlines.current() <= time.monotonic() + 10)
+        self.assertIsNone(deadlines.current())
+
+    def test_admitted_request_has_no_deadline_without_timeout(self):
+        with Admission(timeout=None).admit():
+            self.assertIsNone(deadlines.current())
+
+    def test_wrapped_handler_adds_retry_after_to_service_unavailable(self):
+        def handler():
+            raise ServiceUnavailable()
+
+        with self.assertRaises(ServiceUnavailable) as cm:
+            Admission(retry_after=3).wrap(handler)()
+        self.assertEqual(cm.exception.get_response().headers["Retry-After"], "3")
+
+
+class LimitingPipelineTestCase(unittest.TestCase):
+
+    def test_limiting_pipeline_passes_results_through(self):
+        self.assertEqual(LimitingPipeline(EchoPipeline(), max_in_flight=1).run(1), 1)
+
+    def test_limiting_pipeline_releases_slot_after_exception(self):
+        pipeline = LimitingPipeline(FailingPipeline(), max_in_flight=1)
+        for _ in range(3):
+            self.assertRaises(RuntimeError, pipeline.run, None)
+        self.assertTrue(pipeline.slots.acquire(blocking=False))
+
+    def test_limiting_pipeline_raises_when_no_slot_is_free_until_deadline(self):
+        pipeline = LimitingPipeline(EchoPipeline(), max_in_flight=1)
+        pipeline.slots.acquire()
+        with deadlines.until(time.monotonic() + 0.05):
+            self.assertRaises(deadlines.DeadlineExceededError, pipeline.run, None)
+
+    def test_limiting_pipeline_waits_for_free_slot(self):
+        pipeline = LimitingPipeline(EchoPipeline(), max_in_flight=1)
+        pipeline.slots.acquire()
+        threading.Timer(0.05, pipeline.slots.release).start()
+        with deadlines.until(time.monotonic() + 10):
+            self.assertEqual(pipeline.run(1), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
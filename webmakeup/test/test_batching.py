@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+import unittest
+
+from automakeup import deadlines
+from automakeup.pipelines import Pipeline
+from webmakeup.batching import BatchingPipeline
+
+
+class RecordingPipeline(Pipeline):
+    """Returns given images and records batches with deadlines they were run with"""
+
+    def __init__(self, delay=0.0, error=None):
+        super().__init__()
+        self.delay = delay
+        self.error = error
+        self.batches = []
+        self.deadlines = []
+
+    def run(self, img, seed=None, bb=None):
+        return self.run_batch([img], [seed], [bb])[0]
+
+    def run_batch(self, imgs, seeds=None, bbs=None):
+        self.batches.append(list(imgs))
+        self.deadlines.append(deadlines.current())
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return list(imgs)
+
+
+def run_concurrently(pipeline, imgs, deadline=None):
+    results = [None] * len(imgs)
+
+    def run(i):
+        with deadlines.until(deadline):
+            try:
+                results[i] = pipeline.run(imgs[i])
+            except Exception as e:
+                results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(imgs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class BatchingPipelineTestCase(unittest.TestCase):
+
+    def test_worker_is_started_lazily_in_current_process(self):
+        pipeline = BatchingPipeline(RecordingPipeline())
+        self.assertIsNone(pipeline.pid)
+        self.assertEqual(pipeline.run(1), 1)
+        self.assertEqual(pipeline.pid, os.getpid())
+
+    def test_concurrent_runs_are_merged_into_batches_of_at_most_max_size(self):
+        wrapped = RecordingPipeline()
+        pipeline = BatchingPipeline(wrapped, max_batch_size=4, max_wait=0.2)
+        results = run_concurrently(pipeline, list(range(6)))
+        self.assertEqual(results, list(range(6)))
+        self.assertTrue(all(len(batch) <= 4 for batch in wrapped.batches))
+        self.assertEqual(sorted(img for batch in wrapped.batches for img in batch), list(range(6)))
+        self.assertTrue(len(wrapped.batches) < 6)
+
+    def test_expired_runs_are_dropped_without_reaching_pipeline(self):
+        wrapped = RecordingPipeline()
+        pipeline = BatchingPipeline(wrapped, max_wait=0.01)
+        with deadlines.until(time.monotonic() - 1):
+            self.assertRaises(deadlines.DeadlineExceededError, pipeline.run, 1)
+        time.sleep(0.1)
+        self.assertEqual(wrapped.batches, [])
+
+    def test_batch_is_run_until_latest_deadline(self):
+        wrapped = RecordingPipeline()
+        pipeline = BatchingPipeline(wrapped, max_batch_size=2, max_wait=1)
+        early, late = time.monotonic() + 10, time.monotonic() + 20
+        threads = [threading.Thread(target=lambda d=d: run_concurrently(pipeline, [d], d)) for d in (early, late)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(wrapped.deadlines, [late])
+
+    def test_failing_batch_raises_in_every_caller(self):
+        pipeline = BatchingPipeline(RecordingPipeline(error=RuntimeError("Failed")), max_batch_size=3, max_wait=0.2)
+        results = run_concurrently(pipeline, [1, 2, 3])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_caller_waits_only_until_its_deadline(self):
+        pipeline = BatchingPipeline(RecordingPipeline(delay=0.5), max_wait=0.01)
+        start = time.monotonic()
+        with deadlines.until(start + 0.05):
+            self.assertRaises(deadlines.DeadlineExceededError, pipeline.run, 1)
+        self.assertTrue(time.monotonic() - start < 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from automakeup import deadlines
+from automakeup.pipelines import Pipeline
+from webmakeup.caching import CachingPipeline, LRUCache
+
+
+class SeedPipeline(Pipeline):
+    """Returns seed it was run with and counts the runs"""
+
+    def __init__(self):
+        super().__init__()
+        self.runs = 0
+
+    def run(self, img, seed=None, bb=None):
+        self.runs += 1
+        return seed
+
+
+class LRUCacheTestCase(unittest.TestCase):
+
+    def test_lru_cache_returns_stored_values(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_lru_cache_evicts_least_recently_used_entries_first(self):
+        size = LRUCache.size_of(b"x" * 100)
+        cache = LRUCache(max_bytes=3 * size)
+        for key in "abc":
+            cache.put(key, b"x" * 100)
+        cache.get("a")
+        cache.put("d", b"x" * 100)
+        self.assertIsNone(cache.get("b"))
+        for key in "acd":
+            self.assertIsNotNone(cache.get(key))
+
+    def test_lru_cache_stays_within_size_bound(self):
+        cache = LRUCache(max_bytes=1000)
+        for i in range(100):
+            cache.put(i, b"x" * (i * 7 % 300))
+            self.assertTrue(cache.size <= 1000)
+            self.assertEqual(cache.size, sum(size for _, size, _ in cache.entries.values()))
+
+    def test_lru_cache_skips_values_bigger_than_bound(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put("small", b"x")
+        cache.put("big", b"x" * 1000)
+        self.assertIsNone(cache.get("big"))
+        self.assertEqual(cache.get("small"), b"x")
+
+    def test_lru_cache_replaces_value_of_existing_key(self):
+        cache = LRUCache()
+        cache.put("a", b"x" * 100)
+        cache.put("a", b"x")
+        self.assertEqual(cache.get("a"), b"x")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, LRUCache.size_of(b"x"))
+
+
+class CachingPipelineTestCase(unittest.TestCase):
+    img = np.arange(48, dtype=np.uint8).reshape((4, 4, 3))
+
+    def test_seed_is_derived_deterministically_from_image(self):
+        first = CachingPipeline(SeedPipeline(), LRUCache()).run(self.img)
+        second = CachingPipeline(SeedPipeline(), LRUCache()).run(self.img.copy())
+        self.assertEqual(first, second)
+        self.assertTrue(0 <= first < 2 ** 63)
+
+    def test_seed_differs_for_different_images(self):
+        pipeline = CachingPipeline(SeedPipeline(), LRUCache())
+        self.assertNotEqual(pipeline.run(self.img), pipeline.run(255 - self.img))
+
+    def test_given_seed_is_passed_through(self):
+        self.assertEqual(CachingPipeline(SeedPipeline(), LRUCache()).run(self.img, seed=5), 5)
+
+    def test_cached_result_is_reused(self):
+        wrapped = SeedPipeline()
+        pipeline = CachingPipeline(wrapped, LRUCache())
+        self.assertEqual(pipeline.run(self.img, seed=5), pipeline.run(self.img.copy(), seed=5))
+        self.assertEqual(wrapped.runs, 1)
+
+    def test_waiter_computes_result_when_owner_runs_out_of_time(self):
+        class OwnerTimingOutPipeline(SeedPipeline):
+            def run(self, img, seed=None, bb=None):
+                if self.runs == 0:
+                    self.runs += 1
+                    time.sleep(0.1)
+                    raise deadlines.DeadlineExceededError()
+                return super().run(img, seed, bb)
+
+        wrapped = OwnerTimingOutPipeline()
+        pipeline = CachingPipeline(wrapped, LRUCache())
+        owner = threading.Thread(target=self.assertRaises, args=(deadlines.DeadlineExceededError, pipeline.run,
+                                                                 self.img, 5))
+        owner.start()
+        time.sleep(0.02)
+        with deadlines.until(time.monotonic() + 10):
+            self.assertEqual(pipeline.run(self.img, 5), 5)
+        owner.join()
+        self.assertEqual(wrapped.runs, 2)
+        self.assertFalse(pipeline.in_flight)
+
+    def test_waiter_gives_up_at_its_own_deadline(self):
+        class SlowPipeline(SeedPipeline):
+            def run(self, img, seed=None, bb=None):
+                time.sleep(0.5)
+                return super().run(img, seed, bb)
+
+        pipeline = CachingPipeline(SlowPipeline(), LRUCache())
+        owner = threading.Thread(target=pipeline.run, args=(self.img, 5))
+        owner.start()
+        time.sleep(0.02)
+        start = time.monotonic()
+        with deadlines.until(start + 0.05):
+            self.assertRaises(deadlines.DeadlineExceededError, pipeline.run, self.img, 5)
+        self.assertTrue(time.monotonic() - start < 0.4)
+        owner.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
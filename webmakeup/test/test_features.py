@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from automakeup.recommenders import EncodingRecommender
+from webmakeup import features
+
+
+class FeatureLabels:
+    def labels(self):
+        return ["feature"] * 4
+
+
+class UnusedRecommender:
+    def recommend(self, features, seed=None):
+        raise AssertionError("Sampling shouldn't be reached")
+
+
+class FeaturesTestCase(unittest.TestCase):
+    values = np.array([0.5, 12.25, -3.0, 255.0, 1e-9])
+
+    def test_handle_round_trip_keeps_features_exactly(self):
+        handle = features.to_handle(self.values)
+        self.assertTrue(handle.startswith(features.HANDLE_PREFIX))
+        np.testing.assert_array_equal(features.from_handle(handle), self.values)
+
+    def test_parse_accepts_handle(self):
+        np.testing.assert_array_equal(features.parse(features.to_handle(self.values)), self.values)
+
+    def test_parse_falls_back_to_comma_separated_values(self):
+        np.testing.assert_array_equal(features.parse("0.5,12.25,-3,255"), [0.5, 12.25, -3.0, 255.0])
+
+    def test_malformed_handles_are_rejected(self):
+        valid = features.to_handle(self.values)
+        for handle in ["f2." + valid[3:], "f1.!!!", "f1.ąę", valid[:-4]]:
+            with self.subTest(handle=handle):
+                self.assertRaises(ValueError, features.from_handle, handle)
+
+    def test_malformed_values_are_rejected(self):
+        for values in ["", "0.5,,1", "0.5;1", "a,b"]:
+            with self.subTest(values=values):
+                self.assertRaises(ValueError, features.parse, values)
+
+    def test_non_finite_features_are_rejected_before_sampling(self):
+        recommender = EncodingRecommender(None, None, FeatureLabels(), UnusedRecommender())
+        for values in ["nan,1,2,3", "1,inf,2,3", "1,2,-inf,3", features.to_handle([1, 2, np.nan, 3])]:
+            with self.subTest(values=values):
+                self.assertRaises(ValueError, recommender.recommend_features, features.parse(values))
+
+
+if __name__ == '__main__':
+    unittest.main()
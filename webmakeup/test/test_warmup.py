@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+from webmakeup.server import Server
+from webmakeup.warmup import Warmup, parse_sizes
+
+
+class NoEndpointsWorker:
+    def endpoints(self):
+        return {}
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.batches = []
+
+    def warmup(self, imgs):
+        self.batches.append([img.shape for img in imgs])
+
+
+class WarmupTestCase(unittest.TestCase):
+
+    def test_warmup_runs_pipeline_once_per_size_in_each_round(self):
+        pipeline = RecordingPipeline()
+        Warmup(pipeline, [(64, 32), (16, 48)], batch_size=2, rounds=3)()
+        self.assertEqual(pipeline.batches, [[(32, 64, 3), (32, 64, 3)], [(48, 16, 3), (48, 16, 3)]] * 3)
+
+    def test_parse_sizes_reads_width_and_height(self):
+        self.assertEqual(parse_sizes("640x480, 320x240,"), [(640, 480), (320, 240)])
+        self.assertRaises(ValueError, parse_sizes, "640*480")
+
+    def test_server_is_ready_only_after_warmup_finishes(self):
+        started, release = threading.Event(), threading.Event()
+
+        def warmup():
+            started.set()
+            release.wait(5)
+
+        server = Server(NoEndpointsWorker(), warmup=warmup)
+        client = server.app.test_client()
+        thread = threading.Thread(target=server._warm_up)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        self.assertEqual(client.get("/ready").status_code, 503)
+        self.assertEqual(client.get("/live").status_code, 200)
+        release.set()
+        thread.join(5)
+        self.assertEqual(client.get("/ready").status_code, 200)
+        self.assertEqual(client.get("/live").status_code, 200)
+
+    def test_server_is_ready_after_failed_warmup(self):
+        def warmup():
+            raise RuntimeError("Failed")
+
+        server = Server(NoEndpointsWorker(), warmup=warmup)
+        server._warm_up()
+        self.assertEqual(server.app.test_client().get("/ready").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
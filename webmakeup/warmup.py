@@ -0,0 +1,55 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("warmup")
+
+SKIN_COLOR = (224, 172, 138)
+
+
+def parse_sizes(sizes):
+    """Parse image sizes given as 'WIDTHxHEIGHT,WIDTHxHEIGHT,...'"""
+    try:
+        return [tuple(int(v) for v in size.split("x")) for size in sizes.split(",") if size.strip()]
+    except ValueError:
+        raise ValueError("Image sizes should be given as 'WIDTHxHEIGHT,WIDTHxHEIGHT,...'")
+
+
+def synthetic_image(width, height, random_state=None):
+    """Returns noisy RGB image with a skin colored ellipse in the middle, roughly where a face would be"""
+    rng = np.random.default_rng(random_state)
+    img = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    cv2.ellipse(img, (width // 2, height // 2), (width // 5, height // 4), 0, 0, 360, SKIN_COLOR, -1)
+    return img
+
+
+class Warmup:
+    """
+    Runs synthetic images of expected sizes through all pipeline stages
+
+    First runs are much slower because of lazy allocations, kernel selection and imports,
+    so warmup should finish before the server reports that it's ready.
+    """
+
+    def __init__(self, pipeline, sizes, batch_size=1, rounds=1):
+        """
+        Args:
+            pipeline: pipeline with warmup() method
+            sizes: sequence of (width, height) of images expected from clients
+            batch_size: number of images warmed up together, should match the batch size used when serving
+            rounds: number of times all sizes are run
+        """
+        super().__init__()
+        self.pipeline = pipeline
+        self.sizes = sizes
+        self.batch_size = batch_size
+        self.rounds = rounds
+
+    def __call__(self):
+        start = time.perf_counter()
+        for _ in range(self.rounds):
+            for width, height in self.sizes:
+                self.pipeline.warmup([synthetic_image(width, height, i) for i in range(self.batch_size)])
+        logger.info("Warmup finished in {:.2f}s".format(time.perf_counter() - start))
@@ -1,12 +1,12 @@
 import json
 import logging
 from abc import ABC, abstractmethod
-from typing import BinaryIO
+from typing import BinaryIO, List
 
-import cv2
-import numpy as np
-
-from imagine.color.conversion import BgrToRgb
+from automakeup import metrics
+from imagine.io import decoding
+from imagine.shape.figures import Rect
+from webmakeup import features as feature_handles
 
 logger = logging.getLogger("workers")
 
@@ -33,6 +33,12 @@ class Worker(ABC):
 
             will ensure that passed foo parameter is a string and bar is a BinaryIO (like an image).
 
+            Parameters with default values are optional:
+
+            def work(self, foo, bar=None)
+
+            will make the server require only foo parameter.
+
         Returns:
             Dictionary with parameters names and values. For example:
 
@@ -43,28 +49,135 @@ class Worker(ABC):
         """
         return NotImplemented
 
+    def endpoints(self):
+        """
+        Override to provide more endpoints
+
+        Returns:
+            Dictionary with routes and functions handling them, which follow the same rules as work()
+        """
+        return {"/": self.work}
+
     def cleanup(self):
         pass
 
 
 class MakeupWorker(Worker):
+    MAX_RECOMMENDATIONS = 16
+    MAX_FACES = 16
+    MAX_IMAGES = 32
+
     class SimpleEncoder(json.JSONEncoder):
         def default(self, o):
             return o.__dict__
 
-    def __init__(self, pipeline, encoder=SimpleEncoder):
+    def __init__(self, pipeline, encoder=SimpleEncoder, min_decode_size=None):
+        """
+        Args:
+            min_decode_size: JPEG images are decoded in reduced resolution if their shorter side stays at least
+                             this big. if None images are decoded in full resolution.
+        """
         self.pipeline = pipeline
         self.encoder = encoder
+        self.min_decode_size = min_decode_size
+
+    def endpoints(self):
+        return {"/": self.work, "/batch": self.work_batch, "/many": self.work_many, "/faces": self.work_faces,
+                "/features": self.work_features}
+
+    def stream_to_rgb(self, input):
+        return decoding.decode(input.read(), min_size=self.min_decode_size)
+
+    @staticmethod
+    def str_to_rect(bb):
+        """Parse face bounding box given as 'left,top,right,bottom' in pixels"""
+        try:
+            left, top, right, bottom = (int(v) for v in bb.split(","))
+        except ValueError:
+            raise ValueError("Bounding box should be given as 'left,top,right,bottom'")
+        if right <= left or bottom <= top:
+            raise ValueError("Bounding box should have positive width and height")
+        return Rect(top, bottom, left, right)
 
     @staticmethod
-    def stream_to_rgb(input):
-        array = np.frombuffer(input.read(), dtype=np.uint8)
-        return BgrToRgb(cv2.imdecode(array, cv2.IMREAD_COLOR))
+    def rect_to_str(rect):
+        return "{},{},{},{}".format(rect.left, rect.top, rect.right, rect.bottom)
+
+    def work(self, img: BinaryIO, bb: str = None):
+        with metrics.timed("request"):
+            img_rgb, rect = self._decode(img, bb)
+            return self._to_json(self.pipeline.run(img_rgb, bb=rect))
+
+    def work_many(self, img: BinaryIO, k: int = 3, bb: str = None):
+        """Recommend k diverse makeups, the most typical one first"""
+        if not 1 <= k <= self.MAX_RECOMMENDATIONS:
+            raise ValueError("Number of recommendations should be between 1 and {}".format(self.MAX_RECOMMENDATIONS))
+        with metrics.timed("many_request"):
+            img_rgb, rect = self._decode(img, bb)
+            return {"results": [self._to_json(r) for r in self.pipeline.run_many(img_rgb, k, bb=rect)]}
+
+    def work_faces(self, img: BinaryIO, min_size: int = 0):
+        """
+        Recommend makeup for every face in image
+
+        Args:
+            min_size: faces with shorter side smaller than this size in pixels are skipped
+
+        Returns:
+            results for each face with its bounding box given as 'left,top,right,bottom', the most certain face first
+        """
+        with metrics.timed("faces_request"):
+            img_rgb, _ = self._decode(img, None)
+            reduction = img_rgb.reduction if isinstance(img_rgb, decoding.ReducedImage) else 1
+            faces = self.pipeline.run_all(img_rgb, min_size=min_size // reduction, max_faces=self.MAX_FACES)
+            return {"faces": [dict(bb=self.rect_to_str(bb.scale(reduction, origin=(0, 0))), **self._to_json(r))
+                              for bb, r in faces]}
+
+    def work_batch(self, imgs: List[BinaryIO]):
+        """Images that can't be decoded get an error at their index, the rest are processed as usual"""
+        if len(imgs) > self.MAX_IMAGES:
+            raise ValueError("Number of images should be at most {}".format(self.MAX_IMAGES))
+        with metrics.timed("batch_request"):
+            results = [None] * len(imgs)
+            decoded, imgs_rgb = [], []
+            for i, img in enumerate(imgs):
+                try:
+                    with metrics.timed("decoding"):
+                        imgs_rgb.append(self.stream_to_rgb(img))
+                    decoded.append(i)
+                except Exception as e:
+                    logger.warning("Exception occurred during image parameter conversion", exc_info=e)
+                    results[i] = ValueError("Can't convert image {} ({})".format(i, img.filename))
+            if imgs_rgb:
+                for i, result in zip(decoded, self.pipeline.run_batch(imgs_rgb)):
+                    results[i] = result
+            return {"results": [{"error": str(r)} if isinstance(r, Exception) else self._to_json(r)
+                                for r in results]}
+
+    def work_features(self, features: str, seed: int = None):
+        """
+        Recommend makeup for features of a face processed earlier, without processing its image again
+
+        Args:
+            features: handle from the "features" field of an earlier response or comma separated feature values
+            seed: random seed to get reproducible recommendations. if not given, a new recommendation is drawn
+        """
+        with metrics.timed("features_request"):
+            return self._to_json(self.pipeline.run_features(feature_handles.parse(features), seed))
 
-    def work(self, img: BinaryIO):
+    def _decode(self, img, bb):
         try:
-            img_rgb = self.stream_to_rgb(img)
+            with metrics.timed("decoding"):
+                img_rgb = self.stream_to_rgb(img)
         except Exception as e:
             logger.warning("Exception occurred during image parameter conversion", exc_info=e)
             raise ValueError("Can't convert parameter to image")
-        return json.loads(json.dumps(self.pipeline.run(img_rgb), cls=self.encoder))
+        rect = self.str_to_rect(bb) if bb is not None else None
+        if rect is not None and isinstance(img_rgb, decoding.ReducedImage):
+            rect = rect.scale(1 / img_rgb.reduction, origin=(0, 0))
+        return img_rgb, rect
+
+    def _to_json(self, results):
+        output = json.loads(json.dumps(results, cls=self.encoder))
+        output["features"] = feature_handles.to_handle(results.features())
+        return output